@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Bulk loading strategies for the Cassandra 5 ZDM Demo data generator
+Compares pure concurrent single-row inserts against small unlogged batches
+grouped by replica set (token-aware) or by partition (wide rows)
+"""
+
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional
+
+from cassandra.query import BatchStatement, BatchType
+
+from workload import LatencyHistogram
+
+STRATEGIES = ('concurrent', 'token', 'partition')
+
+
+@dataclass
+class LoadResult:
+    """Outcome of loading a set of rows with one strategy"""
+    strategy: str
+    rows: int
+    requests: int
+    errors: int
+    elapsed: float
+    latency: LatencyHistogram
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.elapsed if self.elapsed > 0 else 0.0
+
+
+def execute_windowed(session, requests: Iterable, concurrency: int, histogram: LatencyHistogram,
+                     progress: Optional[Callable[[int], None]] = None) -> Dict[str, int]:
+    """
+    Run (statement, params, row_count) requests with at most `concurrency` in flight.
+
+    Latency of every request is recorded in `histogram`; `progress` is called with
+    the number of rows completed so far.
+    """
+    window = threading.Semaphore(concurrency)
+    lock = threading.Lock()
+    counts = {'requests': 0, 'rows': 0, 'errors': 0}
+
+    def submit(statement, params, row_count):
+        started = time.perf_counter()
+
+        def on_success(_rows):
+            with lock:
+                histogram.record((time.perf_counter() - started) * 1_000_000)
+                counts['rows'] += row_count
+                done = counts['rows']
+            window.release()
+            if progress:
+                progress(done)
+
+        def on_error(exc):
+            with lock:
+                counts['errors'] += 1
+            print(f"Error writing {row_count} row(s): {exc}")
+            window.release()
+
+        try:
+            session.execute_async(statement, params).add_callbacks(on_success, on_error)
+        except Exception as e:
+            on_error(e)
+
+    for statement, params, row_count in requests:
+        window.acquire()
+        counts['requests'] += 1
+        submit(statement, params, row_count)
+
+    for _ in range(concurrency):
+        window.acquire()
+    return counts
+
+
+def _unlogged_batches(groups: Dict[object, List], prepared, batch_size: int):
+    """Yield unlogged batches of at most `batch_size` rows from each group"""
+    for rows in groups.values():
+        for start in range(0, len(rows), batch_size):
+            chunk = rows[start:start + batch_size]
+            if len(chunk) == 1:
+                yield prepared, chunk[0], 1
+                continue
+            batch = BatchStatement(batch_type=BatchType.UNLOGGED)
+            for row in chunk:
+                batch.add(prepared, row)
+            yield batch, None, len(chunk)
+
+
+def group_by_replicas(cluster, keyspace: str, prepared, rows: List[tuple]) -> Dict[object, List]:
+    """
+    Group rows by the replica set owning their partition token.
+
+    Falls back to a single group when token metadata is unavailable.
+    """
+    token_map = cluster.metadata.token_map
+    groups = defaultdict(list)
+    if token_map is None:
+        print("⚠️  Token metadata unavailable - token grouping degrades to plain batching")
+        groups[None] = list(rows)
+        return groups
+    for row in rows:
+        token = token_map.token_class.from_key(prepared.bind(row).routing_key)
+        replicas = frozenset(host.endpoint for host in token_map.get_replicas(keyspace, token))
+        groups[replicas].append(row)
+    return groups
+
+
+def group_by_partition(prepared, rows: List[tuple]) -> Dict[bytes, List]:
+    """Group rows sharing the same serialized partition key"""
+    groups = defaultdict(list)
+    for row in rows:
+        groups[prepared.bind(row).routing_key].append(row)
+    return groups
+
+
+def load_rows(strategy: str, session, cluster, keyspace: str, prepared, rows: List[tuple],
+              concurrency: int, batch_size: int, report_every: int = 0) -> LoadResult:
+    """Load `rows` with the given strategy and return timing and latency"""
+    histogram = LatencyHistogram()
+    total = len(rows)
+    next_report = [report_every]
+
+    def progress(done):
+        if report_every and done >= next_report[0]:
+            next_report[0] += report_every
+            print(f"Inserted {done}/{total} rows...")
+
+    started = time.perf_counter()
+    if strategy == 'concurrent':
+        requests = ((prepared, row, 1) for row in rows)
+    elif strategy == 'token':
+        requests = _unlogged_batches(group_by_replicas(cluster, keyspace, prepared, rows), prepared, batch_size)
+    elif strategy == 'partition':
+        requests = _unlogged_batches(group_by_partition(prepared, rows), prepared, batch_size)
+    else:
+        raise ValueError(f"Unknown load strategy '{strategy}' (expected one of {', '.join(STRATEGIES)})")
+
+    counts = execute_windowed(session, requests, concurrency, histogram, progress)
+    elapsed = time.perf_counter() - started
+    return LoadResult(strategy, counts['rows'], counts['requests'], counts['errors'], elapsed, histogram)
+
+
+def format_comparison(results: List[LoadResult]) -> str:
+    """Render a side-by-side comparison of load strategies"""
+    baseline = next((r for r in results if r.strategy == 'concurrent'), None)
+    lines = [
+        "=== Load strategy comparison ===",
+        f"  {'strategy':<11} {'rows':>9} {'requests':>9} {'errors':>7} {'seconds':>8} "
+        f"{'rows/s':>10} {'vs conc.':>8} {'p50 ms':>8} {'p99 ms':>8}",
+    ]
+    for result in results:
+        speedup = (f"{result.rows_per_second / baseline.rows_per_second:>7.2f}x"
+                   if baseline and baseline.rows_per_second else f"{'-':>8}")
+        lines.append(
+            f"  {result.strategy:<11} {result.rows:>9} {result.requests:>9} {result.errors:>7} "
+            f"{result.elapsed:>8.2f} {result.rows_per_second:>10.1f} {speedup} "
+            f"{result.latency.percentile(0.5) / 1000:>8.2f} {result.latency.percentile(0.99) / 1000:>8.2f}"
+        )
+    fastest = max(results, key=lambda r: r.rows_per_second)
+    lines.append(f"  Fastest: {fastest.strategy} ({fastest.rows_per_second:.1f} rows/s)")
+    return "\n".join(lines)
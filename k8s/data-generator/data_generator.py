@@ -1,17 +1,22 @@
 #!/usr/bin/env python3
 """
 Data Generator for Cassandra 5 ZDM Demo
-Generates demo data with UUID, name, email, gender, address fields
+Generates demo data with UUID, name, email, gender, address fields, or rows for
+any existing table by inferring column generators from cluster metadata
 """
 
 import os
 import sys
-import uuid
-import random
 from cassandra.cluster import Cluster
 from cassandra.auth import PlainTextAuthProvider
 from faker import Faker
 
+# CQL_BACKEND=fake runs against the in-process stand-in (scripts/fake_cql.py) for offline benchmarking
+if os.getenv('CQL_BACKEND', '').lower() == 'fake':
+    sys.path.insert(0, os.getenv('FAKE_CQL_PATH',
+                                 os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'scripts')))
+    from fake_cql import FakeCluster as Cluster
+
 # Configuration from environment variables
 CASSANDRA_HOST = os.getenv('CASSANDRA_HOST', 'cassandra-svc')
 CASSANDRA_PORT = int(os.getenv('CASSANDRA_PORT', '9042'))
@@ -21,9 +26,33 @@ KEYSPACE = os.getenv('KEYSPACE', 'demo')
 TABLE = os.getenv('TABLE', 'users')
 ROW_COUNT = int(os.getenv('ROW_COUNT', '1000'))
 
+# Bulk load strategy: 'concurrent', 'token' (unlogged batches per replica set),
+# 'partition' (unlogged same-partition batches) or 'compare' (run all and report)
+LOAD_STRATEGY = os.getenv('LOAD_STRATEGY', 'concurrent')
+LOAD_CONCURRENCY = int(os.getenv('LOAD_CONCURRENCY', '64'))
+BATCH_SIZE = int(os.getenv('BATCH_SIZE', '10'))
+# 'users' targets TABLE; 'wide' targets a clustered {TABLE}_by_bucket table with WIDE_PARTITIONS partitions
+SCHEMA_VARIANT = os.getenv('SCHEMA_VARIANT', 'users')
+WIDE_PARTITIONS = int(os.getenv('WIDE_PARTITIONS', '100'))
+WIDE_TABLE = f"{TABLE}_by_bucket"
+# Per-column generator overrides; defaults to column-specs/<table>.yaml when present
+COLUMN_SPECS = os.getenv('COLUMN_SPECS', '')
+# Set to 'false' when pointing the generator at an existing (e.g. production) schema
+CREATE_SCHEMA = os.getenv('CREATE_SCHEMA', 'true').lower() == 'true'
+
+# 'load' inserts ROW_COUNT rows and exits; 'workload' runs a continuous mixed workload
+GENERATOR_MODE = os.getenv('GENERATOR_MODE', 'load')
+WORKLOAD_TARGETS = os.getenv('WORKLOAD_TARGETS', '')  # e.g. 'origin=cassandra-svc:9042,proxy=zdm-proxy-svc:9042'
+WORKLOAD_MIX = os.getenv('WORKLOAD_MIX', 'insert:40,read:40,update:15,delete:5')
+WORKLOAD_CONCURRENCY = int(os.getenv('WORKLOAD_CONCURRENCY', '32'))
+WORKLOAD_RATE = float(os.getenv('WORKLOAD_RATE', '0'))  # ops/s per target, 0 = unthrottled
+WORKLOAD_DURATION = float(os.getenv('WORKLOAD_DURATION', '0'))  # seconds, 0 = run until stopped
+REPORT_INTERVAL = float(os.getenv('REPORT_INTERVAL', '10'))
+METRICS_PORT = int(os.getenv('METRICS_PORT', '9100'))  # 0 disables the Prometheus endpoint
+
 fake = Faker(['en_GB'])  # British English as specified
 
-def connect_to_cassandra():
+def connect_to_cassandra(host=CASSANDRA_HOST, port=CASSANDRA_PORT):
     """Connect to Cassandra cluster with retries"""
     auth_provider = PlainTextAuthProvider(
         username=CASSANDRA_USERNAME,
@@ -31,8 +60,8 @@ def connect_to_cassandra():
     )
     
     cluster = Cluster(
-        [CASSANDRA_HOST],
-        port=CASSANDRA_PORT,
+        [host],
+        port=port,
         auth_provider=auth_provider,
         connect_timeout=30,
         control_connection_timeout=30
@@ -42,7 +71,7 @@ def connect_to_cassandra():
     for attempt in range(max_retries):
         try:
             session = cluster.connect()
-            print(f"Connected to Cassandra at {CASSANDRA_HOST}:{CASSANDRA_PORT}")
+            print(f"Connected to Cassandra at {host}:{port}")
             return cluster, session
         except Exception as e:
             print(f"Connection attempt {attempt + 1}/{max_retries} failed: {e}")
@@ -82,54 +111,129 @@ def create_keyspace_and_table(session):
     """
     session.execute(table_cql)
     print(f"Table '{KEYSPACE}.{TABLE}' created/verified")
+    
+    if SCHEMA_VARIANT == 'wide':
+        wide_cql = f"""
+        CREATE TABLE IF NOT EXISTS {WIDE_TABLE} (
+            bucket INT,
+            id UUID,
+            name TEXT,
+            email TEXT,
+            gender TEXT,
+            address TEXT,
+            PRIMARY KEY ((bucket), id)
+        )
+        """
+        session.execute(wide_cql)
+        print(f"Table '{KEYSPACE}.{WIDE_TABLE}' created/verified")
+
+def column_specs_path(table):
+    """Resolve the column spec file for a table"""
+    if COLUMN_SPECS:
+        return COLUMN_SPECS
+    default_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'column-specs', f"{table}.yaml")
+    return default_path if os.path.exists(default_path) else None
 
-def generate_demo_data(session):
+def table_generator(cluster, table):
+    """Build the metadata-driven row generator for a table"""
+    from schema import build_table_generator, load_column_specs
+    
+    specs_path = column_specs_path(table)
+    specs = load_column_specs(specs_path)
+    if table == WIDE_TABLE:
+        specs.setdefault('bucket', {'min': 0, 'max': WIDE_PARTITIONS - 1})
+    generator = build_table_generator(cluster, KEYSPACE, table, fake, specs)
+    print(f"Columns for {KEYSPACE}.{table}: {', '.join(generator.columns)} "
+          f"(primary key: {', '.join(generator.key_columns)}; specs: {specs_path or 'none'})")
+    return generator
+
+def target_table():
+    """Table written by the bulk load for the configured schema variant"""
+    return WIDE_TABLE if SCHEMA_VARIANT == 'wide' else TABLE
+
+def generate_demo_data(session, cluster):
     """Generate and insert demo data"""
-    print(f"Generating {ROW_COUNT} rows of demo data...")
+    from batching import STRATEGIES, format_comparison, load_rows
     
-    insert_cql = f"""
-    INSERT INTO {TABLE} (id, name, email, gender, address)
-    VALUES (?, ?, ?, ?, ?)
-    """
-    prepared = session.prepare(insert_cql)
+    table = target_table()
+    generator = table_generator(cluster, table)
+    prepared = session.prepare(generator.insert_cql)
     
-    batch_size = 100
-    inserted = 0
+    if LOAD_STRATEGY == 'compare':
+        # Same-partition batches only group anything on the wide variant
+        strategies = [s for s in STRATEGIES if s != 'partition' or SCHEMA_VARIANT == 'wide']
+    else:
+        strategies = [LOAD_STRATEGY]
     
-    for i in range(ROW_COUNT):
-        user_id = uuid.uuid4()
-        name = fake.name()
-        email = fake.email()
-        gender = random.choice(['Male', 'Female', 'Non-binary', 'Prefer not to say'])
-        address = fake.address().replace('\n', ', ')
-        
-        try:
-            session.execute(prepared, (user_id, name, email, gender, address))
-            inserted += 1
-            
-            if (i + 1) % batch_size == 0:
-                print(f"Inserted {i + 1}/{ROW_COUNT} rows...")
-                
-        except Exception as e:
-            print(f"Error inserting row {i + 1}: {e}")
+    results = []
+    for strategy in strategies:
+        print(f"Generating {ROW_COUNT} rows of demo data...")
+        rows = [generator.row() for _ in range(ROW_COUNT)]
+        print(f"Loading with strategy '{strategy}' "
+              f"(concurrency {LOAD_CONCURRENCY}, batch size {BATCH_SIZE})...")
+        result = load_rows(
+            strategy, session, cluster, KEYSPACE, prepared, rows,
+            concurrency=LOAD_CONCURRENCY,
+            batch_size=BATCH_SIZE,
+            report_every=max(ROW_COUNT // 10, 100)
+        )
+        print(f"Successfully inserted {result.rows} rows into {KEYSPACE}.{table} "
+              f"in {result.elapsed:.2f}s ({result.rows_per_second:.1f} rows/s, {result.errors} failed requests)")
+        results.append(result)
+    
+    if len(results) > 1:
+        print()
+        print(format_comparison(results))
     
-    print(f"Successfully inserted {inserted} rows into {KEYSPACE}.{TABLE}")
-    return inserted
+    return sum(result.rows for result in results)
 
 def verify_data(session):
     """Verify data was inserted correctly"""
-    count_cql = f"SELECT COUNT(*) FROM {TABLE}"
+    table = target_table()
+    count_cql = f"SELECT COUNT(*) FROM {table}"
     result = session.execute(count_cql)
     count = result.one()[0]
-    print(f"Verification: {count} total rows in {KEYSPACE}.{TABLE}")
+    print(f"Verification: {count} total rows in {KEYSPACE}.{table}")
     
     # Show a few sample records
-    sample_cql = f"SELECT id, name, email, gender FROM {TABLE} LIMIT 5"
+    sample_cql = f"SELECT * FROM {table} LIMIT 5"
     results = session.execute(sample_cql)
     
     print("Sample records:")
     for row in results:
-        print(f"  {row.id} | {row.name} | {row.email} | {row.gender}")
+        print(f"  {' | '.join(str(value) for value in row[:4])}")
+
+def run_workload_mode():
+    """Run the continuous mixed workload until stopped"""
+    from workload import parse_mix, parse_targets, run_workload
+    
+    mix = parse_mix(WORKLOAD_MIX)
+    targets = parse_targets(WORKLOAD_TARGETS, CASSANDRA_HOST, CASSANDRA_PORT)
+    clusters = []
+    sessions = {}
+    generators = {}
+    try:
+        for name, host, port in targets:
+            cluster, session = connect_to_cassandra(host, port)
+            clusters.append(cluster)
+            if CREATE_SCHEMA:
+                create_keyspace_and_table(session)
+            sessions[name] = session
+            generators[name] = table_generator(cluster, TABLE)
+        
+        run_workload(
+            sessions,
+            generators,
+            mix,
+            concurrency=WORKLOAD_CONCURRENCY,
+            rate=WORKLOAD_RATE,
+            duration=WORKLOAD_DURATION,
+            report_interval=REPORT_INTERVAL,
+            metrics_port=METRICS_PORT
+        )
+    finally:
+        for cluster in clusters:
+            cluster.shutdown()
 
 def main():
     """Main execution function"""
@@ -137,24 +241,42 @@ def main():
     print(f"Target: {CASSANDRA_HOST}:{CASSANDRA_PORT}")
     print(f"Keyspace: {KEYSPACE}")
     print(f"Table: {TABLE}")
-    print(f"Rows to generate: {ROW_COUNT}")
+    print(f"Mode: {GENERATOR_MODE}")
+    if GENERATOR_MODE == 'workload':
+        print(f"Workload targets: {WORKLOAD_TARGETS or 'default'}")
+        print(f"Workload mix: {WORKLOAD_MIX}")
+    else:
+        print(f"Rows to generate: {ROW_COUNT}")
+        print(f"Load strategy: {LOAD_STRATEGY} (schema variant: {SCHEMA_VARIANT})")
     print()
     
+    if GENERATOR_MODE == 'workload':
+        try:
+            run_workload_mode()
+            print(f"\n✅ Workload completed")
+        except Exception as e:
+            print(f"\n❌ Workload failed: {e}")
+            sys.exit(1)
+        return
+    
     try:
         # Connect to Cassandra
         cluster, session = connect_to_cassandra()
         
         # Create keyspace and table
-        create_keyspace_and_table(session)
+        if CREATE_SCHEMA:
+            create_keyspace_and_table(session)
+        else:
+            session.set_keyspace(KEYSPACE)
         
         # Generate demo data
-        inserted_count = generate_demo_data(session)
+        inserted_count = generate_demo_data(session, cluster)
         
         # Verify data
         verify_data(session)
         
         print(f"\n✅ Data generation completed successfully!")
-        print(f"   Generated {inserted_count} records in {KEYSPACE}.{TABLE}")
+        print(f"   Generated {inserted_count} records in {KEYSPACE}.{target_table()}")
         
     except Exception as e:
         print(f"\n❌ Data generation failed: {e}")
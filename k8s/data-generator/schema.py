@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Schema-driven row generation for the Cassandra 5 ZDM Demo data generator
+Reads table metadata from the driver, infers a value generator per column from
+its CQL type and builds the prepared statements used by the load and workload
+engines. Generators can be overridden per column from a YAML spec file
+"""
+
+import datetime
+import os
+import random
+import uuid
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import yaml
+from cassandra.metadata import protect_name
+from cassandra.util import Date, Duration, Time
+
+# Text columns whose name matches one of these Faker providers use it by default
+FAKER_TEXT_PROVIDERS = {
+    'name', 'first_name', 'last_name', 'email', 'address', 'street_address', 'city',
+    'country', 'postcode', 'phone_number', 'company', 'job', 'user_name', 'url',
+    'sentence', 'text', 'word',
+}
+
+SCALAR_TYPES = {
+    'ascii', 'bigint', 'blob', 'boolean', 'counter', 'date', 'decimal', 'double', 'duration',
+    'float', 'inet', 'int', 'smallint', 'text', 'time', 'timestamp', 'timeuuid', 'tinyint',
+    'uuid', 'varchar', 'varint',
+}
+
+INTEGER_RANGES = {
+    'tinyint': (-2 ** 7, 2 ** 7 - 1),
+    'smallint': (-2 ** 15, 2 ** 15 - 1),
+    'int': (0, 1_000_000),
+    'bigint': (0, 10 ** 12),
+    'varint': (0, 10 ** 12),
+}
+
+
+def parse_cql_type(type_string: str) -> Tuple[str, List]:
+    """
+    Parse a CQL type such as 'map<text, frozen<list<int>>>' into a
+    (name, [parameters]) tree. Numeric parameters (vector dimensions) stay strings.
+    """
+    def parse(pos: int) -> Tuple[Tuple[str, List], int]:
+        start = pos
+        while pos < len(type_string) and type_string[pos] not in '<>,':
+            pos += 1
+        name = type_string[start:pos].strip().strip('"')
+        params = []
+        if pos < len(type_string) and type_string[pos] == '<':
+            pos += 1
+            while True:
+                param, pos = parse(pos)
+                params.append(param)
+                if type_string[pos] == ',':
+                    pos += 1
+                    continue
+                pos += 1  # closing '>'
+                break
+        return (name, params), pos
+
+    node, _ = parse(0)
+    return node
+
+
+def _with_nulls(generator: Callable[[], Any], null_ratio: float) -> Callable[[], Any]:
+    if null_ratio <= 0:
+        return generator
+    return lambda: None if random.random() < null_ratio else generator()
+
+
+def _scalar_generator(type_name: str, spec: Dict, column: str, fake) -> Callable[[], Any]:
+    low, high = spec.get('min'), spec.get('max')
+    if type_name == 'uuid':
+        return uuid.uuid4
+    if type_name == 'timeuuid':
+        return uuid.uuid1
+    if type_name in ('text', 'varchar', 'ascii'):
+        provider = spec.get('faker') or (column if column in FAKER_TEXT_PROVIDERS else None)
+        if provider:
+            method = getattr(fake, provider)
+            return lambda: str(method()).replace('\n', ', ')
+        length = int(spec.get('length', 16))
+        return lambda: fake.pystr(min_chars=min(length, 8), max_chars=length)
+    if type_name in INTEGER_RANGES:
+        default_low, default_high = INTEGER_RANGES[type_name]
+        low = default_low if low is None else int(low)
+        high = default_high if high is None else int(high)
+        return lambda: random.randint(low, high)
+    if type_name in ('float', 'double'):
+        low, high = float(low or 0.0), float(1000.0 if high is None else high)
+        return lambda: random.uniform(low, high)
+    if type_name == 'decimal':
+        low, high = float(low or 0.0), float(1000.0 if high is None else high)
+        return lambda: Decimal(f"{random.uniform(low, high):.2f}")
+    if type_name == 'boolean':
+        return lambda: random.random() < 0.5
+    if type_name == 'timestamp':
+        days = int(spec.get('days', 365))
+        return lambda: (datetime.datetime.utcnow()
+                        - datetime.timedelta(seconds=random.randint(0, days * 86400))).replace(microsecond=0)
+    if type_name == 'date':
+        days = int(spec.get('days', 365))
+        return lambda: Date(datetime.date.today() - datetime.timedelta(days=random.randint(0, days)))
+    if type_name == 'time':
+        return lambda: Time(random.randint(0, 86400 * 10 ** 9 - 1))
+    if type_name == 'duration':
+        return lambda: Duration(0, random.randint(0, 30), random.randint(0, 86400 * 10 ** 9))
+    if type_name == 'inet':
+        return fake.ipv4
+    if type_name == 'blob':
+        length = int(spec.get('length', 16))
+        return lambda: os.urandom(length)
+    if type_name == 'counter':
+        raise ValueError(f"Column '{column}' is a counter; counter tables cannot be loaded with INSERT")
+    raise ValueError(f"Column '{column}' has unsupported CQL type '{type_name}'")
+
+
+def _type_generator(node: Tuple[str, List], spec: Dict, column: str, keyspace_meta, fake) -> Callable[[], Any]:
+    """Build a generator for a parsed CQL type, recursing into collections and UDTs"""
+    name, params = node
+    if 'value' in spec:
+        value = spec['value']
+        return lambda: value
+    if 'choices' in spec:
+        choices = list(spec['choices'])
+        return lambda: random.choice(choices)
+
+    lowered = name.lower()
+    size = int(spec.get('size', 3))
+    if lowered == 'frozen':
+        return _type_generator(params[0], spec, column, keyspace_meta, fake)
+    if lowered in ('list', 'set'):
+        element = _type_generator(params[0], spec.get('element', {}), column, keyspace_meta, fake)
+        if lowered == 'set':
+            return lambda: {element() for _ in range(size)}
+        return lambda: [element() for _ in range(size)]
+    if lowered == 'map':
+        key = _type_generator(params[0], spec.get('keys', {}), column, keyspace_meta, fake)
+        value = _type_generator(params[1], spec.get('values', {}), column, keyspace_meta, fake)
+        return lambda: {key(): value() for _ in range(size)}
+    if lowered == 'tuple':
+        elements = [_type_generator(param, {}, column, keyspace_meta, fake) for param in params]
+        return lambda: tuple(element() for element in elements)
+    if lowered == 'vector':
+        element = _type_generator(params[0], spec.get('element', {}), column, keyspace_meta, fake)
+        dimension = int(params[1][0])
+        return lambda: [element() for _ in range(dimension)]
+    if not params and lowered in SCALAR_TYPES:
+        return _scalar_generator(lowered, spec, column, fake)
+
+    user_type = keyspace_meta.user_types.get(name) if keyspace_meta is not None else None
+    if user_type is None:
+        raise ValueError(f"Column '{column}' has unknown CQL type '{name}'")
+    field_specs = spec.get('fields', {})
+    fields = [
+        _with_nulls(
+            _type_generator(parse_cql_type(field_type), field_specs.get(field_name, {}),
+                            field_name, keyspace_meta, fake),
+            float(field_specs.get(field_name, {}).get('null_ratio', 0)))
+        for field_name, field_type in zip(user_type.field_names, user_type.field_types)
+    ]
+    # UDT values bind positionally in field order
+    return lambda: tuple(field() for field in fields)
+
+
+def load_column_specs(path: Optional[str]) -> Dict[str, Dict]:
+    """
+    Load per-column overrides from YAML:
+
+        columns:
+          gender:
+            choices: [Male, Female]
+          tags:
+            size: 5
+            element: {faker: word}
+          address:
+            fields:
+              postcode: {faker: postcode}
+    """
+    if not path:
+        return {}
+    with open(path, 'r') as f:
+        document = yaml.safe_load(f) or {}
+    return document.get('columns', {}) or {}
+
+
+class TableGenerator:
+    """Random rows and matching prepared-statement CQL for one table"""
+
+    def __init__(self, keyspace: str, table: str, columns: List[str], key_columns: List[str],
+                 partition_key_columns: List[str], generators: Dict[str, Callable[[], Any]]):
+        self.keyspace = keyspace
+        self.table = table
+        self.columns = columns
+        self.key_columns = key_columns
+        self.partition_key_columns = partition_key_columns
+        self.regular_columns = [c for c in columns if c not in key_columns]
+        self.generators = [generators[c] for c in columns]
+        self.regular_generators = [generators[c] for c in self.regular_columns]
+        self.key_indexes = [columns.index(c) for c in key_columns]
+
+        qualified = f"{protect_name(keyspace)}.{protect_name(table)}"
+        column_list = ', '.join(protect_name(c) for c in columns)
+        key_clause = ' AND '.join(f"{protect_name(c)} = ?" for c in key_columns)
+        set_clause = ', '.join(f"{protect_name(c)} = ?" for c in self.regular_columns)
+        self.insert_cql = f"INSERT INTO {qualified} ({column_list}) VALUES ({', '.join('?' for _ in columns)})"
+        self.select_cql = f"SELECT {column_list} FROM {qualified} WHERE {key_clause}"
+        self.delete_cql = f"DELETE FROM {qualified} WHERE {key_clause}"
+        self.key_select_cql = f"SELECT {', '.join(protect_name(c) for c in key_columns)} FROM {qualified}"
+        self.update_cql = f"UPDATE {qualified} SET {set_clause} WHERE {key_clause}" if self.regular_columns else None
+
+    def row(self) -> tuple:
+        """Generate one row in `columns` order"""
+        return tuple(generator() for generator in self.generators)
+
+    def key(self, row: tuple) -> tuple:
+        """Primary key values of a generated row"""
+        return tuple(row[i] for i in self.key_indexes)
+
+    def update_params(self, key: tuple) -> tuple:
+        """Fresh regular-column values followed by the primary key, for `update_cql`"""
+        return tuple(generator() for generator in self.regular_generators) + tuple(key)
+
+
+def build_table_generator(cluster, keyspace: str, table: str, fake,
+                          specs: Optional[Dict[str, Dict]] = None) -> TableGenerator:
+    """Inspect `cluster.metadata` for keyspace.table and build its TableGenerator"""
+    specs = specs or {}
+    try:
+        cluster.refresh_table_metadata(keyspace, table)
+    except Exception:
+        pass
+    keyspace_meta = cluster.metadata.keyspaces.get(keyspace)
+    if keyspace_meta is None or table not in keyspace_meta.tables:
+        raise ValueError(f"Table '{keyspace}.{table}' not found in cluster metadata")
+    table_meta = keyspace_meta.tables[table]
+
+    unknown = set(specs) - set(table_meta.columns)
+    if unknown:
+        raise ValueError(f"Column specs reference unknown columns: {', '.join(sorted(unknown))}")
+
+    key_columns = [c.name for c in table_meta.primary_key]
+    generators = {}
+    for name, column_meta in table_meta.columns.items():
+        spec = specs.get(name, {}) or {}
+        generator = _type_generator(parse_cql_type(column_meta.cql_type), spec, name, keyspace_meta, fake)
+        if name not in key_columns:
+            generator = _with_nulls(generator, float(spec.get('null_ratio', 0)))
+        generators[name] = generator
+
+    return TableGenerator(
+        keyspace,
+        table,
+        list(table_meta.columns.keys()),
+        key_columns,
+        [c.name for c in table_meta.partition_key],
+        generators
+    )
@@ -0,0 +1,419 @@
+#!/usr/bin/env python3
+"""
+Continuous workload mode for the Cassandra 5 ZDM Demo data generator
+Drives a steady insert/read/update/delete mix against one or more targets and
+records per-operation latency histograms, exposed via periodic summaries and a
+Prometheus endpoint
+"""
+
+import random
+import signal
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+OPERATIONS = ('insert', 'read', 'update', 'delete')
+REPORT_QUANTILES = (0.5, 0.9, 0.95, 0.99, 0.999)
+
+
+class LatencyHistogram:
+    """
+    Log-linear latency histogram in the spirit of HdrHistogram.
+
+    Values are recorded in microseconds. Every power-of-two range is split into
+    64 linear sub-buckets, so any recorded value is reported within ~1.6% of its
+    true value while the whole 1µs-60s range fits in ~1.3k counters.
+    """
+
+    SUB_BUCKET_BITS = 7
+    SUB_BUCKET_COUNT = 1 << SUB_BUCKET_BITS
+    SUB_BUCKET_HALF = SUB_BUCKET_COUNT >> 1
+
+    def __init__(self, highest_us: int = 60_000_000):
+        self.highest_us = highest_us
+        self.counts = [0] * (self._index(highest_us) + 1)
+        self.total_count = 0
+        self.total_us = 0
+        self.min_us = None
+        self.max_us = 0
+
+    def _index(self, value: int) -> int:
+        if value < self.SUB_BUCKET_COUNT:
+            return value
+        shift = value.bit_length() - self.SUB_BUCKET_BITS
+        return (self.SUB_BUCKET_COUNT + (shift - 1) * self.SUB_BUCKET_HALF
+                + (value >> shift) - self.SUB_BUCKET_HALF)
+
+    def _upper_bound(self, index: int) -> int:
+        if index < self.SUB_BUCKET_COUNT:
+            return index
+        shift = (index - self.SUB_BUCKET_COUNT) // self.SUB_BUCKET_HALF + 1
+        sub_bucket = (index - self.SUB_BUCKET_COUNT) % self.SUB_BUCKET_HALF + self.SUB_BUCKET_HALF
+        return ((sub_bucket + 1) << shift) - 1
+
+    def record(self, value_us: int):
+        """Record a single latency sample in microseconds"""
+        value_us = min(max(int(value_us), 0), self.highest_us)
+        self.counts[self._index(value_us)] += 1
+        self.total_count += 1
+        self.total_us += value_us
+        if self.min_us is None or value_us < self.min_us:
+            self.min_us = value_us
+        if value_us > self.max_us:
+            self.max_us = value_us
+
+    def merge(self, other: 'LatencyHistogram'):
+        """Add all samples from another histogram of the same shape"""
+        for i, count in enumerate(other.counts):
+            if count:
+                self.counts[i] += count
+        self.total_count += other.total_count
+        self.total_us += other.total_us
+        if other.min_us is not None and (self.min_us is None or other.min_us < self.min_us):
+            self.min_us = other.min_us
+        self.max_us = max(self.max_us, other.max_us)
+
+    def percentile(self, quantile: float) -> int:
+        """Return the latency (µs) at the given quantile (0.0-1.0)"""
+        if self.total_count == 0:
+            return 0
+        target = max(1, int(round(quantile * self.total_count)))
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return min(self._upper_bound(i), self.max_us)
+        return self.max_us
+
+    def mean(self) -> float:
+        return self.total_us / self.total_count if self.total_count else 0.0
+
+
+class WorkloadStats:
+    """Thread-safe per-(target, operation) latency and error accounting"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started_at = time.time()
+        self.cumulative: Dict[Tuple[str, str], LatencyHistogram] = {}
+        self.interval: Dict[Tuple[str, str], LatencyHistogram] = {}
+        self.errors: Dict[Tuple[str, str], int] = {}
+        self.interval_errors: Dict[Tuple[str, str], int] = {}
+
+    def record(self, target: str, operation: str, latency_us: int):
+        key = (target, operation)
+        with self.lock:
+            if key not in self.cumulative:
+                self.cumulative[key] = LatencyHistogram()
+                self.interval[key] = LatencyHistogram()
+            self.cumulative[key].record(latency_us)
+            self.interval[key].record(latency_us)
+
+    def record_error(self, target: str, operation: str):
+        key = (target, operation)
+        with self.lock:
+            self.errors[key] = self.errors.get(key, 0) + 1
+            self.interval_errors[key] = self.interval_errors.get(key, 0) + 1
+
+    def take_interval(self) -> Tuple[Dict[Tuple[str, str], LatencyHistogram], Dict[Tuple[str, str], int]]:
+        """Swap out the interval histograms and return the finished interval"""
+        with self.lock:
+            interval, errors = self.interval, self.interval_errors
+            self.interval = {key: LatencyHistogram() for key in self.cumulative}
+            self.interval_errors = {}
+        return interval, errors
+
+    def snapshot(self) -> Tuple[Dict[Tuple[str, str], LatencyHistogram], Dict[Tuple[str, str], int]]:
+        """Copy the cumulative histograms so they can be rendered without the lock"""
+        with self.lock:
+            histograms = {}
+            for key, histogram in self.cumulative.items():
+                copy = LatencyHistogram(histogram.highest_us)
+                copy.merge(histogram)
+                histograms[key] = copy
+            return histograms, dict(self.errors)
+
+
+def format_summary(title: str, histograms: Dict[Tuple[str, str], LatencyHistogram],
+                   errors: Dict[Tuple[str, str], int], elapsed: float) -> str:
+    """Render a fixed-width latency table (milliseconds) for the console"""
+    lines = [title,
+             f"  {'target':<12} {'op':<7} {'ops/s':>9} {'p50':>8} {'p95':>8} "
+             f"{'p99':>8} {'p99.9':>8} {'max':>8} {'errors':>7}"]
+    for key in sorted(set(histograms) | set(errors)):
+        target, operation = key
+        histogram = histograms.get(key) or LatencyHistogram()
+        rate = histogram.total_count / elapsed if elapsed > 0 else 0.0
+        lines.append(
+            f"  {target:<12} {operation:<7} {rate:>9.1f} "
+            f"{histogram.percentile(0.5) / 1000:>8.2f} {histogram.percentile(0.95) / 1000:>8.2f} "
+            f"{histogram.percentile(0.99) / 1000:>8.2f} {histogram.percentile(0.999) / 1000:>8.2f} "
+            f"{histogram.max_us / 1000:>8.2f} {errors.get(key, 0):>7}"
+        )
+    return "\n".join(lines)
+
+
+def render_prometheus(stats: WorkloadStats) -> str:
+    """Render cumulative stats in the Prometheus text exposition format"""
+    histograms, errors = stats.snapshot()
+    lines = [
+        '# HELP zdm_workload_latency_seconds Client-side operation latency',
+        '# TYPE zdm_workload_latency_seconds summary',
+    ]
+    for (target, operation), histogram in sorted(histograms.items()):
+        labels = f'target="{target}",op="{operation}"'
+        for quantile in REPORT_QUANTILES:
+            value = histogram.percentile(quantile) / 1_000_000
+            lines.append(f'zdm_workload_latency_seconds{{{labels},quantile="{quantile}"}} {value:.6f}')
+        lines.append(f'zdm_workload_latency_seconds_sum{{{labels}}} {histogram.total_us / 1_000_000:.6f}')
+        lines.append(f'zdm_workload_latency_seconds_count{{{labels}}} {histogram.total_count}')
+    lines.append('# HELP zdm_workload_errors_total Failed operations')
+    lines.append('# TYPE zdm_workload_errors_total counter')
+    for (target, operation), count in sorted(errors.items()):
+        lines.append(f'zdm_workload_errors_total{{target="{target}",op="{operation}"}} {count}')
+    lines.append('# HELP zdm_workload_uptime_seconds Seconds since the workload started')
+    lines.append('# TYPE zdm_workload_uptime_seconds gauge')
+    lines.append(f'zdm_workload_uptime_seconds {time.time() - stats.started_at:.1f}')
+    return "\n".join(lines) + "\n"
+
+
+def start_metrics_server(stats: WorkloadStats, port: int) -> ThreadingHTTPServer:
+    """Serve /metrics on a background thread"""
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_response(404)
+                self.end_headers()
+                return
+            body = render_prometheus(stats).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('0.0.0.0', port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name='metrics-server', daemon=True).start()
+    print(f"Prometheus metrics available on :{port}/metrics")
+    return server
+
+
+def parse_mix(spec: str) -> Dict[str, int]:
+    """Parse an operation mix such as 'insert:40,read:40,update:15,delete:5'"""
+    mix = {}
+    for part in spec.split(','):
+        if not part.strip():
+            continue
+        operation, _, weight = part.partition(':')
+        operation = operation.strip().lower()
+        if operation not in OPERATIONS:
+            raise ValueError(f"Unknown workload operation '{operation}' (expected one of {', '.join(OPERATIONS)})")
+        mix[operation] = int(weight or 1)
+    if not mix or sum(mix.values()) <= 0:
+        raise ValueError(f"Workload mix '{spec}' has no positive weights")
+    return mix
+
+
+def parse_targets(spec: str, default_host: str, default_port: int) -> List[Tuple[str, str, int]]:
+    """Parse 'name=host:port,...' into (name, host, port); empty means the default host"""
+    if not spec.strip():
+        return [('default', default_host, default_port)]
+    targets = []
+    for part in spec.split(','):
+        if not part.strip():
+            continue
+        name, _, address = part.strip().partition('=')
+        if not address:
+            address = name
+        host, _, port = address.partition(':')
+        targets.append((name, host, int(port or default_port)))
+    return targets
+
+
+class KeyPool:
+    """Bounded pool of known ids used to aim reads, updates and deletes at live rows"""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.ids = []
+        self.lock = threading.Lock()
+
+    def add(self, key):
+        with self.lock:
+            if len(self.ids) < self.capacity:
+                self.ids.append(key)
+            else:
+                self.ids[random.randrange(self.capacity)] = key
+
+    def sample(self):
+        with self.lock:
+            return random.choice(self.ids) if self.ids else None
+
+    def take(self):
+        """Remove and return a random id (for deletes)"""
+        with self.lock:
+            if not self.ids:
+                return None
+            index = random.randrange(len(self.ids))
+            self.ids[index], self.ids[-1] = self.ids[-1], self.ids[index]
+            return self.ids.pop()
+
+    def __len__(self):
+        return len(self.ids)
+
+
+class TargetWorkload:
+    """Issues the operation mix against a single session with a bounded in-flight window"""
+
+    def __init__(self, name: str, session, generator, stats: WorkloadStats, mix: Dict[str, int],
+                 concurrency: int, rate: float, key_pool_size: int):
+        self.name = name
+        self.session = session
+        self.stats = stats
+        self.generator = generator
+        self.rate = rate
+        self.operations = list(mix.keys())
+        self.weights = list(mix.values())
+        self.in_flight = threading.Semaphore(concurrency)
+        self.concurrency = concurrency
+        self.keys = KeyPool(key_pool_size)
+        self.statements = {
+            'insert': session.prepare(generator.insert_cql),
+            'read': session.prepare(generator.select_cql),
+            'delete': session.prepare(generator.delete_cql),
+        }
+        if generator.update_cql:
+            self.statements['update'] = session.prepare(generator.update_cql)
+        for row in session.execute(f"{generator.key_select_cql} LIMIT {key_pool_size}"):
+            self.keys.add(tuple(row))
+        print(f"[{name}] Seeded key pool with {len(self.keys)} existing ids")
+
+    def _next_operation(self):
+        operation = random.choices(self.operations, self.weights)[0]
+        if operation == 'update' and 'update' not in self.statements:
+            operation = 'insert'  # key-only table: nothing to update
+        if operation == 'insert':
+            row = self.generator.row()
+            return operation, row, self.generator.key(row)
+        key = self.keys.take() if operation == 'delete' else self.keys.sample()
+        if key is None:
+            row = self.generator.row()
+            return 'insert', row, self.generator.key(row)
+        if operation == 'update':
+            return operation, self.generator.update_params(key), None
+        return operation, key, None
+
+    def _submit(self, operation: str, params: tuple, inserted_key: Optional[tuple]):
+        started = time.perf_counter()
+
+        def on_success(_rows):
+            self.stats.record(self.name, operation, (time.perf_counter() - started) * 1_000_000)
+            if inserted_key is not None:
+                self.keys.add(inserted_key)
+            self.in_flight.release()
+
+        def on_error(_exc):
+            self.stats.record_error(self.name, operation)
+            self.in_flight.release()
+
+        try:
+            future = self.session.execute_async(self.statements[operation], params)
+            future.add_callbacks(on_success, on_error)
+        except Exception:
+            on_error(None)
+
+    def run(self, stop_event: threading.Event):
+        interval = 1.0 / self.rate if self.rate > 0 else 0.0
+        next_at = time.perf_counter()
+        while not stop_event.is_set():
+            if interval:
+                now = time.perf_counter()
+                if next_at > now:
+                    time.sleep(next_at - now)
+                next_at = max(next_at + interval, now - 1.0)
+            while not self.in_flight.acquire(timeout=0.5):
+                if stop_event.is_set():
+                    return
+            self._submit(*self._next_operation())
+
+    def drain(self, timeout: float = 30.0):
+        """Wait for outstanding requests to finish"""
+        deadline = time.time() + timeout
+        acquired = 0
+        while acquired < self.concurrency and time.time() < deadline:
+            if self.in_flight.acquire(timeout=0.5):
+                acquired += 1
+
+
+def run_workload(sessions: Dict[str, object], generators: Dict[str, object], mix: Dict[str, int], concurrency: int, rate: float, duration: float,
+                 report_interval: float, metrics_port: int, key_pool_size: int = 100_000) -> WorkloadStats:
+    """
+    Run the mixed workload against every session until the duration elapses
+    (0 = forever) or SIGTERM/SIGINT is received.
+
+    `generators` maps each target name to the schema TableGenerator built from
+    that target's metadata. `rate` is ops/s per target (0 = as fast as the
+    in-flight window allows).
+    """
+    stats = WorkloadStats()
+    stop_event = threading.Event()
+
+    def handle_stop(signum, _frame):
+        print(f"\nReceived signal {signum}, stopping workload...")
+        stop_event.set()
+
+    signal.signal(signal.SIGTERM, handle_stop)
+    signal.signal(signal.SIGINT, handle_stop)
+
+    server = start_metrics_server(stats, metrics_port) if metrics_port else None
+
+    workloads = [
+        TargetWorkload(name, session, generators[name], stats, mix, concurrency, rate, key_pool_size)
+        for name, session in sessions.items()
+    ]
+    threads = [
+        threading.Thread(target=workload.run, args=(stop_event,), name=f"workload-{workload.name}", daemon=True)
+        for workload in workloads
+    ]
+    for thread in threads:
+        thread.start()
+
+    mix_text = ', '.join(f"{op}:{weight}" for op, weight in mix.items())
+    print(f"Workload running: mix [{mix_text}], concurrency {concurrency}/target, "
+          f"rate {'unlimited' if rate <= 0 else f'{rate:.0f} ops/s'}/target, "
+          f"duration {'unbounded' if duration <= 0 else f'{duration:.0f}s'}")
+
+    deadline = stats.started_at + duration if duration > 0 else None
+    last_report = time.time()
+    while not stop_event.is_set():
+        timeout = report_interval
+        if deadline is not None:
+            timeout = min(timeout, max(deadline - time.time(), 0))
+        if stop_event.wait(timeout):
+            break
+        now = time.time()
+        if now - last_report >= report_interval:
+            interval, errors = stats.take_interval()
+            print(format_summary(f"\n--- interval {time.strftime('%H:%M:%S')} ({now - last_report:.1f}s) ---",
+                                 interval, errors, now - last_report), flush=True)
+            last_report = now
+        if deadline is not None and now >= deadline:
+            stop_event.set()
+
+    for thread in threads:
+        thread.join(timeout=5)
+    for workload in workloads:
+        workload.drain()
+
+    histograms, errors = stats.snapshot()
+    elapsed = time.time() - stats.started_at
+    print(format_summary(f"\n=== Workload summary ({elapsed:.1f}s) ===", histograms, errors, elapsed), flush=True)
+
+    if server:
+        server.shutdown()
+    return stats
@@ -5,6 +5,8 @@ Provides REST API for data operations during migration
 """
 
 import os
+import sys
+import time
 import uuid
 from typing import Optional, List
 from datetime import datetime
@@ -16,6 +18,15 @@ from cassandra.auth import PlainTextAuthProvider
 from cassandra.policies import DCAwareRoundRobinPolicy
 import uvicorn
 
+from shadow_reads import ShadowReadChecker
+
+# CQL_BACKEND=fake runs against the in-process stand-in (scripts/fake_cql.py) for offline benchmarking
+FAKE_BACKEND = os.getenv('CQL_BACKEND', '').lower() == 'fake'
+if FAKE_BACKEND:
+    sys.path.insert(0, os.getenv('FAKE_CQL_PATH',
+                                 os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts')))
+    from fake_cql import FakeCluster as Cluster
+
 # Configuration
 CONNECTION_MODE = os.getenv('CONNECTION_MODE', 'cassandra')  # 'cassandra', 'zdm', or 'astra'
 CASSANDRA_HOST = os.getenv('CASSANDRA_HOST', 'localhost')
@@ -32,6 +43,13 @@ ASTRA_TOKEN = os.getenv('ASTRA_TOKEN')
 KEYSPACE = os.getenv('KEYSPACE', 'demo')
 TABLE = os.getenv('TABLE', 'users')
 
+# Shadow reads: fraction of GET /users/{user_id} repeated against the other cluster (0 = off)
+SHADOW_READ_RATE = float(os.getenv('SHADOW_READ_RATE', '0'))
+SHADOW_MAX_PENDING = int(os.getenv('SHADOW_MAX_PENDING', '256'))
+# Cassandra to shadow against when the API itself reads from Astra DB
+SHADOW_CASSANDRA_HOST = os.getenv('SHADOW_CASSANDRA_HOST', 'cassandra-svc')
+SHADOW_CASSANDRA_PORT = int(os.getenv('SHADOW_CASSANDRA_PORT', '9042'))
+
 # Pydantic models
 class User(BaseModel):
     id: Optional[str] = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -59,6 +77,8 @@ app = FastAPI(
 # Global connection
 cluster = None
 session = None
+shadow_cluster = None
+shadow_checker = None
 
 def get_cassandra_session():
     """Get database session based on CONNECTION_MODE"""
@@ -70,10 +90,10 @@ def get_cassandra_session():
                 # Direct Astra DB connection using secure connect bundle
                 print("Connecting directly to Astra DB...")
                 
-                if not ASTRA_SECURE_BUNDLE_PATH:
+                if not ASTRA_SECURE_BUNDLE_PATH and not FAKE_BACKEND:
                     raise Exception("ASTRA_SECURE_BUNDLE_PATH is required for Astra connection")
                 
-                if not os.path.exists(ASTRA_SECURE_BUNDLE_PATH):
+                if not FAKE_BACKEND and not os.path.exists(ASTRA_SECURE_BUNDLE_PATH):
                     raise Exception(f"Secure connect bundle not found: {ASTRA_SECURE_BUNDLE_PATH}")
                 
                 # Use token authentication (preferred) or client credentials
@@ -157,6 +177,55 @@ def get_cassandra_session():
     
     return session
 
+def start_shadow_reads():
+    """
+    Connect to the cluster the API does not read from and start sampling reads.
+
+    Astra DB is the shadow while reads go to Cassandra or through the ZDM proxy
+    (which reads from origin); Cassandra is the shadow once the API reads from
+    Astra DB. A failed shadow connection only disables the checker.
+    """
+    global shadow_cluster, shadow_checker
+    
+    try:
+        if CONNECTION_MODE == 'astra':
+            print(f"Connecting shadow reads to Cassandra at {SHADOW_CASSANDRA_HOST}:{SHADOW_CASSANDRA_PORT}...")
+            shadow_cluster = Cluster(
+                [SHADOW_CASSANDRA_HOST],
+                port=SHADOW_CASSANDRA_PORT,
+                auth_provider=PlainTextAuthProvider(username=CASSANDRA_USERNAME, password=CASSANDRA_PASSWORD),
+                load_balancing_policy=DCAwareRoundRobinPolicy(),
+                connect_timeout=10
+            )
+            labels = ('astra', 'cassandra')
+        else:
+            print("Connecting shadow reads to Astra DB...")
+            if not FAKE_BACKEND and (not ASTRA_SECURE_BUNDLE_PATH or not os.path.exists(ASTRA_SECURE_BUNDLE_PATH)):
+                raise Exception(f"Secure connect bundle not found: {ASTRA_SECURE_BUNDLE_PATH}")
+            if ASTRA_TOKEN:
+                auth_provider = PlainTextAuthProvider(username="token", password=ASTRA_TOKEN)
+            elif ASTRA_CLIENT_ID and ASTRA_CLIENT_SECRET:
+                auth_provider = PlainTextAuthProvider(username=ASTRA_CLIENT_ID, password=ASTRA_CLIENT_SECRET)
+            else:
+                raise Exception("Either ASTRA_TOKEN or ASTRA_CLIENT_ID/ASTRA_CLIENT_SECRET required for Astra connection")
+            shadow_cluster = Cluster(
+                cloud={'secure_connect_bundle': ASTRA_SECURE_BUNDLE_PATH},
+                auth_provider=auth_provider,
+                connect_timeout=30
+            )
+            labels = ('zdm' if CONNECTION_MODE == 'zdm' or CASSANDRA_HOST == "zdm-proxy-svc" else 'cassandra', 'astra')
+        
+        shadow_checker = ShadowReadChecker(
+            shadow_cluster.connect(KEYSPACE), TABLE, *labels,
+            sample_rate=SHADOW_READ_RATE, max_pending=SHADOW_MAX_PENDING
+        )
+        print(f"Shadow reads enabled: {SHADOW_READ_RATE:.2%} of reads from {labels[0]} checked against {labels[1]}")
+    except Exception as e:
+        print(f"Shadow reads disabled - failed to connect shadow cluster: {e}")
+        if shadow_cluster:
+            shadow_cluster.shutdown()
+            shadow_cluster = None
+
 @app.on_event("startup")
 async def startup_event():
     """Initialize database connection on startup"""
@@ -167,11 +236,18 @@ async def startup_event():
     except Exception as e:
         print(f"Failed to connect to Cassandra: {e}")
         raise
+    
+    if SHADOW_READ_RATE > 0:
+        start_shadow_reads()
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Clean up connections on shutdown"""
     global cluster
+    if shadow_checker:
+        shadow_checker.close()
+    if shadow_cluster:
+        shadow_cluster.shutdown()
     if cluster:
         cluster.shutdown()
 
@@ -225,8 +301,12 @@ async def get_user(user_id: str, session=Depends(get_cassandra_session)):
     try:
         user_uuid = uuid.UUID(user_id)
         query = f"SELECT id, name, email, gender, address FROM {TABLE} WHERE id = %s"
+        started = time.perf_counter()
         result = session.execute(query, (user_uuid,))
         row = result.one()
+        if shadow_checker:
+            # Only samples and enqueues; the shadow read runs off the request path
+            shadow_checker.submit(user_uuid, row, (time.perf_counter() - started) * 1000)
         
         if not row:
             raise HTTPException(status_code=404, detail="User not found")
@@ -325,6 +405,17 @@ async def get_stats(session=Depends(get_cassandra_session)):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get stats: {str(e)}")
 
+@app.get("/shadow-reads")
+async def get_shadow_reads():
+    """Mismatch counts and primary/shadow latency histograms from shadow reads"""
+    if not shadow_checker:
+        return {
+            "enabled": False,
+            "sample_rate": SHADOW_READ_RATE,
+            "hint": "Set SHADOW_READ_RATE (e.g. 0.01) and the shadow cluster's connection settings"
+        }
+    return shadow_checker.stats()
+
 if __name__ == "__main__":
     uvicorn.run(
         "main:app",
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Shadow-read consistency checking for live GET /users/{user_id} traffic
+
+A configurable fraction of primary reads is repeated against the other
+cluster (Astra DB while the API reads from Cassandra or the ZDM proxy, and
+Cassandra once it reads from Astra DB). The shadow read is queued and issued
+by a background thread and compared in the driver's callback, so the primary
+request never waits for it. Mismatch counts and primary/shadow latency
+histograms are exposed through `ShadowReadChecker.stats()`.
+
+The checker only needs a cassandra-driver session, so it also runs as a
+sidecar: `python shadow_reads.py` reads access-log lines on stdin, performs
+the primary read itself and shadows it the same way. Either cluster is given
+as host:port pairs or, for Astra DB, a secure connect bundle used with
+ASTRA_TOKEN (or ASTRA_CLIENT_ID/ASTRA_CLIENT_SECRET) as in main.py.
+"""
+
+import os
+import queue
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Dict, Optional
+
+COMPARED_FIELDS = ('name', 'email', 'gender', 'address')
+
+# Upper bounds (ms) of the latency buckets, as for a Prometheus histogram
+LATENCY_BUCKETS_MS = (0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+
+
+class LatencyBuckets:
+    """Fixed-bucket latency histogram; percentiles are interpolated within a bucket"""
+
+    def __init__(self, bounds=LATENCY_BUCKETS_MS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, latency_ms: float):
+        index = next((i for i, bound in enumerate(self.bounds) if latency_ms <= bound), len(self.bounds))
+        self.counts[index] += 1
+        self.count += 1
+        self.total_ms += latency_ms
+        self.max_ms = max(self.max_ms, latency_ms)
+
+    def percentile(self, quantile: float) -> float:
+        if not self.count:
+            return 0.0
+        target = quantile * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if count and seen + count >= target:
+                lower = self.bounds[i - 1] if i > 0 else 0.0
+                upper = self.bounds[i] if i < len(self.bounds) else self.max_ms
+                return min(lower + (upper - lower) * (target - seen) / count, self.max_ms)
+            seen += count
+        return self.max_ms
+
+    def summary(self) -> Dict:
+        return {
+            'count': self.count,
+            'mean_ms': round(self.total_ms / self.count, 3) if self.count else 0.0,
+            'p50_ms': round(self.percentile(0.5), 3),
+            'p95_ms': round(self.percentile(0.95), 3),
+            'p99_ms': round(self.percentile(0.99), 3),
+            'max_ms': round(self.max_ms, 3),
+            'buckets': {f"le_{bound}": count for bound, count in zip(self.bounds + ('inf',), self.counts)},
+        }
+
+
+def row_fields(row) -> Optional[Dict]:
+    if row is None:
+        return None
+    return {field: getattr(row, field) for field in COMPARED_FIELDS}
+
+
+class ShadowReadChecker:
+    """
+    Samples primary reads at `sample_rate` and re-reads them from
+    `shadow_session` off the request path.
+
+    `submit()` only draws a random number and enqueues; at most
+    `max_pending` shadow reads wait or run at once and further samples are
+    dropped (and counted) rather than queued without bound. A read takes its
+    slot when it is enqueued and gives it back once the shadow answers.
+    """
+
+    def __init__(self, shadow_session, table: str, primary_label: str, shadow_label: str,
+                 sample_rate: float = 0.01, max_pending: int = 256, recent_mismatches: int = 20):
+        self.shadow_session = shadow_session
+        self.primary_label = primary_label
+        self.shadow_label = shadow_label
+        self.sample_rate = sample_rate
+        self.lookup = shadow_session.prepare(
+            f"SELECT id, {', '.join(COMPARED_FIELDS)} FROM {table} WHERE id = ?")
+        self.queue: "queue.Queue" = queue.Queue()  # bounded by the slots
+        self.slots = threading.BoundedSemaphore(max_pending)
+        self.lock = threading.Lock()
+        self.counts = {
+            'sampled': 0, 'matched': 0, 'mismatched': 0, 'missing_on_shadow': 0,
+            'missing_on_primary': 0, 'errors': 0, 'dropped': 0,
+        }
+        self.latency = {primary_label: LatencyBuckets(), shadow_label: LatencyBuckets()}
+        self.recent = deque(maxlen=recent_mismatches)
+        self.started_at = time.time()
+        self.stopped = threading.Event()
+        self.worker = threading.Thread(target=self._issue_loop, name='shadow-reads', daemon=True)
+        self.worker.start()
+
+    def submit(self, user_id: uuid.UUID, primary_row, primary_latency_ms: float):
+        """Called after a primary read (row None when not found); never blocks"""
+        if self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            return
+        self.enqueue(user_id, primary_row, primary_latency_ms)
+
+    def enqueue(self, user_id: uuid.UUID, primary_row, primary_latency_ms: float):
+        """Shadow this read without sampling (the caller already sampled it)"""
+        if not self.slots.acquire(blocking=False):
+            with self.lock:
+                self.counts['dropped'] += 1
+            return
+        self.queue.put((user_id, row_fields(primary_row), primary_latency_ms))
+
+    def _issue_loop(self):
+        while not self.stopped.is_set():
+            try:
+                item = self.queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if item is None:
+                return
+            user_id, primary, primary_latency_ms = item
+            started = time.perf_counter()
+            try:
+                future = self.shadow_session.execute_async(self.lookup, (user_id,))
+            except Exception:
+                self._finish_error()
+                continue
+            future.add_callbacks(self._compare, self._finish_error,
+                                 callback_args=(user_id, primary, primary_latency_ms, started))
+
+    def _compare(self, rows, user_id: uuid.UUID, primary: Optional[Dict], primary_latency_ms: float,
+                 started: float):
+        shadow_latency_ms = (time.perf_counter() - started) * 1000
+        shadow = row_fields(rows[0] if rows else None)
+        if primary is None and shadow is None:
+            outcome = 'matched'
+        elif shadow is None:
+            outcome = 'missing_on_shadow'
+        elif primary is None:
+            outcome = 'missing_on_primary'
+        else:
+            outcome = 'matched' if primary == shadow else 'mismatched'
+        with self.lock:
+            self.counts['sampled'] += 1
+            self.counts[outcome] += 1
+            self.latency[self.primary_label].record(primary_latency_ms)
+            self.latency[self.shadow_label].record(shadow_latency_ms)
+            if outcome != 'matched':
+                differing = [field for field in COMPARED_FIELDS
+                             if (primary or {}).get(field) != (shadow or {}).get(field)]
+                self.recent.append({'id': str(user_id), 'outcome': outcome, 'fields': differing,
+                                    'at': time.strftime('%Y-%m-%dT%H:%M:%S')})
+        self.slots.release()
+
+    def _finish_error(self, *_):
+        with self.lock:
+            self.counts['sampled'] += 1
+            self.counts['errors'] += 1
+        self.slots.release()
+
+    def stats(self) -> Dict:
+        with self.lock:
+            counts = dict(self.counts)
+            latency = {label: histogram.summary() for label, histogram in self.latency.items()}
+            recent = list(self.recent)
+        compared = counts['sampled'] - counts['errors']
+        inconsistent = compared - counts['matched']
+        return {
+            'enabled': True,
+            'primary': self.primary_label,
+            'shadow': self.shadow_label,
+            'sample_rate': self.sample_rate,
+            'uptime_seconds': round(time.time() - self.started_at, 1),
+            **counts,
+            'mismatch_rate': round(inconsistent / compared, 6) if compared else 0.0,
+            'latency': latency,
+            'recent_mismatches': recent,
+        }
+
+    def close(self, timeout: float = 5.0):
+        """Stop issuing shadow reads; never blocks for longer than `timeout`, even with stuck reads"""
+        self.stopped.set()
+        self.queue.put(None)
+        self.worker.join(timeout)
+
+
+ACCESS_LOG_ID = re.compile(r'GET /users/([0-9a-fA-F-]{36})\b')
+
+
+def run_sidecar(primary_session, checker: ShadowReadChecker, table: str, lines, report_every: float = 60.0):
+    """
+    Shadow reads seen in an access log (e.g. `kubectl logs -f deploy/python-api`):
+    sampled ids are read from the primary here, then shadowed like in the API
+    """
+    lookup = primary_session.prepare(f"SELECT id, {', '.join(COMPARED_FIELDS)} FROM {table} WHERE id = ?")
+    last_report = time.time()
+    for line in lines:
+        match = ACCESS_LOG_ID.search(line)
+        if match and random.random() < checker.sample_rate:
+            user_id = uuid.UUID(match.group(1))
+            started = time.perf_counter()
+            row = primary_session.execute(lookup, (user_id,)).one()
+            checker.enqueue(user_id, row, (time.perf_counter() - started) * 1000)
+        if time.time() - last_report >= report_every:
+            print(checker.stats(), flush=True)
+            last_report = time.time()
+
+
+def connect(hosts: Optional[str] = None, secure_bundle: Optional[str] = None, keyspace: str = 'demo'):
+    """
+    Session on `hosts` (comma-separated host:port) or, given a secure connect
+    bundle, on Astra DB with ASTRA_TOKEN or ASTRA_CLIENT_ID/ASTRA_CLIENT_SECRET
+    """
+    from cassandra.auth import PlainTextAuthProvider
+    from cassandra.cluster import Cluster
+
+    if secure_bundle:
+        if os.getenv('ASTRA_TOKEN'):
+            auth_provider = PlainTextAuthProvider(username='token', password=os.getenv('ASTRA_TOKEN'))
+        elif os.getenv('ASTRA_CLIENT_ID') and os.getenv('ASTRA_CLIENT_SECRET'):
+            auth_provider = PlainTextAuthProvider(username=os.getenv('ASTRA_CLIENT_ID'),
+                                                  password=os.getenv('ASTRA_CLIENT_SECRET'))
+        else:
+            raise ValueError("ASTRA_TOKEN or ASTRA_CLIENT_ID/ASTRA_CLIENT_SECRET is required "
+                             "with a secure connect bundle")
+        cluster = Cluster(cloud={'secure_connect_bundle': secure_bundle}, auth_provider=auth_provider,
+                          connect_timeout=30)
+    else:
+        host_list = [entry.strip().rsplit(':', 1) for entry in hosts.split(',') if entry.strip()]
+        cluster = Cluster([host for host, *_ in host_list],
+                          port=int(host_list[0][1]) if len(host_list[0]) > 1 else 9042)
+    return cluster.connect(keyspace)
+
+
+if __name__ == '__main__':
+    keyspace = os.getenv('KEYSPACE', 'demo')
+    shadow_hosts = os.getenv('SHADOW_HOSTS')
+    shadow_bundle = os.getenv('SHADOW_SECURE_BUNDLE_PATH')
+    if not shadow_hosts and not shadow_bundle:
+        sys.exit("SHADOW_HOSTS (host:port of the cluster to shadow reads against) or "
+                 "SHADOW_SECURE_BUNDLE_PATH (Astra DB secure connect bundle) is required")
+    table = os.getenv('TABLE', 'users')
+    sidecar_checker = ShadowReadChecker(connect(shadow_hosts, shadow_bundle, keyspace), table, 'primary', 'shadow',
+                                        sample_rate=float(os.getenv('SHADOW_READ_RATE', '0.01')))
+    primary_session = connect(os.getenv('SHADOW_PRIMARY_HOSTS', 'cassandra-svc:9042'),
+                              os.getenv('SHADOW_PRIMARY_SECURE_BUNDLE_PATH'), keyspace)
+    try:
+        run_sidecar(primary_session, sidecar_checker, table, sys.stdin)
+    finally:
+        sidecar_checker.close()
@@ -2,16 +2,93 @@
 """
 Data Consistency Validator for Phase B ZDM Implementation
 Validates data consistency between Cassandra (origin) and Astra DB (target)
+
+Full-dataset validation scans both tables by token range, many ranges at a
+time, and merge-joins the two sorted row streams by (token, id), so each row
+is read once per side and memory only holds the differences.
+
+Incremental validation keeps a Merkle tree of per-range row digests for each
+cluster in --state-dir and only rescans ranges that differed last time, were
+written by a sync pass since they were last scanned, or are older than
+--max-leaf-age-hours (default 24); the ranges it reuses are reported as
+unverified since their last scan.
+
+Sample validation (the default) compares rows in windows that start at
+uniformly random tokens on both clusters and estimates the inconsistency rate
+with a confidence interval, as a quick go/no-go signal for Phase C.
+
+Differences are streamed to --results (NDJSON, or CSV for a .csv path) as
+they are found and only counted in memory. --repair-plan additionally writes
+the timestamped upserts/deletes that would make Astra DB match Cassandra;
+--apply-repair applies such a plan concurrently.
+
+Hash validation (--hashes) ships no row data: one worker process per cluster
+(run this script with --hash-side, locally or near its cluster through
+--cassandra-hash-cmd/--astra-hash-cmd) streams `token id hash` lines in ring
+order, the two streams are merge-joined, and full rows are only fetched for
+ids whose hashes differ.
+
+Usage:
+    python data_consistency_validator.py [--full | --incremental [--state-dir=.] [--rebuild] [--max-leaf-age-hours=24]]
+                                         [--workers=8] [--splits=256] [--fetch-size=1000]
+                                         [--sample-size=2000] [--rows-per-point=50] [--confidence=0.95]
+                                         [--target-error=0.01] [--target-hosts=host:port,...]
+                                         [--results=differences.ndjson] [--repair-plan=repair.ndjson]
+    python data_consistency_validator.py --hashes [--cassandra-hash-cmd=CMD] [--astra-hash-cmd=CMD]
+    python data_consistency_validator.py --hash-side=cassandra|astra > hashes.tsv
+    python data_consistency_validator.py --apply-repair=repair.ndjson [--repair-concurrency=64]
 """
 import sys
 import os
+import csv
 import json
 import uuid
+import queue
 import time
+import glob
+import math
+import random
+import shlex
+import hashlib
+import argparse
+import threading
+import contextlib
+import subprocess
+import concurrent.futures
+from collections import deque, namedtuple
+from itertools import groupby
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple, Any
+from statistics import NormalDist
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple, Any
 from dataclasses import dataclass
 
+try:
+    from cassandra.cluster import Cluster
+    from cassandra.auth import PlainTextAuthProvider
+    from cassandra.query import BatchStatement, BatchType
+except ImportError as e:
+    print(f"❌ Error: Missing required packages: {e}")
+    print("Please run: pip install cassandra-driver")
+    sys.exit(1)
+
+# CQL_BACKEND=fake runs against the in-process stand-in (scripts/fake_cql.py) for offline benchmarking
+FAKE_BACKEND = os.getenv('CQL_BACKEND', '').lower() == 'fake'
+if FAKE_BACKEND:
+    sys.path.insert(0, os.getenv('FAKE_CQL_PATH',
+                                 os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts')))
+    from fake_cql import FakeCluster as Cluster
+
+# Murmur3Partitioner token bounds; ranges are (start, end]
+MIN_TOKEN = -2 ** 63
+MAX_TOKEN = 2 ** 63 - 1
+
+COMPARED_FIELDS = ['name', 'email', 'gender', 'address']
+
+MASK_64 = (1 << 64) - 1
+
+# Incremental runs rescan token ranges not read for this long (seconds)
+DEFAULT_MAX_LEAF_AGE = 24 * 3600
+
 @dataclass
 class ConsistencyResult:
     """Data consistency check result"""
@@ -33,103 +110,642 @@ class ValidationSummary:
     consistency_rate: float
     validation_time: float
 
+@dataclass
+class SampleEstimate:
+    """Inconsistency rate estimated from a random sample, with its confidence interval"""
+    points: int
+    rows: int
+    inconsistent: int
+    rate: float
+    low: float
+    high: float
+    confidence: float
+    design_effect: float
+    target_error: float
+    required_rows: int
+    required_points: int
+
+@dataclass
+class RangeResult:
+    """Outcome of merge-joining one token range of both tables"""
+    cassandra_rows: int = 0
+    astra_rows: int = 0
+    consistent: int = 0
+    different: int = 0
+    # Order-independent digests (sum of row hashes mod 2^64) of each side
+    cassandra_hash: int = 0
+    astra_hash: int = 0
+
+def split_ring(splits: int) -> List[Tuple[int, int]]:
+    """Split the full Murmur3 ring into `splits` contiguous (start, end] ranges"""
+    width = (MAX_TOKEN - MIN_TOKEN) // splits
+    bounds = [MIN_TOKEN + i * width for i in range(splits)] + [MAX_TOKEN]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+def row_hash(row) -> int:
+    """Stable 64-bit hash of a row's values (driver types repr identically on both sides)"""
+    return int.from_bytes(hashlib.blake2b(repr(tuple(row)).encode(), digest_size=8).digest(), 'big')
+
+def estimate_inconsistency(windows: List[Tuple[int, int]], confidence: float = 0.95,
+                           target_error: float = 0.01) -> SampleEstimate:
+    """
+    Estimate the share of inconsistent rows from `(rows, inconsistent)` per
+    sampled window.
+    
+    Rows of one window are not independent (a missed sync range leaves whole
+    windows behind), so the variance is estimated across windows and turned
+    into a design effect; the Wilson score interval is then computed on the
+    effective sample size. The required sample size is the number of rows for
+    a half-width of `target_error`, assuming the upper bound of the interval
+    as the true rate.
+    """
+    points = len(windows)
+    rows = sum(m for m, _ in windows)
+    inconsistent = sum(d for _, d in windows)
+    z = NormalDist().inv_cdf((1 + confidence) / 2)
+    if not rows:
+        return SampleEstimate(points, 0, 0, 0.0, 0.0, 1.0, confidence, 1.0, target_error, 0, 0)
+    rate = inconsistent / rows
+    
+    # Ratio-estimator variance over windows vs. simple random sampling of rows
+    design_effect = 1.0
+    if points > 1 and 0 < rate < 1:
+        mean_rows = rows / points
+        cluster_variance = (sum((d - rate * m) ** 2 for m, d in windows)
+                            / (points * (points - 1) * mean_rows ** 2))
+        design_effect = max(1.0, cluster_variance / (rate * (1 - rate) / rows))
+    effective_rows = rows / design_effect
+    
+    center = (rate + z * z / (2 * effective_rows)) / (1 + z * z / effective_rows)
+    half_width = (z / (1 + z * z / effective_rows)
+                  * math.sqrt(rate * (1 - rate) / effective_rows + z * z / (4 * effective_rows ** 2)))
+    low, high = max(0.0, center - half_width), min(1.0, center + half_width)
+    
+    planning_rate = max(high, 1 / rows)
+    required_rows = math.ceil(z * z * planning_rate * (1 - planning_rate) / target_error ** 2 * design_effect)
+    required_points = math.ceil(required_rows / (rows / points))
+    return SampleEstimate(points, rows, inconsistent, rate, low, high, confidence, design_effect,
+                          target_error, required_rows, required_points)
+
+HashRow = namedtuple('HashRow', ['token', 'id', 'hash'])
+
+# Last line of a complete hash stream: END_OF_HASHES<TAB>rows
+END_OF_HASHES = '#end'
+
+# Returned by a merge-join resolver for pairs it settles itself later
+PENDING = object()
+
+def field_hash(values) -> str:
+    """64-bit hash of a row's compared values, as exchanged between hash workers"""
+    return hashlib.blake2b(repr(tuple(values)).encode(), digest_size=8).hexdigest()
+
+def emit_hashes(session, table: str, fields: List[str], out, splits: int, workers: int = 8,
+                fetch_size: int = 1000) -> int:
+    """
+    Scan the whole table and write one `token<TAB>id<TAB>hash` line per row in
+    ring order, followed by an `END_OF_HASHES` trailer with the row count.
+    
+    `workers` ranges are scanned at a time and written in order, a page at a
+    time: each range hands its pages over through a queue of two, so later
+    ranges wait instead of piling up and memory stays at a few pages per
+    worker. Returns the row count.
+    """
+    columns = ', '.join(fields)
+    query = session.prepare(f"SELECT token(id), id, {columns} FROM {table} WHERE token(id) > ? AND token(id) <= ?")
+    stopped = threading.Event()
+    
+    def hand_over(pages: queue.Queue, item):
+        while not stopped.is_set():
+            try:
+                pages.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+    
+    def scan(token_range: Tuple[int, int], pages: queue.Queue):
+        try:
+            statement = query.bind(token_range)
+            statement.fetch_size = fetch_size
+            result = session.execute(statement)
+            while True:
+                hand_over(pages, [f"{row[0]}\t{row[1]}\t{field_hash(row[2:])}\n" for row in result.current_rows])
+                if not result.has_more_pages:
+                    break
+                result.fetch_next_page()
+            hand_over(pages, None)
+        except Exception as e:
+            hand_over(pages, e)
+    
+    def write_range(pages: queue.Queue) -> int:
+        written = 0
+        while True:
+            lines = pages.get()
+            if lines is None:
+                return written
+            if isinstance(lines, Exception):
+                raise lines
+            out.writelines(lines)
+            written += len(lines)
+    
+    rows = 0
+    pending = deque()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        try:
+            for token_range in split_ring(splits):
+                pages = queue.Queue(maxsize=2)
+                executor.submit(scan, token_range, pages)
+                pending.append(pages)
+                if len(pending) >= workers:
+                    rows += write_range(pending.popleft())
+            while pending:
+                rows += write_range(pending.popleft())
+        finally:
+            stopped.set()
+    out.write(f"{END_OF_HASHES}\t{rows}\n")
+    out.flush()
+    return rows
+
+def read_hashes(lines: Iterable[str], worker: Optional[subprocess.Popen] = None) -> Iterator[HashRow]:
+    """
+    Parse a hash worker's output stream. A stream that ends without the
+    worker's trailer (the worker crashed or was killed) raises instead of
+    ending, so the other side's remaining rows are never reported as missing.
+    """
+    rows = 0
+    for line in lines:
+        fields = line.rstrip('\n').split('\t')
+        if fields[0] == END_OF_HASHES:
+            if int(fields[1]) != rows:
+                raise RuntimeError(f"Hash stream ended after {rows} of {fields[1]} records")
+            return
+        token, record_id, digest = fields
+        rows += 1
+        yield HashRow(int(token), uuid.UUID(record_id), digest)
+    status = f" (exit code {worker.wait()})" if worker is not None else ""
+    raise RuntimeError(f"Hash stream ended after {rows} records without its trailer - the hash worker "
+                       f"failed{status}")
+
+class PairLookups:
+    """
+    Reads single records from both clusters with `execute_async`, at most
+    `window` ids in flight. Finished pairs are handed back to the submitting
+    thread by `submit` and `finish` rather than handled in driver callbacks,
+    so their consumer may block (e.g. on repair reads).
+    """
+    
+    def __init__(self, sessions: Dict[str, Any], statements: Dict[str, Any], window: int = 64):
+        self.sessions = sessions
+        self.statements = statements
+        self.window = window
+        self.in_flight = 0
+        self.submitted = 0
+        self.done: queue.Queue = queue.Queue()
+    
+    def submit(self, record_id) -> List[Tuple[Any, Any, Any]]:
+        """Start looking up `record_id`; returns the pairs finished meanwhile, waiting while the window is full"""
+        finished = self._collect(block=self.in_flight >= self.window)
+        self.in_flight += 1
+        self.submitted += 1
+        rows = {}
+        lock = threading.Lock()
+        
+        def arrived(side: str, value):
+            with lock:
+                rows[side] = value
+                if len(rows) < len(self.sessions):
+                    return
+            self.done.put((record_id, rows['cassandra'], rows['astra']))
+        
+        for side, session in self.sessions.items():
+            future = session.execute_async(self.statements[side], (record_id,))
+            future.add_callbacks(lambda page, side=side: arrived(side, page[0] if page else None),
+                                 lambda error, side=side: arrived(side, error))
+        return finished
+    
+    def finish(self) -> List[Tuple[Any, Any, Any]]:
+        """Wait for every outstanding lookup and return the remaining pairs"""
+        finished = []
+        while self.in_flight:
+            finished.extend(self._collect(block=True))
+        return finished
+    
+    def _collect(self, block: bool) -> List[Tuple[Any, Any, Any]]:
+        finished = []
+        try:
+            item = self.done.get(block=block)
+            while True:
+                finished.append(item)
+                self.in_flight -= 1
+                item = self.done.get_nowait()
+        except queue.Empty:
+            pass
+        for record_id, cassandra_row, astra_row in finished:
+            for row in (cassandra_row, astra_row):
+                if isinstance(row, Exception):
+                    raise RuntimeError(f"Looking up record {record_id} failed: {row}") from row
+        return finished
+
+def start_hash_worker(side: str, command: Optional[str], args) -> subprocess.Popen:
+    """
+    Run a hash worker for one cluster: `command` (e.g. over ssh to a host near
+    that cluster) or this script with --hash-side in a local process
+    """
+    if command:
+        argv = shlex.split(command)
+    else:
+        argv = [sys.executable, os.path.abspath(__file__), f'--hash-side={side}', f'--workers={args.workers}',
+                f'--fetch-size={args.fetch_size}']
+        if args.splits:
+            argv.append(f'--splits={args.splits}')
+        if args.target_hosts:
+            argv.append(f'--target-hosts={args.target_hosts}')
+    print(f"   → Starting {side} hash worker: {' '.join(argv)}")
+    return subprocess.Popen(argv, stdout=subprocess.PIPE, text=True, bufsize=1 << 20)
+
+def _node_hash(data: bytes) -> bytes:
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+class MerkleTree:
+    """
+    Hash tree over the row digests of one cluster's token ranges.
+    
+    Leaves are `[row count, digest, scanned_at]` for each range of
+    `split_ring(splits)`, so trees built with the same splits line up leaf for
+    leaf. Inner nodes hash their two children; comparing two trees top-down
+    only descends into subtrees whose hashes differ.
+    """
+    
+    def __init__(self, leaves: List[List]):
+        self.leaves = leaves
+        self.rebuild()
+    
+    @classmethod
+    def empty(cls, splits: int) -> 'MerkleTree':
+        return cls([[0, 0, 0.0] for _ in range(splits)])
+    
+    def rebuild(self):
+        """Recompute inner nodes after leaves changed"""
+        level = [_node_hash(b'%d:%d' % (count, digest)) for count, digest, _ in self.leaves]
+        self.levels = [level]
+        while len(level) > 1:
+            level = [_node_hash(b''.join(level[i:i + 2])) for i in range(0, len(level), 2)]
+            self.levels.append(level)
+    
+    @property
+    def root(self) -> str:
+        return self.levels[-1][0].hex()
+    
+    @property
+    def rows(self) -> int:
+        return sum(count for count, _, _ in self.leaves)
+    
+    def diff(self, other: 'MerkleTree') -> List[int]:
+        """Indexes of leaves whose digests differ, found by descending from the root"""
+        differing = []
+        
+        def walk(depth: int, index: int):
+            if self.levels[depth][index] == other.levels[depth][index]:
+                return
+            if depth == 0:
+                differing.append(index)
+                return
+            for child in (2 * index, 2 * index + 1):
+                if child < len(self.levels[depth - 1]):
+                    walk(depth - 1, child)
+        
+        walk(len(self.levels) - 1, 0)
+        return differing
+    
+    def save(self, path: str, table: str, fields: List[str]):
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'table': table, 'fields': fields, 'root': self.root, 'leaves': self.leaves}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    
+    @classmethod
+    def load(cls, path: str, table: str, fields: List[str], splits: int) -> Optional['MerkleTree']:
+        """A saved tree, or None if there is none or it was built for other columns or splits"""
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            data = json.load(f)
+        if data.get('table') != table or data.get('fields') != fields or len(data.get('leaves', [])) != splits:
+            return None
+        return cls(data['leaves'])
+
+def _overlaps(leaf: Tuple[int, int], start: int, end: int) -> bool:
+    """Whether token range (start, end] (possibly wrapping) overlaps leaf (a, b]"""
+    a, b = leaf
+    if start < end:
+        return start < b and a < end
+    return a < end or start < b
+
+def synced_ranges(paths: Iterable[str], table: str) -> List[Tuple[int, int, float]]:
+    """(start, end, finished_at) of token ranges that sync-data checkpoints record as written to `table`"""
+    ranges = []
+    for path in paths:
+        plan_table = None
+        with open(path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # torn final line from a crash
+                if entry.get('type') == 'plan':
+                    plan_table = entry.get('table')
+                elif entry.get('type') == 'range' and plan_table in (table, f"demo.{table}"):
+                    finished = datetime.fromisoformat(entry['finished_at'])
+                    finished_at = finished.timestamp()
+                    if finished.microsecond == 0:
+                        finished_at += 1  # older checkpoints truncate to whole seconds: assume the latest
+                    ranges.append((entry['start'], entry['end'], finished_at))
+    return ranges
+
+def difference_kind(result: ConsistencyResult) -> str:
+    if not result.cassandra_exists:
+        return 'missing_in_cassandra'
+    if not result.astra_exists:
+        return 'missing_in_astra'
+    return 'data_mismatch'
+
+class ResultStream:
+    """
+    Appends differing records to a file as they are found, as NDJSON or (for
+    a .csv path) CSV, so memory does not grow with the number of differences
+    """
+    
+    CSV_FIELDS = ['record_id', 'kind', 'cassandra_exists', 'astra_exists', 'differences', 'timestamp']
+    
+    def __init__(self, path: str):
+        self.path = path
+        self.format = 'csv' if path.endswith('.csv') else 'ndjson'
+        self.file = open(path, 'w', newline='')
+        self.lock = threading.Lock()
+        self.csv = None
+        if self.format == 'csv':
+            self.csv = csv.writer(self.file)
+            self.csv.writerow(self.CSV_FIELDS)
+    
+    def write(self, result: ConsistencyResult):
+        entry = {
+            'record_id': result.record_id,
+            'kind': difference_kind(result),
+            'cassandra_exists': result.cassandra_exists,
+            'astra_exists': result.astra_exists,
+            'differences': result.differences,
+            'timestamp': result.timestamp.isoformat(timespec='seconds'),
+        }
+        with self.lock:
+            if self.csv is not None:
+                entry['differences'] = '; '.join(result.differences)
+                self.csv.writerow([entry[name] for name in self.CSV_FIELDS])
+            else:
+                self.file.write(json.dumps(entry) + '\n')
+    
+    def close(self):
+        with self.lock:
+            self.file.close()
+
+class RepairPlan:
+    """
+    NDJSON plan of writes that make Astra DB match Cassandra, one line per record:
+        
+        {"op": "upsert", "id": ..., "cells": {"name": ["value", writetime], ...}}
+        {"op": "upsert", "id": ..., "cells": {...}, "columns": [...], "timestamp": writetime}
+        {"op": "delete", "id": ..., "columns": [...], "timestamp": writetime}
+    
+    Upserts carry each cell's origin WRITETIME, so a newer write that reached
+    Astra DB in the meantime still wins. Deletes (rows or cells that only
+    exist in Astra DB) use the Astra cell's own WRITETIME: a tombstone wins a
+    timestamp tie, so exactly that version is removed and any later write
+    survives. An empty `columns` deletes the whole row; on an upsert,
+    `columns` are the cells null in Cassandra that are deleted with it.
+    """
+    
+    def __init__(self, path: str):
+        self.path = path
+        self.file = open(path, 'w')
+        self.lock = threading.Lock()
+        self.upserts = 0
+        self.deletes = 0
+    
+    def add(self, entry: Dict):
+        with self.lock:
+            if entry['op'] == 'upsert':
+                self.upserts += 1
+            else:
+                self.deletes += 1
+            self.file.write(json.dumps(entry, default=str) + '\n')
+    
+    def close(self):
+        with self.lock:
+            self.file.close()
+
+def apply_repair_plan(session, path: str, table: str = 'users', concurrency: int = 64) -> Tuple[int, int]:
+    """
+    Apply a RepairPlan to Astra DB with up to `concurrency` writes in flight.
+    
+    Every write carries an explicit timestamp, so it is idempotent: lines that
+    fail are written to `<path>.failed`, which can be applied again.
+    Returns (applied, failed) records.
+    """
+    statements = {}
+    
+    def prepared(cql: str):
+        if cql not in statements:
+            statements[cql] = session.prepare(cql)
+            statements[cql].is_idempotent = True
+        return statements[cql]
+    
+    def record_statement(entry: Dict):
+        record_id = uuid.UUID(entry['id'])
+        if entry['op'] == 'delete':
+            columns = ', '.join(entry.get('columns') or [])
+            cql = f"DELETE {columns + ' ' if columns else ''}FROM {table} USING TIMESTAMP ? WHERE id = ?"
+            return prepared(cql).bind((entry['timestamp'], record_id))
+        # One insert per distinct cell timestamp plus the cell deletes, applied atomically for the record
+        by_timestamp: Dict[int, List[Tuple[str, Any]]] = {}
+        for column, (value, writetime) in entry['cells'].items():
+            by_timestamp.setdefault(writetime, []).append((column, value))
+        batch = BatchStatement(batch_type=BatchType.UNLOGGED)
+        batch.is_idempotent = True
+        for writetime, cells in by_timestamp.items():
+            names = ['id'] + [column for column, _ in cells]
+            cql = (f"INSERT INTO {table} ({', '.join(names)}) VALUES ({', '.join('?' for _ in names)}) "
+                   f"USING TIMESTAMP ?")
+            batch.add(prepared(cql), (record_id,) + tuple(value for _, value in cells) + (writetime,))
+        if entry.get('columns'):
+            cql = f"DELETE {', '.join(entry['columns'])} FROM {table} USING TIMESTAMP ? WHERE id = ?"
+            batch.add(prepared(cql), (entry['timestamp'], record_id))
+        return batch
+    
+    slots = threading.BoundedSemaphore(concurrency)
+    lock = threading.Lock()
+    counts = {'applied': 0, 'failed': 0}
+    failed_path = path + '.failed'
+    
+    with open(path) as plan, open(failed_path, 'w') as failed_file:
+        def finished(line: str, error=None):
+            with lock:
+                if error is None:
+                    counts['applied'] += 1
+                else:
+                    counts['failed'] += 1
+                    failed_file.write(line)
+            slots.release()
+        
+        for line in plan:
+            if not line.strip():
+                continue
+            slots.acquire()
+            try:
+                future = session.execute_async(record_statement(json.loads(line)))
+            except Exception as e:
+                finished(line, e)
+                continue
+            future.add_callbacks(lambda _, line=line: finished(line),
+                                 lambda error, line=line: finished(line, error))
+        
+        # Wait for the writes still in flight
+        for _ in range(concurrency):
+            slots.acquire()
+    
+    if not counts['failed']:
+        os.remove(failed_path)
+    return counts['applied'], counts['failed']
+
 class DataConsistencyValidator:
     """
     Validates data consistency between Cassandra and Astra DB
     for Phase B dual write implementation
+    
+    Works against any pair of driver sessions: the real clusters, or a local
+    Cassandra standing in for Astra DB (see --target-hosts). Differing records
+    go to `results` (a ResultStream) and, when given, `repair_plan`; memory only
+    holds counters and the first `examples` differences of each kind.
     """
     
-    def __init__(self):
-        self.validation_results = []
+    def __init__(self, cassandra_session, astra_session, table: str = 'users',
+                 fields: Optional[List[str]] = None, workers: int = 8, splits: Optional[int] = None,
+                 fetch_size: int = 1000, results: Optional[ResultStream] = None,
+                 repair_plan: Optional[RepairPlan] = None, examples: int = 10, lookup_window: int = 64):
+        self.cassandra_session = cassandra_session
+        self.astra_session = astra_session
+        self.table = table
+        self.fields = fields or COMPARED_FIELDS
+        self.workers = workers
+        # Many more ranges than workers keeps every worker busy until the end
+        self.splits = splits or workers * 32
+        self.fetch_size = fetch_size
+        self.results = results
+        self.repair_plan = repair_plan
+        self.max_examples = examples
+        self.lookup_window = lookup_window
+        self.lock = threading.Lock()
+        self._reset()
         self.summary = None
         
-    def simulate_cassandra_query(self, query: str, params: tuple = None) -> List[Dict]:
-        """Simulate Cassandra query execution"""
-        # In real implementation, this would execute against Cassandra
-        if "SELECT * FROM users" in query:
-            return [
-                {
-                    'id': uuid.UUID('550e8400-e29b-41d4-a716-446655440000'),
-                    'name': 'Test User 1',
-                    'email': 'test1@example.com',
-                    'gender': 'Male',
-                    'address': '123 Test Street'
-                },
-                {
-                    'id': uuid.UUID('550e8400-e29b-41d4-a716-446655440001'),
-                    'name': 'Test User 2',
-                    'email': 'test2@example.com',
-                    'gender': 'Female',
-                    'address': '456 Test Avenue'
-                }
-            ]
-        elif "WHERE id = ?" in query and params:
-            # Simulate record lookup
-            test_records = {
-                uuid.UUID('550e8400-e29b-41d4-a716-446655440000'): {
-                    'id': uuid.UUID('550e8400-e29b-41d4-a716-446655440000'),
-                    'name': 'Test User 1',
-                    'email': 'test1@example.com',
-                    'gender': 'Male',
-                    'address': '123 Test Street'
-                }
+        columns = ', '.join(['id'] + self.fields)
+        range_cql = (f"SELECT token(id), {columns} FROM {table} "
+                     f"WHERE token(id) > ? AND token(id) <= ?")
+        lookup_cql = f"SELECT {columns} FROM {table} WHERE id = ?"
+        window_cql = f"SELECT token(id), {columns} FROM {table} WHERE token(id) > ? LIMIT ?"
+        self.range_queries = {
+            'cassandra': cassandra_session.prepare(range_cql),
+            'astra': astra_session.prepare(range_cql),
+        }
+        self.lookups = {
+            'cassandra': cassandra_session.prepare(lookup_cql),
+            'astra': astra_session.prepare(lookup_cql),
+        }
+        self.window_queries = {
+            'cassandra': cassandra_session.prepare(window_cql),
+            'astra': astra_session.prepare(window_cql),
+        }
+        self.writetime_lookups = {}
+        if repair_plan is not None:
+            selectors = ', '.join(['id'] + [f"{name}, WRITETIME({name})" for name in self.fields])
+            writetime_cql = f"SELECT {selectors} FROM {table} WHERE id = ?"
+            self.writetime_lookups = {
+                'cassandra': cassandra_session.prepare(writetime_cql),
+                'astra': astra_session.prepare(writetime_cql),
             }
-            record = test_records.get(params[0])
-            return [record] if record else []
-        else:
-            return []
-    
-    def simulate_astra_query(self, query: str, params: tuple = None) -> List[Dict]:
-        """Simulate Astra DB query execution"""
-        # In real implementation, this would execute against Astra DB
-        if "SELECT * FROM users" in query:
-            return [
-                {
-                    'id': uuid.UUID('550e8400-e29b-41d4-a716-446655440000'),
-                    'name': 'Test User 1',
-                    'email': 'test1@example.com',
-                    'gender': 'Male',
-                    'address': '123 Test Street'
-                },
-                {
-                    'id': uuid.UUID('550e8400-e29b-41d4-a716-446655440001'),
-                    'name': 'Test User 2 Updated',  # Simulate data difference
-                    'email': 'test2@example.com',
-                    'gender': 'Female',
-                    'address': '456 Test Avenue'
-                }
-            ]
-        elif "WHERE id = ?" in query and params:
-            # Simulate record lookup
-            test_records = {
-                uuid.UUID('550e8400-e29b-41d4-a716-446655440000'): {
-                    'id': uuid.UUID('550e8400-e29b-41d4-a716-446655440000'),
-                    'name': 'Test User 1',
-                    'email': 'test1@example.com',
-                    'gender': 'Male',
-                    'address': '123 Test Street'
-                }
-            }
-            record = test_records.get(params[0])
-            return [record] if record else []
-        else:
-            return []
+        self.estimate = None
+        # (token ranges, records, oldest scan time) that an incremental run reused without rescanning
+        self.unverified: Optional[Tuple[int, int, float]] = None
+    
+    def _reset(self):
+        self.counts = {'missing_in_cassandra': 0, 'missing_in_astra': 0, 'data_mismatch': 0}
+        self.examples: Dict[str, List[ConsistencyResult]] = {kind: [] for kind in self.counts}
+    
+    def _record(self, result: ConsistencyResult):
+        """Count a differing record, stream it out and add it to the repair plan"""
+        kind = difference_kind(result)
+        with self.lock:
+            self.counts[kind] += 1
+            if len(self.examples[kind]) < self.max_examples:
+                self.examples[kind].append(result)
+        if self.results is not None:
+            self.results.write(result)
+        if self.repair_plan is not None:
+            entry = self._repair_entry(uuid.UUID(result.record_id))
+            if entry is not None:
+                self.repair_plan.add(entry)
+    
+    def _cells(self, side: str, record_id: uuid.UUID) -> Optional[Dict[str, Tuple[Any, int]]]:
+        """Non-null cells of a record as {column: (value, writetime)}, or None if the row is gone"""
+        session = self.cassandra_session if side == 'cassandra' else self.astra_session
+        row = session.execute(self.writetime_lookups[side], (record_id,)).one()
+        if row is None:
+            return None
+        return {name: (row[1 + 2 * i], row[2 + 2 * i]) for i, name in enumerate(self.fields)
+                if row[2 + 2 * i] is not None}
+    
+    def _repair_entry(self, record_id: uuid.UUID) -> Optional[Dict]:
+        """
+        Re-read a differing record with cell timestamps on both clusters and
+        work out the write that brings Astra DB in line with Cassandra
+        """
+        cassandra_cells = self._cells('cassandra', record_id)
+        astra_cells = self._cells('astra', record_id)
+        if cassandra_cells is None and astra_cells is None:
+            return None
+        if cassandra_cells is None:
+            timestamp = max((writetime for _, writetime in astra_cells.values()), default=None)
+            if timestamp is None:
+                return None  # key-only row; no cell timestamp to delete it at
+            return {'op': 'delete', 'id': record_id, 'columns': [], 'timestamp': timestamp}
+        astra_cells = astra_cells or {}
+        upserts = {name: cell for name, cell in cassandra_cells.items()
+                   if astra_cells.get(name, (None,))[0] != cell[0]}
+        # Cells null in Cassandra but set in Astra DB are deleted, alongside any upsert
+        extra = [name for name in astra_cells if name not in cassandra_cells]
+        deletes = {'columns': extra, 'timestamp': max(astra_cells[name][1] for name in extra)} if extra else {}
+        if upserts:
+            return {'op': 'upsert', 'id': record_id, 'cells': upserts, **deletes}
+        if not extra:
+            return None  # converged since the scan
+        return {'op': 'delete', 'id': record_id, **deletes}
+    
+    def _compare_fields(self, cassandra_record, astra_record) -> List[str]:
+        differences = []
+        for field_name in self.fields:
+            cassandra_value = getattr(cassandra_record, field_name)
+            astra_value = getattr(astra_record, field_name)
+            if cassandra_value != astra_value:
+                differences.append(
+                    f"{field_name}: Cassandra='{cassandra_value}' vs Astra='{astra_value}'"
+                )
+        return differences
     
     def validate_record_consistency(self, record_id: uuid.UUID) -> ConsistencyResult:
         """Validate consistency for a specific record"""
         print(f"   🔍 Validating record: {record_id}")
         
-        # Query Cassandra
-        cassandra_records = self.simulate_cassandra_query(
-            "SELECT * FROM users WHERE id = ?", (record_id,)
-        )
-        cassandra_record = cassandra_records[0] if cassandra_records else None
-        
-        # Query Astra DB
-        astra_records = self.simulate_astra_query(
-            "SELECT * FROM users WHERE id = ?", (record_id,)
-        )
-        astra_record = astra_records[0] if astra_records else None
+        cassandra_record = self.cassandra_session.execute(self.lookups['cassandra'], (record_id,)).one()
+        astra_record = self.astra_session.execute(self.lookups['astra'], (record_id,)).one()
         
         # Check existence
         cassandra_exists = cassandra_record is not None
@@ -138,18 +754,9 @@ class DataConsistencyValidator:
         # Check data consistency
         differences = []
         data_matches = False
-        
         if cassandra_exists and astra_exists:
-            data_matches = True
-            for field in ['name', 'email', 'gender', 'address']:
-                cassandra_value = cassandra_record.get(field)
-                astra_value = astra_record.get(field)
-                
-                if cassandra_value != astra_value:
-                    differences.append(
-                        f"{field}: Cassandra='{cassandra_value}' vs Astra='{astra_value}'"
-                    )
-                    data_matches = False
+            differences = self._compare_fields(cassandra_record, astra_record)
+            data_matches = not differences
         
         result = ConsistencyResult(
             record_id=str(record_id),
@@ -175,100 +782,326 @@ class DataConsistencyValidator:
         
         return result
     
-    def validate_full_dataset(self) -> ValidationSummary:
-        """Validate consistency across entire dataset"""
-        print("🔍 Starting full dataset validation...")
+    def _scan_range(self, side: str, token_range: Tuple[int, int]) -> Iterator[Any]:
+        """Rows of one token range in (token, id) order; the driver pages lazily"""
+        session = self.cassandra_session if side == 'cassandra' else self.astra_session
+        statement = self.range_queries[side].bind(token_range)
+        statement.fetch_size = self.fetch_size
+        return iter(session.execute(statement))
+    
+    def _difference(self, record_id, cassandra_record, astra_record) -> Optional[ConsistencyResult]:
+        if cassandra_record is not None and astra_record is not None:
+            differences = self._compare_fields(cassandra_record, astra_record)
+            if not differences:
+                return None
+        else:
+            differences = []
+        return ConsistencyResult(
+            record_id=str(record_id),
+            cassandra_exists=cassandra_record is not None,
+            astra_exists=astra_record is not None,
+            data_matches=False,
+            differences=differences,
+            timestamp=datetime.now()
+        )
+    
+    def validate_token_range(self, token_range: Tuple[int, int]) -> RangeResult:
+        """Merge-join one token range of both tables"""
+        return self._merge_join(self._scan_range('cassandra', token_range), self._scan_range('astra', token_range))
+    
+    def _merge_join(self, cassandra_scan: Iterable[Any], astra_scan: Iterable[Any], resolve=None) -> RangeResult:
+        """
+        Compare two row streams sorted by token (first column). Rows sharing a
+        token (hash collisions) are matched by id. `resolve(id, cassandra_row,
+        astra_row)` returns the ConsistencyResult for a pair, None when they
+        agree, or PENDING when the caller settles the pair later; it defaults
+        to comparing full rows field by field.
+        """
+        resolve = resolve or self._difference
+        result = RangeResult()
+        cassandra_groups = groupby(cassandra_scan, key=lambda row: row[0])
+        astra_groups = groupby(astra_scan, key=lambda row: row[0])
+        cassandra_hash = astra_hash = 0
+        cassandra_group = next(cassandra_groups, None)
+        astra_group = next(astra_groups, None)
+        
+        while cassandra_group is not None or astra_group is not None:
+            if astra_group is None or (cassandra_group is not None and cassandra_group[0] < astra_group[0]):
+                cassandra_rows, astra_rows = list(cassandra_group[1]), []
+                cassandra_group = next(cassandra_groups, None)
+            elif cassandra_group is None or astra_group[0] < cassandra_group[0]:
+                cassandra_rows, astra_rows = [], list(astra_group[1])
+                astra_group = next(astra_groups, None)
+            else:
+                cassandra_rows, astra_rows = list(cassandra_group[1]), list(astra_group[1])
+                cassandra_group = next(cassandra_groups, None)
+                astra_group = next(astra_groups, None)
+            
+            result.cassandra_rows += len(cassandra_rows)
+            result.astra_rows += len(astra_rows)
+            cassandra_hash += sum(row_hash(row) for row in cassandra_rows)
+            astra_hash += sum(row_hash(row) for row in astra_rows)
+            cassandra_by_id = {row.id: row for row in cassandra_rows}
+            astra_by_id = {row.id: row for row in astra_rows}
+            for record_id in cassandra_by_id.keys() | astra_by_id.keys():
+                difference = resolve(record_id, cassandra_by_id.get(record_id), astra_by_id.get(record_id))
+                if difference is None:
+                    result.consistent += 1
+                elif difference is not PENDING:
+                    result.different += 1
+                    self._record(difference)
+        result.cassandra_hash = cassandra_hash & MASK_64
+        result.astra_hash = astra_hash & MASK_64
+        return result
+    
+    @property
+    def differences(self) -> int:
+        return sum(self.counts.values())
+    
+    def validate_hash_streams(self, cassandra_hashes: Iterable[HashRow],
+                              astra_hashes: Iterable[HashRow]) -> ValidationSummary:
+        """
+        Validate from the (token, id, hash) streams of two hash workers. Only
+        ids whose hashes differ, or that one side lacks, are read in full,
+        `lookup_window` at a time while the streams are still being joined,
+        so network I/O to this process is about 75 bytes per row plus the
+        differing rows.
+        """
+        print("🔍 Starting hash validation (merge-joining hash worker streams)...")
         start_time = time.time()
         
-        # Get all records from both databases
-        cassandra_records = self.simulate_cassandra_query("SELECT * FROM users")
-        astra_records = self.simulate_astra_query("SELECT * FROM users")
+        self._reset()
+        lookups = PairLookups({'cassandra': self.cassandra_session, 'astra': self.astra_session},
+                              self.lookups, self.lookup_window)
+        settled = {'consistent': 0}
         
-        # Create sets of record IDs
-        cassandra_ids = {record['id'] for record in cassandra_records}
-        astra_ids = {record['id'] for record in astra_records}
-        all_ids = cassandra_ids.union(astra_ids)
+        def settle(pairs):
+            for record_id, cassandra_record, astra_record in pairs:
+                if cassandra_record is None and astra_record is None:
+                    settled['consistent'] += 1  # deleted on both sides since the scan
+                    continue
+                difference = self._difference(record_id, cassandra_record, astra_record)
+                if difference is None:
+                    settled['consistent'] += 1
+                else:
+                    self._record(difference)
         
-        print(f"   Found {len(cassandra_ids)} records in Cassandra")
-        print(f"   Found {len(astra_ids)} records in Astra DB")
-        print(f"   Total unique records: {len(all_ids)}")
+        def resolve(record_id, cassandra_entry: Optional[HashRow], astra_entry: Optional[HashRow]):
+            if cassandra_entry is not None and astra_entry is not None and cassandra_entry.hash == astra_entry.hash:
+                return None
+            settle(lookups.submit(record_id))
+            return PENDING
         
-        # Validate each record
-        self.validation_results = []
-        for record_id in all_ids:
-            result = self.validate_record_consistency(record_id)
-            self.validation_results.append(result)
+        result = self._merge_join(cassandra_hashes, astra_hashes, resolve=resolve)
+        settle(lookups.finish())
+        consistent_records = result.consistent + settled['consistent']
         
-        # Calculate summary statistics
-        end_time = time.time()
-        validation_time = end_time - start_time
+        print(f"   Found {result.cassandra_rows} records in Cassandra")
+        print(f"   Found {result.astra_rows} records in Astra DB")
+        print(f"   Fetched full rows for {lookups.submitted} records with differing hashes")
         
-        consistent_records = sum(1 for r in self.validation_results if r.data_matches)
-        missing_in_cassandra = sum(1 for r in self.validation_results if not r.cassandra_exists)
-        missing_in_astra = sum(1 for r in self.validation_results if not r.astra_exists)
-        data_mismatches = sum(1 for r in self.validation_results 
-                            if r.cassandra_exists and r.astra_exists and not r.data_matches)
+        return self._summarize(consistent_records + self.differences, consistent_records, start_time)
+    
+    def _summarize(self, total_records: int, consistent_records: int, start_time: float) -> ValidationSummary:
+        missing_in_cassandra = self.counts['missing_in_cassandra']
+        missing_in_astra = self.counts['missing_in_astra']
+        data_mismatches = self.counts['data_mismatch']
         
-        consistency_rate = (consistent_records / len(all_ids)) * 100 if all_ids else 0
+        consistency_rate = (consistent_records / total_records) * 100 if total_records else 0
         
         self.summary = ValidationSummary(
-            total_records=len(all_ids),
+            total_records=total_records,
             consistent_records=consistent_records,
             missing_in_cassandra=missing_in_cassandra,
             missing_in_astra=missing_in_astra,
             data_mismatches=data_mismatches,
             consistency_rate=consistency_rate,
-            validation_time=validation_time
+            validation_time=time.time() - start_time
         )
-        
         return self.summary
     
-    def validate_sample_records(self, sample_size: int = 10) -> ValidationSummary:
-        """Validate consistency for a sample of records"""
-        print(f"🔍 Starting sample validation ({sample_size} records)...")
+    def _validate_ranges(self, ranges: List[Tuple[int, int]]) -> Dict[Tuple[int, int], RangeResult]:
+        """Merge-join `ranges` on `workers` threads; differences are recorded as they are found"""
+        results = {}
+        cassandra_rows = astra_rows = 0
+        start_time = last_report = time.time()
+        
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {executor.submit(self.validate_token_range, r): r for r in ranges}
+            for future in concurrent.futures.as_completed(futures):
+                token_range = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    raise RuntimeError(f"Token range ({token_range[0]}, {token_range[1]}] failed: {e}") from e
+                results[token_range] = result
+                cassandra_rows += result.cassandra_rows
+                astra_rows += result.astra_rows
+                
+                now = time.time()
+                if now - last_report >= 10 or len(results) == len(ranges):
+                    rate = (cassandra_rows + astra_rows) / (now - start_time) if now > start_time else 0.0
+                    print(f"   Progress: {len(results)}/{len(ranges)} ranges | {cassandra_rows} Cassandra / "
+                          f"{astra_rows} Astra rows | {rate:,.0f} rows/s | "
+                          f"{self.differences} differences", flush=True)
+                    last_report = now
+        return results
+    
+    def validate_full_dataset(self, state_dir: Optional[str] = None) -> ValidationSummary:
+        """
+        Validate consistency across entire dataset. With `state_dir`, the
+        digests of every range are saved as Merkle trees for later
+        incremental runs.
+        """
+        ranges = split_ring(self.splits)
+        print(f"🔍 Starting full dataset validation ({len(ranges)} token ranges, {self.workers} workers)...")
         start_time = time.time()
         
-        # Generate sample record IDs (in real implementation, would query database)
-        sample_ids = [
-            uuid.UUID('550e8400-e29b-41d4-a716-446655440000'),
-            uuid.UUID('550e8400-e29b-41d4-a716-446655440001'),
-        ]
+        self._reset()
+        results = self._validate_ranges(ranges)
+        consistent_records = sum(result.consistent for result in results.values())
         
-        print(f"   Validating {len(sample_ids)} sample records")
+        print(f"   Found {sum(r.cassandra_rows for r in results.values())} records in Cassandra")
+        print(f"   Found {sum(r.astra_rows for r in results.values())} records in Astra DB")
         
-        # Validate each record
-        self.validation_results = []
-        for record_id in sample_ids:
-            result = self.validate_record_consistency(record_id)
-            self.validation_results.append(result)
+        if state_dir is not None:
+            trees = {side: MerkleTree.empty(self.splits) for side in ('cassandra', 'astra')}
+            self._update_trees(trees, ranges, results, start_time)
+            self._save_trees(trees, state_dir)
         
-        # Calculate summary
-        end_time = time.time()
-        validation_time = end_time - start_time
+        return self._summarize(consistent_records + self.differences, consistent_records, start_time)
+    
+    def _tree_path(self, state_dir: str, side: str) -> str:
+        return os.path.join(state_dir, f"merkle-{side}-{self.table}.json")
+    
+    def _update_trees(self, trees: Dict[str, MerkleTree], ranges: List[Tuple[int, int]],
+                      results: Dict[Tuple[int, int], RangeResult], scanned_at: float):
+        index = {token_range: i for i, token_range in enumerate(ranges)}
+        for token_range, result in results.items():
+            i = index[token_range]
+            trees['cassandra'].leaves[i] = [result.cassandra_rows, result.cassandra_hash, scanned_at]
+            trees['astra'].leaves[i] = [result.astra_rows, result.astra_hash, scanned_at]
+        for tree in trees.values():
+            tree.rebuild()
+    
+    def _save_trees(self, trees: Dict[str, MerkleTree], state_dir: str):
+        os.makedirs(state_dir, exist_ok=True)
+        for side, tree in trees.items():
+            tree.save(self._tree_path(state_dir, side), self.table, self.fields)
+        print(f"   🌳 Saved Merkle trees to {state_dir} "
+              f"(Cassandra root {trees['cassandra'].root[:12]}, Astra root {trees['astra'].root[:12]})")
+    
+    def validate_incremental(self, state_dir: str = '.', sync_checkpoints: Iterable[str] = (),
+                             max_leaf_age: Optional[float] = DEFAULT_MAX_LEAF_AGE,
+                             rebuild: bool = False) -> ValidationSummary:
+        """
+        Validate using the Merkle trees saved by the previous run.
         
-        consistent_records = sum(1 for r in self.validation_results if r.data_matches)
-        missing_in_cassandra = sum(1 for r in self.validation_results if not r.cassandra_exists)
-        missing_in_astra = sum(1 for r in self.validation_results if not r.astra_exists)
-        data_mismatches = sum(1 for r in self.validation_results 
-                            if r.cassandra_exists and r.astra_exists and not r.data_matches)
+        Only ranges that may have changed are merge-joined again: leaves whose
+        saved digests differ between the clusters (found by comparing the trees
+        top-down), leaves overlapping a token range that a sync pass wrote
+        after the leaf was scanned (from `sync_checkpoints`), and leaves older
+        than `max_leaf_age` seconds. Without saved trees, or with `rebuild`,
+        every range is scanned. The updated trees are saved for the next run.
         
-        consistency_rate = (consistent_records / len(sample_ids)) * 100 if sample_ids else 0
+        Reused ranges matched when they were last scanned but have not been
+        read since; they are counted as consistent and reported in
+        `self.unverified` as unverified since their oldest scan.
+        """
+        ranges = split_ring(self.splits)
+        start_time = time.time()
+        trees = {side: MerkleTree.load(self._tree_path(state_dir, side), self.table, self.fields, self.splits)
+                 for side in ('cassandra', 'astra')}
         
-        self.summary = ValidationSummary(
-            total_records=len(sample_ids),
-            consistent_records=consistent_records,
-            missing_in_cassandra=missing_in_cassandra,
-            missing_in_astra=missing_in_astra,
-            data_mismatches=data_mismatches,
-            consistency_rate=consistency_rate,
-            validation_time=validation_time
-        )
+        dirty: Set[int]
+        if rebuild or None in trees.values():
+            print(f"🔍 Starting incremental validation: no usable Merkle trees in {state_dir}, "
+                  f"scanning all {len(ranges)} token ranges...")
+            trees = {side: MerkleTree.empty(self.splits) for side in trees}
+            dirty = set(range(len(ranges)))
+        else:
+            differing = set(trees['cassandra'].diff(trees['astra']))
+            written = set()
+            for start, end, finished_at in synced_ranges(sync_checkpoints, self.table):
+                written.update(i for i, leaf in enumerate(ranges)
+                               if finished_at > trees['cassandra'].leaves[i][2] and _overlaps(leaf, start, end))
+            stale = set()
+            if max_leaf_age is not None:
+                stale = {i for i, leaf in enumerate(trees['cassandra'].leaves) if start_time - leaf[2] > max_leaf_age}
+            dirty = differing | written | stale
+            print(f"🔍 Starting incremental validation: {len(dirty)}/{len(ranges)} token ranges to rescan "
+                  f"({len(differing)} differing, {len(written)} synced since last scan, {len(stale)} stale)...")
         
-        return self.summary
+        self._reset()
+        dirty_ranges = [ranges[i] for i in sorted(dirty)]
+        results = self._validate_ranges(dirty_ranges) if dirty_ranges else {}
+        self._update_trees(trees, ranges, results, start_time)
+        self._save_trees(trees, state_dir)
+        
+        # Ranges that were not rescanned matched last time; their rows count as consistent but unverified
+        reused = [trees['cassandra'].leaves[i] for i in range(len(ranges)) if i not in dirty]
+        reused_rows = sum(count for count, _, _ in reused)
+        consistent_records = reused_rows + sum(result.consistent for result in results.values())
+        differing_leaves = trees['cassandra'].diff(trees['astra'])
+        self.unverified = None
+        if reused:
+            self.unverified = (len(reused), reused_rows, min(scanned_at for _, _, scanned_at in reused))
+            print(f"   {len(reused)} token ranges reused from the saved trees ({reused_rows} records), "
+                  f"⚠️  {self._unverified_line()}")
+        print(f"   {len(differing_leaves)} token ranges differ")
+        
+        return self._summarize(consistent_records + self.differences, consistent_records, start_time)
+    
+    def _unverified_line(self) -> str:
+        ranges, rows, since = self.unverified
+        return (f"{rows} records in {ranges} reused token ranges unverified since "
+                f"{datetime.fromtimestamp(since).strftime('%Y-%m-%d %H:%M:%S')}")
+    
+    def validate_sample_window(self, start_token: int, rows: int) -> RangeResult:
+        """
+        Merge-join the rows following `start_token` on both clusters. Each side
+        returns at most `rows` rows; only the token window both sides fully
+        cover is compared, so a row missing on either side is still detected.
+        """
+        scans = {}
+        for side, session in (('cassandra', self.cassandra_session), ('astra', self.astra_session)):
+            statement = self.window_queries[side].bind((start_token, rows))
+            statement.fetch_size = rows
+            scans[side] = list(session.execute(statement))
+        window_end = min((scan[-1][0] for scan in scans.values() if len(scan) >= rows), default=MAX_TOKEN)
+        return self._merge_join((row for row in scans['cassandra'] if row[0] <= window_end),
+                                (row for row in scans['astra'] if row[0] <= window_end))
+    
+    def validate_sample_records(self, sample_size: int = 2000, rows_per_point: int = 50,
+                                confidence: float = 0.95, target_error: float = 0.01) -> ValidationSummary:
+        """
+        Validate consistency for a random sample of about `sample_size` records:
+        windows of up to `rows_per_point` rows after uniformly random tokens,
+        compared concurrently on `workers` threads. Sets `self.estimate`.
+        """
+        points = max(2, math.ceil(sample_size / rows_per_point))
+        print(f"🔍 Starting sample validation ({sample_size} records from {points} random token windows, "
+              f"{self.workers} workers)...")
+        start_time = time.time()
+        
+        self._reset()
+        consistent_records = 0
+        windows = []
+        start_tokens = [random.randint(MIN_TOKEN, MAX_TOKEN - 1) for _ in range(points)]
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for result in executor.map(lambda token: self.validate_sample_window(token, rows_per_point),
+                                       start_tokens):
+                windows.append((result.consistent + result.different, result.different))
+                consistent_records += result.consistent
+        
+        self.estimate = estimate_inconsistency(windows, confidence, target_error)
+        print(f"   Compared {self.estimate.rows} records in {points} windows")
+        return self._summarize(self.estimate.rows, consistent_records, start_time)
     
     def generate_reconciliation_report(self) -> str:
         """Generate a detailed reconciliation report"""
-        if not self.validation_results:
+        if self.summary is None:
             return "No validation results available. Run validation first."
         
         report = []
@@ -289,28 +1122,45 @@ class DataConsistencyValidator:
         report.append(f"  Consistency Rate: {self.summary.consistency_rate:.1f}%")
         report.append("")
         
-        # Detailed findings
+        if self.unverified is not None:
+            report.append("INCREMENTAL VALIDATION:")
+            report.append(f"  {self._unverified_line()}")
+            report.append("")
+        
+        if self.estimate is not None:
+            report.append("SAMPLE ESTIMATE:")
+            report.extend(f"  {line}" for line in self._estimate_lines())
+            report.append("")
+        
+        # Detailed findings: the first few of each kind, the full list is streamed to the results file
+        if self.results is not None and self.differences:
+            report.append(f"All {self.differences} differing records: {self.results.path}")
+            report.append("")
+        
         if self.summary.missing_in_cassandra > 0:
-            report.append("RECORDS MISSING IN CASSANDRA:")
-            for result in self.validation_results:
-                if not result.cassandra_exists:
-                    report.append(f"  - {result.record_id}")
+            report.append(f"RECORDS MISSING IN CASSANDRA{self._examples_note('missing_in_cassandra')}:")
+            for result in self.examples['missing_in_cassandra']:
+                report.append(f"  - {result.record_id}")
             report.append("")
         
         if self.summary.missing_in_astra > 0:
-            report.append("RECORDS MISSING IN ASTRA DB:")
-            for result in self.validation_results:
-                if not result.astra_exists:
-                    report.append(f"  - {result.record_id}")
+            report.append(f"RECORDS MISSING IN ASTRA DB{self._examples_note('missing_in_astra')}:")
+            for result in self.examples['missing_in_astra']:
+                report.append(f"  - {result.record_id}")
             report.append("")
         
         if self.summary.data_mismatches > 0:
-            report.append("DATA MISMATCHES:")
-            for result in self.validation_results:
-                if result.cassandra_exists and result.astra_exists and not result.data_matches:
-                    report.append(f"  Record: {result.record_id}")
-                    for diff in result.differences:
-                        report.append(f"    - {diff}")
+            report.append(f"DATA MISMATCHES{self._examples_note('data_mismatch')}:")
+            for result in self.examples['data_mismatch']:
+                report.append(f"  Record: {result.record_id}")
+                for diff in result.differences:
+                    report.append(f"    - {diff}")
+            report.append("")
+        
+        if self.repair_plan is not None:
+            report.append(f"REPAIR PLAN: {self.repair_plan.path} ({self.repair_plan.upserts} upserts, "
+                          f"{self.repair_plan.deletes} deletes)")
+            report.append(f"  → Review, then apply with --apply-repair={self.repair_plan.path}")
             report.append("")
         
         # Recommendations
@@ -331,6 +1181,30 @@ class DataConsistencyValidator:
         
         return "\n".join(report)
     
+    def _examples_note(self, kind: str) -> str:
+        shown = len(self.examples[kind])
+        return f" (first {shown} of {self.counts[kind]})" if shown < self.counts[kind] else ""
+    
+    def _estimate_lines(self) -> List[str]:
+        estimate = self.estimate
+        lines = [
+            f"Inconsistency Rate: {estimate.rate:.3%} "
+            f"({estimate.confidence:.0%} CI {estimate.low:.3%} - {estimate.high:.3%})",
+            f"Sample: {estimate.rows} records in {estimate.points} windows "
+            f"(design effect {estimate.design_effect:.2f})",
+        ]
+        if estimate.high - estimate.rate > estimate.target_error or estimate.rate - estimate.low > estimate.target_error:
+            lines.append(f"Required for ±{estimate.target_error:.2%}: ~{estimate.required_rows} records "
+                         f"(~{estimate.required_points} windows, --sample-size={estimate.required_rows})")
+        else:
+            lines.append(f"Error bound ±{estimate.target_error:.2%} reached")
+        if estimate.high <= 0.05:
+            lines.append(f"✅ GO for Phase C - at most {estimate.high:.2%} inconsistent at {estimate.confidence:.0%} confidence")
+        else:
+            lines.append(f"❌ NO-GO for Phase C - up to {estimate.high:.2%} inconsistent "
+                         f"at {estimate.confidence:.0%} confidence (threshold 5%)")
+        return lines
+    
     def print_validation_summary(self):
         """Print validation summary to console"""
         if not self.summary:
@@ -354,6 +1228,15 @@ class DataConsistencyValidator:
         
         print(f"🎯 Consistency Rate: {self.summary.consistency_rate:.1f}%")
         
+        if self.unverified is not None:
+            print(f"⚠️  {self._unverified_line()}")
+        
+        if self.estimate is not None:
+            print()
+            print("🎲 Sample Estimate:")
+            for line in self._estimate_lines():
+                print(f"   {line}")
+        
         # Status indicator
         if self.summary.consistency_rate >= 95:
             print("✅ EXCELLENT - Ready for Phase C")
@@ -364,18 +1247,174 @@ class DataConsistencyValidator:
         
         print("="*80)
 
+def connect_cassandra(workers: int):
+    """Connect to the origin Cassandra cluster"""
+    print("   → Connecting to Cassandra (Origin)...")
+    cluster = Cluster([os.getenv('CASSANDRA_HOST', 'localhost')],
+                      port=int(os.getenv('CASSANDRA_PORT', '9042')),
+                      executor_threads=max(2, workers))
+    session = cluster.connect('demo')
+    print("   ✅ Cassandra connected")
+    return cluster, session
+
+def connect_astra(workers: int, target_hosts: Optional[str] = None):
+    """
+    Connect to Astra DB, or to a plain Cassandra cluster standing in for it
+    when `target_hosts` ("host:port,...") is given
+    """
+    if target_hosts:
+        print(f"   → Connecting to stand-in target {target_hosts}...")
+        hosts = [entry.strip().rsplit(':', 1) for entry in target_hosts.split(',') if entry.strip()]
+        cluster = Cluster([host for host, *_ in hosts],
+                          port=int(hosts[0][1]) if len(hosts[0]) > 1 else 9042,
+                          executor_threads=max(2, workers))
+    else:
+        print("   → Connecting to Astra DB (Target)...")
+        secrets = {"clientId": "", "secret": ""}
+        if not FAKE_BACKEND:
+            with open("migration-cql-demo-token.json") as f:
+                secrets = json.load(f)
+        cluster = Cluster(
+            cloud={'secure_connect_bundle': 'secure-connect-migration-cql-demo.zip'},
+            auth_provider=PlainTextAuthProvider(secrets["clientId"], secrets["secret"]),
+            protocol_version=4,
+            executor_threads=max(2, workers)
+        )
+    session = cluster.connect('demo')
+    print("   ✅ Target connected")
+    return cluster, session
+
 def main():
     """Main validation execution"""
+    parser = argparse.ArgumentParser(description='Validate data consistency between Cassandra and Astra DB')
+    parser.add_argument('--full', action='store_true',
+                        help='Validate every record by token range scans instead of a sample')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Rescan only token ranges that changed since the Merkle trees in --state-dir')
+    parser.add_argument('--state-dir', default=None,
+                        help='Directory for Merkle trees (saved by --full, required state for --incremental)')
+    parser.add_argument('--rebuild', action='store_true', help='Ignore saved Merkle trees and rescan every range')
+    parser.add_argument('--sync-checkpoints',
+                        default=os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts',
+                                             'sync-checkpoint*.jsonl'),
+                        help='Glob of sync-data checkpoints whose written ranges are rescanned')
+    parser.add_argument('--max-leaf-age-hours', type=float, default=DEFAULT_MAX_LEAF_AGE / 3600,
+                        help='Rescan token ranges not scanned for this long (default 24)')
+    parser.add_argument('--sample-size', type=int, default=2000, help='Records checked by sample validation')
+    parser.add_argument('--rows-per-point', type=int, default=50,
+                        help='Records compared after each random token in sample validation')
+    parser.add_argument('--confidence', type=float, default=0.95, help='Confidence level of the sample estimate')
+    parser.add_argument('--target-error', type=float, default=0.01,
+                        help='Wanted half-width of the confidence interval (sets the required sample size)')
+    parser.add_argument('--workers', type=int, default=8, help='Token ranges merge-joined in parallel')
+    parser.add_argument('--splits', type=int, default=None,
+                        help='Token ranges to split the ring into (default 32 per worker)')
+    parser.add_argument('--fetch-size', type=int, default=1000, help='Rows per page for token range scans')
+    parser.add_argument('--target-hosts', default=None,
+                        help='host:port of a Cassandra cluster standing in for Astra DB')
+    parser.add_argument('--results', default=None,
+                        help='File differing records are streamed to (.csv for CSV, otherwise NDJSON; '
+                             'default consistency_differences_<time>.ndjson)')
+    parser.add_argument('--repair-plan', default=None,
+                        help='Also write timestamped upserts/deletes that make Astra DB match Cassandra')
+    parser.add_argument('--apply-repair', default=None, help='Apply a repair plan to Astra DB and exit')
+    parser.add_argument('--repair-concurrency', type=int, default=64,
+                        help='Repair writes in flight when applying a plan')
+    parser.add_argument('--hashes', action='store_true',
+                        help='Compare (id, hash) streams from one hash worker per cluster instead of full rows')
+    parser.add_argument('--cassandra-hash-cmd', default=None,
+                        help='Command running the Cassandra hash worker (default: local --hash-side=cassandra)')
+    parser.add_argument('--astra-hash-cmd', default=None,
+                        help='Command running the Astra DB hash worker (default: local --hash-side=astra)')
+    parser.add_argument('--hash-side', choices=('cassandra', 'astra'), default=None,
+                        help='Run as a hash worker: write token/id/hash lines of one cluster to stdout')
+    args = parser.parse_args()
+    
+    if args.hash_side:
+        # stdout carries the hash stream; everything else goes to stderr
+        with contextlib.redirect_stdout(sys.stderr):
+            if args.hash_side == 'cassandra':
+                cluster, session = connect_cassandra(args.workers)
+            else:
+                cluster, session = connect_astra(args.workers, args.target_hosts)
+        try:
+            started = time.time()
+            rows = emit_hashes(session, 'users', COMPARED_FIELDS, sys.stdout, args.splits or args.workers * 32,
+                               args.workers, args.fetch_size)
+            print(f"✅ {args.hash_side}: hashed {rows} records in {time.time() - started:.1f}s", file=sys.stderr)
+        finally:
+            cluster.shutdown()
+        return True
+    
     print("🎯 Phase B Data Consistency Validator")
     print("Validating data consistency between Cassandra and Astra DB")
     print()
     
-    validator = DataConsistencyValidator()
-    
+    clusters = []
+    streams = []
     try:
-        # Run sample validation (faster for demo)
-        print("Running sample validation...")
-        summary = validator.validate_sample_records(sample_size=10)
+        if args.apply_repair:
+            astra_cluster, astra_session = connect_astra(args.workers, args.target_hosts)
+            clusters.append(astra_cluster)
+            print(f"🔧 Applying repair plan {args.apply_repair} ({args.repair_concurrency} writes in flight)...")
+            applied, failed = apply_repair_plan(astra_session, args.apply_repair, concurrency=args.repair_concurrency)
+            print(f"✅ Applied {applied} repairs" + (f", ❌ {failed} failed (see {args.apply_repair}.failed)"
+                                                     if failed else ""))
+            return not failed
+        
+        cassandra_cluster, cassandra_session = connect_cassandra(args.workers)
+        clusters.append(cassandra_cluster)
+        astra_cluster, astra_session = connect_astra(args.workers, args.target_hosts)
+        clusters.append(astra_cluster)
+        
+        results = ResultStream(args.results or
+                               f"consistency_differences_{datetime.now().strftime('%Y%m%d_%H%M%S')}.ndjson")
+        streams.append(results)
+        repair_plan = RepairPlan(args.repair_plan) if args.repair_plan else None
+        if repair_plan is not None:
+            streams.append(repair_plan)
+        
+        validator = DataConsistencyValidator(
+            cassandra_session,
+            astra_session,
+            workers=args.workers,
+            splits=args.splits,
+            fetch_size=args.fetch_size,
+            results=results,
+            repair_plan=repair_plan
+        )
+        
+        if args.hashes:
+            workers = [start_hash_worker('cassandra', args.cassandra_hash_cmd, args),
+                       start_hash_worker('astra', args.astra_hash_cmd, args)]
+            try:
+                summary = validator.validate_hash_streams(read_hashes(workers[0].stdout, workers[0]),
+                                                          read_hashes(workers[1].stdout, workers[1]))
+            finally:
+                for worker in workers:
+                    worker.stdout.close()
+                    worker.wait()
+            failed = [w.args for w in workers if w.returncode]
+            if failed:
+                raise RuntimeError(f"Hash worker failed: {failed[0]}")
+        elif args.incremental:
+            summary = validator.validate_incremental(
+                args.state_dir or '.',
+                sync_checkpoints=glob.glob(args.sync_checkpoints),
+                max_leaf_age=args.max_leaf_age_hours * 3600,
+                rebuild=args.rebuild
+            )
+        elif args.full:
+            summary = validator.validate_full_dataset(args.state_dir)
+        else:
+            # Sample validation is faster for the demo
+            print("Running sample validation...")
+            summary = validator.validate_sample_records(
+                sample_size=args.sample_size,
+                rows_per_point=args.rows_per_point,
+                confidence=args.confidence,
+                target_error=args.target_error
+            )
         
         # Print results
         validator.print_validation_summary()
@@ -389,14 +1428,26 @@ def main():
             f.write(report)
         
         print(f"\n📄 Detailed report saved to: {report_filename}")
+        print(f"📄 Differing records streamed to: {results.path}")
+        if repair_plan is not None:
+            print(f"🔧 Repair plan ({repair_plan.upserts} upserts, {repair_plan.deletes} deletes) "
+                  f"saved to: {repair_plan.path}")
         
-        # Return success based on consistency rate
+        # Return success based on consistency rate (its pessimistic bound for a sample)
+        if validator.estimate is not None:
+            return (1 - validator.estimate.high) * 100 >= 90
         return summary.consistency_rate >= 90
-        
+    
     except Exception as e:
         print(f"\n❌ Validation failed: {str(e)}")
         return False
+    
+    finally:
+        for stream in streams:
+            stream.close()
+        for cluster in clusters:
+            cluster.shutdown()
 
 if __name__ == "__main__":
     success = main()
-    sys.exit(0 if success else 1)
\ No newline at end of file
+    sys.exit(0 if success else 1)
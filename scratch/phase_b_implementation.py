@@ -8,7 +8,12 @@ import os
 import json
 import uuid
 import time
+import argparse
+import random
+import re
+import threading
 import concurrent.futures
+from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Dict, List, Optional, Tuple
 
@@ -22,6 +27,649 @@ except ImportError as e:
     print("Please run: pip install cassandra-driver requests")
     sys.exit(1)
 
+USER_COLUMNS = ('id', 'name', 'email', 'gender', 'address')
+
+# Same names as ZDM_WRITE_MODE: wait for both clusters, or only for the primary
+DUAL_SYNC = 'DUAL_SYNC'
+DUAL_ASYNC_ON_SECONDARY = 'DUAL_ASYNC_ON_SECONDARY'
+WRITE_MODES = (DUAL_SYNC, DUAL_ASYNC_ON_SECONDARY)
+
+
+class LatencyStats:
+    """Thread-safe latency samples (ms) with percentile summaries"""
+
+    def __init__(self):
+        self.samples: List[float] = []
+        self.lock = threading.Lock()
+
+    def record(self, latency_ms: float):
+        with self.lock:
+            self.samples.append(latency_ms)
+
+    @property
+    def count(self) -> int:
+        return len(self.samples)
+
+    def percentile(self, quantile: float) -> float:
+        with self.lock:
+            ordered = sorted(self.samples)
+        if not ordered:
+            return 0.0
+        return ordered[min(int(quantile * len(ordered)), len(ordered) - 1)]
+
+    def mean(self) -> float:
+        with self.lock:
+            return sum(self.samples) / len(self.samples) if self.samples else 0.0
+
+    def summary(self) -> str:
+        if not self.samples:
+            return "no samples"
+        return (f"mean {self.mean():.1f}ms, p50 {self.percentile(0.5):.1f}ms, "
+                f"p95 {self.percentile(0.95):.1f}ms, p99 {self.percentile(0.99):.1f}ms, "
+                f"max {self.percentile(1.0):.1f}ms")
+
+
+@dataclass
+class SideStats:
+    """Writes, failures and latency of one leg (origin or target) of the dual write"""
+    writes: int = 0
+    failures: int = 0
+    last_error: Optional[str] = None
+    latency: LatencyStats = field(default_factory=LatencyStats)
+
+
+@dataclass
+class DualWriteResult:
+    ok: bool
+    latency_ms: float
+    origin_error: Optional[Exception] = None
+    target_error: Optional[Exception] = None  # unknown yet in DUAL_ASYNC_ON_SECONDARY
+
+
+class RetryLog:
+    """
+    Durable queue of failed target (secondary) writes, replayed in the background.
+
+    Failures are appended as NDJSON lines to an append-only file; replays are
+    recorded as `ack` lines rather than rewriting it. `append` only buffers
+    the line, so the driver callback that reports a failure never touches the
+    disk: a flusher thread writes and fsyncs the buffer every
+    `fsync_interval` seconds, or as soon as `fsync_batch` lines are waiting.
+    It never waits on the target cluster, so a crash loses at most that
+    window of failures even while replays are failing.
+
+    A separate replay thread re-sends due entries with `execute_async`, at
+    most `max_replays_in_flight` at a time. Each entry keeps the client
+    timestamp of the original write and is replayed with `USING TIMESTAMP` of
+    it, so a replay never overwrites a newer write to the same row. Failed
+    replays back off exponentially (with jitter) up to `max_backoff` seconds.
+    Entries not acknowledged when the process stops are replayed on the next
+    start.
+    """
+
+    def __init__(self, path: str, session, statement, fsync_interval: float = 0.05, fsync_batch: int = 64,
+                 base_backoff: float = 0.5, max_backoff: float = 30.0, max_replays_in_flight: int = 32):
+        self.path = path
+        self.session = session
+        self.statement = statement
+        self.fsync_interval = fsync_interval
+        self.fsync_batch = fsync_batch
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.lock = threading.Lock()
+        self.pending: Dict[int, Dict] = self._load()
+        self.next_seq = max(self.pending, default=0) + 1
+        self._compact()
+        self.file = open(path, 'a')
+        self.buffer: List[str] = []
+        self.appended = self.replayed = self.replay_failures = self.fsyncs = 0
+        self.recovered = len(self.pending)
+        self.replay_lag = LatencyStats()  # failure -> successful replay, ms
+        self.max_replays_in_flight = max_replays_in_flight
+        self.replay_slots = threading.BoundedSemaphore(max_replays_in_flight)
+        self.flush_due = threading.Event()
+        self.stopping = threading.Event()
+        self.closing = threading.Event()
+        self.flusher = threading.Thread(target=self._flush_loop, name='retry-log-fsync', daemon=True)
+        self.flusher.start()
+        self.worker = threading.Thread(target=self._replay_loop, name='retry-log-replay', daemon=True)
+        self.worker.start()
+
+    def _load(self) -> Dict[int, Dict]:
+        pending = {}
+        if not os.path.exists(self.path):
+            return pending
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # torn last line from a crash before fsync
+                if 'ack' in entry:
+                    pending.pop(entry['ack'], None)
+                else:
+                    entry['attempts'], entry['due'] = 0, 0.0
+                    pending[entry['seq']] = entry
+        return pending
+
+    def _compact(self):
+        """Rewrite the log with only unacknowledged entries"""
+        temp = f"{self.path}.tmp"
+        with open(temp, 'w') as f:
+            for entry in self.pending.values():
+                f.write(json.dumps({k: entry[k] for k in ('seq', 'timestamp', 'row', 'failed_at', 'error')}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp, self.path)
+
+    def append(self, values: Tuple, timestamp: int, error: Exception):
+        """Queue a failed target write; safe on the driver's callback thread (no file I/O)"""
+        entry = {
+            'timestamp': timestamp,
+            'row': {column: str(value) if isinstance(value, uuid.UUID) else value
+                    for column, value in zip(USER_COLUMNS, values)},
+            'failed_at': time.time(),
+            'error': str(error)[:200],
+        }
+        with self.lock:
+            entry['seq'] = self.next_seq
+            self.next_seq += 1
+            self._write(entry)
+            self.appended += 1
+            entry['attempts'], entry['due'] = 0, time.monotonic() + self.base_backoff
+            self.pending[entry['seq']] = entry
+
+    def _write(self, record: Dict):
+        # Caller holds the lock; the flusher thread writes the line out
+        self.buffer.append(json.dumps({k: v for k, v in record.items() if k not in ('attempts', 'due')}) + "\n")
+        if len(self.buffer) >= self.fsync_batch:
+            self.flush_due.set()
+
+    def _flush(self):
+        # Only the flusher thread (and close, after it stopped) writes the file
+        with self.lock:
+            lines, self.buffer = self.buffer, []
+        if not lines:
+            return
+        self.file.writelines(lines)
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        with self.lock:
+            self.fsyncs += 1
+
+    def _flush_loop(self):
+        while not self.closing.is_set():
+            self.flush_due.wait(self.fsync_interval)
+            self.flush_due.clear()
+            self._flush()
+
+    def _replay_loop(self):
+        while not self.stopping.wait(self.fsync_interval):
+            with self.lock:
+                now = time.monotonic()
+                due = sorted((entry for entry in self.pending.values() if entry['due'] <= now),
+                             key=lambda e: e['seq'])
+                for entry in due:
+                    entry['due'] = float('inf')  # in flight
+            for index, entry in enumerate(due):
+                while not self.replay_slots.acquire(timeout=self.fsync_interval):
+                    if self.stopping.is_set():
+                        with self.lock:
+                            for skipped in due[index:]:
+                                skipped['due'] = 0.0
+                        return
+                self._replay(entry)
+
+    def _replay(self, entry: Dict):
+        row = dict(entry['row'])
+        row['id'] = uuid.UUID(row['id'])
+        try:
+            future = self.session.execute_async(self.statement,
+                                                tuple(row[column] for column in USER_COLUMNS) + (entry['timestamp'],))
+        except Exception as e:
+            self._replay_done(entry, e)
+            return
+        future.add_callbacks(lambda _: self._replay_done(entry), lambda e: self._replay_done(entry, e))
+
+    def _replay_done(self, entry: Dict, error: Optional[Exception] = None):
+        # Runs on the driver's callback thread: bookkeeping only, the ack line is buffered
+        with self.lock:
+            if error is not None:
+                self.replay_failures += 1
+                entry['attempts'] += 1
+                backoff = min(self.base_backoff * 2 ** entry['attempts'], self.max_backoff)
+                entry['due'] = time.monotonic() + backoff * random.uniform(0.5, 1.0)
+                entry['error'] = str(error)[:200]
+            else:
+                self._write({'ack': entry['seq']})
+                self.pending.pop(entry['seq'], None)
+                self.replayed += 1
+        self.replay_slots.release()
+        if error is None:
+            self.replay_lag.record((time.time() - entry['failed_at']) * 1000)
+
+    @property
+    def depth(self) -> int:
+        return len(self.pending)
+
+    def oldest_age(self) -> float:
+        """Seconds since the oldest pending failure - how far the target lags behind"""
+        with self.lock:
+            oldest = min((entry['failed_at'] for entry in self.pending.values()), default=None)
+        return time.time() - oldest if oldest is not None else 0.0
+
+    def wait_empty(self, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        while self.depth and time.monotonic() < deadline:
+            time.sleep(self.fsync_interval)
+        return not self.depth
+
+    def close(self, timeout: float = 5.0):
+        """Stop replaying, give in-flight replays `timeout` seconds to land, then flush and close the file"""
+        self.stopping.set()
+        self.worker.join()
+        deadline = time.monotonic() + timeout
+        for _ in range(self.max_replays_in_flight):
+            if not self.replay_slots.acquire(timeout=max(0.0, deadline - time.monotonic())):
+                break
+        self.closing.set()
+        self.flush_due.set()
+        self.flusher.join()
+        self._flush()
+        self.file.close()
+
+    def print_summary(self):
+        print(f"   Retry log: {self.path}")
+        print(f"   Queued: {self.appended} failed target writes (+{self.recovered} from a previous run), "
+              f"replayed: {self.replayed}, replay failures: {self.replay_failures}, fsyncs: {self.fsyncs}")
+        print(f"   Queue depth: {self.depth}, oldest pending: {self.oldest_age():.1f}s")
+        print(f"   Replay lag:              {self.replay_lag.summary()}")
+
+
+@dataclass
+class LoadResult:
+    """Outcome of driving one write path at one concurrency level"""
+    path: str
+    concurrency: int
+    ok: int = 0
+    errors: int = 0
+    seconds: float = 0.0
+    last_error: Optional[str] = None
+    latency: LatencyStats = field(default_factory=LatencyStats)
+
+    @property
+    def throughput(self) -> float:
+        return self.ok / self.seconds if self.seconds > 0 else 0.0
+
+    @property
+    def error_rate(self) -> float:
+        total = self.ok + self.errors
+        return self.errors / total if total else 0.0
+
+
+class PendingDualWrite:
+    """Handle for one in-flight dual write; `result()` blocks until it completes"""
+
+    def __init__(self, values: Tuple, callback=None):
+        self.values = values
+        self.callback = callback
+        self.timestamp = time.time_ns() // 1000  # same write time on both clusters
+        self.started = time.perf_counter()
+        self.legs_pending = 2
+        self.errors: Dict[str, Optional[Exception]] = {}
+        self.done = threading.Event()
+        self._result: Optional[DualWriteResult] = None
+
+    def result(self, timeout: Optional[float] = None) -> Optional[DualWriteResult]:
+        self.done.wait(timeout)
+        return self._result
+
+
+class DualWriter:
+    """
+    Dual writes issued to both clusters in parallel with prepared statements.
+
+    Both legs are sent with `execute_async` at once, so in DUAL_SYNC mode a
+    write takes max(origin, target) rather than their sum. In
+    DUAL_ASYNC_ON_SECONDARY mode the write completes with the origin (primary)
+    leg and the target leg finishes in the background; its failures are
+    counted per side. At most `max_in_flight` writes, including background
+    target legs, are outstanding at once.
+
+    Both legs carry the same client timestamp. With `retry_log_path`, failed
+    target legs go to a durable `RetryLog` and are replayed until they land.
+    """
+
+    def __init__(self, origin_session, target_session, table: str = 'users', mode: str = DUAL_SYNC,
+                 max_in_flight: int = 128, retry_log_path: Optional[str] = None):
+        if mode not in WRITE_MODES:
+            raise ValueError(f"Unknown dual write mode {mode!r}, expected one of {', '.join(WRITE_MODES)}")
+        self.mode = mode
+        insert = (f"INSERT INTO {table} ({', '.join(USER_COLUMNS)}) "
+                  f"VALUES ({', '.join('?' for _ in USER_COLUMNS)}) USING TIMESTAMP ?")
+        self.legs = (
+            ('origin', origin_session, origin_session.prepare(insert)),
+            ('target', target_session, target_session.prepare(insert)),
+        )
+        self.retry_log = RetryLog(retry_log_path, target_session, self.legs[1][2]) if retry_log_path else None
+        self.sides = {'origin': SideStats(), 'target': SideStats()}
+        self.latency = LatencyStats()
+        self.completed = 0
+        self.failed = 0
+        self.max_in_flight = max_in_flight
+        self.slots = threading.BoundedSemaphore(max_in_flight)
+        self.lock = threading.Lock()
+
+    def write_async(self, values: Tuple, callback=None) -> PendingDualWrite:
+        """Issue both legs; `callback(result)` runs on completion (driver thread)"""
+        self.slots.acquire()
+        write = PendingDualWrite(values, callback)
+        for side, session, statement in self.legs:
+            try:
+                future = session.execute_async(statement, values + (write.timestamp,))
+            except Exception as e:
+                self._leg_done(e, write, side)
+                continue
+            future.add_callbacks(self._leg_done, self._leg_done,
+                                 callback_args=(write, side), errback_args=(write, side))
+        return write
+
+    def write(self, values: Tuple) -> DualWriteResult:
+        return self.write_async(values).result()
+
+    def _leg_done(self, outcome, write: PendingDualWrite, side: str):
+        latency_ms = (time.perf_counter() - write.started) * 1000
+        error = outcome if isinstance(outcome, Exception) else None
+        stats = self.sides[side]
+        stats.latency.record(latency_ms)
+        if error is not None and side == 'target' and self.retry_log:
+            # Logged before the write counts as done, so it survives a crash after drain()
+            self.retry_log.append(write.values, write.timestamp, error)
+        with self.lock:
+            if error is None:
+                stats.writes += 1
+            else:
+                stats.failures += 1
+                stats.last_error = str(error)
+            write.errors[side] = error
+            write.legs_pending -= 1
+            remaining = write.legs_pending
+        if remaining == 0 or (side == 'origin' and self.mode == DUAL_ASYNC_ON_SECONDARY):
+            self._complete(write, latency_ms)
+        if remaining == 0:
+            self.slots.release()
+
+    def _complete(self, write: PendingDualWrite, latency_ms: float):
+        if write.done.is_set():
+            return
+        origin_error = write.errors.get('origin')
+        target_error = write.errors.get('target')
+        result = DualWriteResult(origin_error is None and target_error is None, latency_ms,
+                                 origin_error, target_error)
+        self.latency.record(latency_ms)
+        with self.lock:
+            self.completed += 1
+            if not result.ok:
+                self.failed += 1
+        write._result = result
+        write.done.set()
+        if write.callback:
+            write.callback(result)
+
+    def drain(self):
+        """Wait for every outstanding leg, including background target writes"""
+        for _ in range(self.max_in_flight):
+            self.slots.acquire()
+        for _ in range(self.max_in_flight):
+            self.slots.release()
+
+    def close(self):
+        self.drain()
+        if self.retry_log:
+            self.retry_log.close()
+
+    def print_summary(self):
+        print(f"   Mode: {self.mode}, {self.completed} dual writes, {self.failed} failed")
+        print(f"   Dual write latency:      {self.latency.summary()}")
+        for side, label in (('origin', 'Cassandra (origin)'), ('target', 'Astra DB (target)')):
+            stats = self.sides[side]
+            print(f"   {label + ':':<24} {stats.writes} ok, {stats.failures} failed - {stats.latency.summary()}")
+            if stats.last_error:
+                print(f"      Last error: {stats.last_error}")
+        if self.retry_log:
+            self.retry_log.print_summary()
+
+
+ZDM_METRICS_URL = 'http://localhost:30044/metrics'
+
+PROMETHEUS_SAMPLE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(?:\{(.*)\})?\s+(\S+)(?:\s+-?\d+)?$')
+PROMETHEUS_LABEL = re.compile(r'([a-zA-Z_][a-zA-Z0-9_]*)="((?:[^"\\]|\\.)*)"')
+
+MetricKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+def parse_prometheus(text: str) -> Dict[MetricKey, float]:
+    """Samples of a Prometheus text exposition, keyed by (name, sorted labels)"""
+    samples = {}
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        match = PROMETHEUS_SAMPLE.match(line)
+        if not match:
+            continue
+        name, labels, value = match.groups()
+        label_pairs = tuple(sorted((key, raw.replace('\\"', '"').replace('\\\\', '\\'))
+                                   for key, raw in PROMETHEUS_LABEL.findall(labels or '')))
+        try:
+            samples[(name, label_pairs)] = float(value)
+        except ValueError:
+            continue
+    return samples
+
+
+def histogram_quantile(quantile: float, buckets: List[Tuple[float, float]]) -> Optional[float]:
+    """Quantile from cumulative (upper bound, count) buckets, interpolated like PromQL"""
+    buckets = sorted(buckets)
+    if not buckets or buckets[-1][1] <= 0:
+        return None
+    rank = quantile * buckets[-1][1]
+    lower_bound, lower_count = 0.0, 0.0
+    for bound, count in buckets:
+        if count >= rank:
+            if bound == float('inf'):
+                return lower_bound
+            if count == lower_count:
+                return bound
+            return lower_bound + (bound - lower_bound) * (rank - lower_count) / (count - lower_count)
+        lower_bound, lower_count = bound, count
+    return lower_bound
+
+
+def metric_side(name: str, labels: Dict[str, str]) -> str:
+    """'origin', 'target' or 'proxy' from the metric name, else its type/cluster labels"""
+    for text in (name, ' '.join(labels.values())):
+        for side in ('origin', 'target', 'proxy'):
+            if side in text:
+                return side
+    return 'proxy'
+
+
+class ProxyMetricsCollector:
+    """
+    Scrapes the ZDM proxy's Prometheus endpoint every `interval` seconds
+    during a run and summarizes what happened between the first and last
+    scrape: counter rates, request-duration quantiles per histogram (origin,
+    target and proxy-level), in-flight request gauges and failed requests.
+    """
+
+    def __init__(self, url: str = ZDM_METRICS_URL, interval: float = 5.0):
+        self.url = url
+        self.interval = interval
+        self.snapshots: List[Tuple[float, Dict[MetricKey, float]]] = []
+        self.scrape_errors = 0
+        self.last_error: Optional[str] = None
+        self.stopping = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+    def scrape(self) -> bool:
+        try:
+            response = requests.get(self.url, timeout=min(self.interval, 5))
+            response.raise_for_status()
+        except Exception as e:
+            self.scrape_errors += 1
+            self.last_error = str(e)
+            return False
+        self.snapshots.append((time.monotonic(), parse_prometheus(response.text)))
+        return True
+
+    def start(self) -> bool:
+        """Take a first scrape and keep scraping in the background; False if unreachable"""
+        if not self.scrape():
+            return False
+        self.thread = threading.Thread(target=self._run, name='zdm-metrics', daemon=True)
+        self.thread.start()
+        return True
+
+    def _run(self):
+        while not self.stopping.wait(self.interval):
+            self.scrape()
+
+    def stop(self):
+        self.stopping.set()
+        if self.thread:
+            self.thread.join()
+            self.scrape()
+
+    @property
+    def elapsed(self) -> float:
+        return self.snapshots[-1][0] - self.snapshots[0][0] if len(self.snapshots) > 1 else 0.0
+
+    def _increase(self, key: MetricKey) -> float:
+        first, last = self.snapshots[0][1].get(key, 0.0), self.snapshots[-1][1].get(key, 0.0)
+        return last - first if last >= first else last  # counter reset: proxy restarted
+
+    def histograms(self) -> Dict[str, Dict]:
+        """
+        Per histogram (labels other than `le`/`node` kept, nodes summed):
+        side, request rate and p50/p95/p99 in ms over the run
+        """
+        grouped: Dict[Tuple, Dict[float, float]] = {}
+        for name, labels in self.snapshots[-1][1]:
+            if not name.endswith('_bucket'):
+                continue
+            label_map = dict(labels)
+            bound = float(label_map.pop('le', 'inf'))
+            label_map.pop('node', None)
+            group = (name[:-len('_bucket')], tuple(sorted(label_map.items())))
+            buckets = grouped.setdefault(group, {})
+            buckets[bound] = buckets.get(bound, 0.0) + self._increase((name, labels))
+        summaries = {}
+        for (base, labels), buckets in sorted(grouped.items()):
+            requests_seen = max(buckets.values(), default=0.0)
+            if requests_seen <= 0:
+                continue
+            display = base + (f"{{{','.join(f'{k}={v}' for k, v in labels)}}}" if labels else '')
+            bucket_list = list(buckets.items())
+            scale = 1000.0 if base.endswith('_seconds') else 1.0
+            summaries[display] = {
+                'base': base,
+                'side': metric_side(base, dict(labels)),
+                'count': requests_seen,
+                'buckets': bucket_list,
+                'rate': requests_seen / self.elapsed if self.elapsed else 0.0,
+                **{f"p{int(q * 100)}": (histogram_quantile(q, bucket_list) or 0.0) * scale
+                   for q in (0.5, 0.95, 0.99)},
+            }
+        return summaries
+
+    def side_latency(self, side: str, base_filter: str = 'request_duration') -> Optional[Dict]:
+        """Quantiles of all `side` request-duration histograms merged (e.g. every origin node)"""
+        merged: Dict[float, float] = {}
+        for summary in self.histograms().values():
+            if summary['side'] == side and base_filter in summary['base']:
+                for bound, count in summary['buckets']:
+                    merged[bound] = merged.get(bound, 0.0) + count
+        if not merged:
+            return None
+        bucket_list = list(merged.items())
+        return {f"p{int(q * 100)}": (histogram_quantile(q, bucket_list) or 0.0) * 1000 for q in (0.5, 0.95, 0.99)}
+
+    def counters(self, words: Tuple[str, ...]) -> Dict[str, float]:
+        """Increase over the run of counters whose name contains any of `words`"""
+        totals: Dict[str, float] = {}
+        for name, labels in self.snapshots[-1][1]:
+            if any(word in name for word in words) and not name.endswith(('_bucket', '_sum', '_count')):
+                display = name + (f"{{{','.join(f'{k}={v}' for k, v in labels)}}}" if labels else '')
+                totals[display] = self._increase((name, labels))
+        return totals
+
+    def gauges(self, word: str) -> Dict[str, Tuple[float, float]]:
+        """(mean, max) over all scrapes of gauges whose name contains `word`"""
+        series: Dict[str, List[float]] = {}
+        for _, samples in self.snapshots:
+            for (name, labels), value in samples.items():
+                if word in name:
+                    display = name + (f"{{{','.join(f'{k}={v}' for k, v in labels)}}}" if labels else '')
+                    series.setdefault(display, []).append(value)
+        return {display: (sum(values) / len(values), max(values)) for display, values in series.items()}
+
+    def print_summary(self, client_latency: Optional[Dict[str, LatencyStats]] = None):
+        """Proxy-side view of the run, correlated with client-side latency"""
+        print("\n📡 ZDM Proxy Metrics:")
+        if len(self.snapshots) < 2:
+            print(f"   ⚠️  Not enough scrapes of {self.url} ({len(self.snapshots)}, "
+                  f"{self.scrape_errors} failed{': ' + self.last_error if self.last_error else ''})")
+            return
+        print(f"   {len(self.snapshots)} scrapes over {self.elapsed:.0f}s from {self.url}"
+              f"{f', {self.scrape_errors} failed' if self.scrape_errors else ''}")
+        
+        histograms = self.histograms()
+        if histograms:
+            print(f"   {'Histogram':<58}{'req/s':>9}{'p50':>8}{'p95':>8}{'p99':>8}")
+            for display, summary in histograms.items():
+                print(f"   {display[:57]:<58}{summary['rate']:>9,.1f}{summary['p50']:>8.1f}"
+                      f"{summary['p95']:>8.1f}{summary['p99']:>8.1f}")
+            print("   (durations in ms)")
+        for display, (mean, peak) in self.gauges('inflight').items():
+            print(f"   In flight {display}: mean {mean:.1f}, max {peak:.0f}")
+        failures = {display: increase for display, increase in
+                    self.counters(('failed', 'timeout', 'unavailable', 'error')).items() if increase}
+        for display, increase in failures.items():
+            print(f"   ❌ {display}: +{increase:.0f}")
+        if not failures:
+            print("   ✅ No failed requests, timeouts or unavailable errors reported by the proxy")
+        
+        if not client_latency:
+            return
+        proxy = self.side_latency('proxy')
+        origin = self.side_latency('origin')
+        target = self.side_latency('target')
+        print("\n🔗 Client vs proxy latency (p50 / p99, ms):")
+        for label, stats in client_latency.items():
+            print(f"   {'Client ' + label + ':':<34} {stats.percentile(0.5):>7.1f} / {stats.percentile(0.99):.1f}")
+        for label, quantiles in (('Proxy request duration:', proxy), ('Origin (Cassandra):', origin),
+                                 ('Target (Astra DB):', target)):
+            if quantiles:
+                print(f"   {label:<34} {quantiles['p50']:>7.1f} / {quantiles['p99']:.1f}")
+        
+        # Split client p99 into: client<->proxy, proxy itself, slowest cluster behind it
+        client_p99 = max(stats.percentile(0.99) for stats in client_latency.values())
+        shares = {}
+        if proxy:
+            shares['network/driver between client and proxy'] = client_p99 - proxy['p99']
+        cluster_p99 = max([q['p99'] for q in (origin, target) if q] or [0.0])
+        if proxy and cluster_p99:
+            shares['the proxy itself'] = proxy['p99'] - cluster_p99
+        if origin:
+            shares['origin (Cassandra)'] = origin['p99']
+        if target:
+            shares['target (Astra DB)'] = target['p99']
+        if shares:
+            culprit, share = max(shares.items(), key=lambda item: item[1])
+            print(f"   → Largest share of client p99 ({client_p99:.1f}ms): {culprit} (~{max(share, 0):.1f}ms)")
+
+
 class PhaseB_ZDM_Implementation:
     """
     Phase B Zero Downtime Migration Implementation
@@ -34,20 +682,43 @@ class PhaseB_ZDM_Implementation:
     5. Error handling and recovery
     """
     
-    def __init__(self):
+    def __init__(self, write_mode: str = DUAL_SYNC, max_in_flight: int = 128,
+                 retry_log_path: Optional[str] = None, retry_drain_timeout: float = 30.0,
+                 visibility_timeout: float = 5.0, poll_interval: float = 0.01, verify_workers: int = 16,
+                 metrics_url: Optional[str] = ZDM_METRICS_URL, metrics_interval: float = 5.0):
         self.cassandra_session = None
         self.astra_session = None
         self.zdm_session = None
+        self.write_mode = write_mode
+        self.max_in_flight = max_in_flight
+        self.retry_log_path = retry_log_path
+        self.retry_drain_timeout = retry_drain_timeout
+        self.visibility_timeout = visibility_timeout
+        self.poll_interval = poll_interval
+        self.verify_workers = verify_workers
+        self.metrics_url = metrics_url
+        self.metrics_interval = metrics_interval
+        self.proxy_metrics: Optional[ProxyMetricsCollector] = None
+        self.zdm_latency = LatencyStats()
+        self.dual_writer: Optional[DualWriter] = None
+        self.lookups = {}
+        self.zdm_insert = None
         self.metrics = {
             'cassandra_writes': 0,
             'astra_writes': 0,
             'zdm_writes': 0,
             'consistency_checks': 0,
+            'consistency_polls': 0,
+            'visibility_timeouts': 0,
             'errors': 0,
             'start_time': None,
             'end_time': None
         }
         self.test_users = []
+        self.metrics_lock = threading.Lock()
+        # Write acknowledged -> row visible with the written values, per write path and cluster
+        self.visibility = {path: {'cassandra': LatencyStats(), 'astra': LatencyStats(), 'both': LatencyStats()}
+                           for path in ('direct', 'zdm')}
 
     def setup_connections(self) -> bool:
         """Establish all necessary database connections"""
@@ -66,6 +737,7 @@ class PhaseB_ZDM_Implementation:
             if not self._connect_zdm_proxy():
                 print("⚠️  ZDM Proxy connection failed - continuing with direct connections")
             
+            self._prepare_statements()
             return True
             
         except Exception as e:
@@ -163,113 +835,297 @@ class PhaseB_ZDM_Implementation:
             print(f"   ❌ ZDM Proxy connection failed: {e}")
             return False
 
-    def perform_dual_write_direct(self, user_data: Dict) -> bool:
-        """Perform dual write using direct database connections"""
-        try:
+    def _prepare_statements(self):
+        """Prepare the dual writer, lookups and the ZDM insert once connections exist"""
+        self.dual_writer = DualWriter(self.cassandra_session, self.astra_session, mode=self.write_mode,
+                                      max_in_flight=self.max_in_flight, retry_log_path=self.retry_log_path)
+        lookup = f"SELECT {', '.join(USER_COLUMNS[1:])} FROM users WHERE id = ?"
+        self.lookups = {
+            'cassandra': self.cassandra_session.prepare(lookup),
+            'astra': self.astra_session.prepare(lookup),
+        }
+        if self.zdm_session:
+            self.zdm_insert = self.zdm_session.prepare(
+                f"INSERT INTO users ({', '.join(USER_COLUMNS)}) VALUES ({', '.join('?' for _ in USER_COLUMNS)})")
+
+    def _count(self, metric: str, amount: int = 1):
+        with self.metrics_lock:
+            self.metrics[metric] += amount
+
+    def perform_dual_write_direct(self, user_data: Dict, verbose: bool = True) -> bool:
+        """Perform dual write using direct database connections (both clusters in parallel)"""
+        if verbose:
             print(f"   📝 Direct dual write for: {user_data['name']}")
-            
-            # Write to Cassandra
-            self.cassandra_session.execute("""
-                INSERT INTO users (id, name, email, gender, address)
-                VALUES (?, ?, ?, ?, ?)
-            """, (user_data['id'], user_data['name'], user_data['email'], 
-                  user_data['gender'], user_data['address']))
-            self.metrics['cassandra_writes'] += 1
-            
-            # Write to Astra DB
-            self.astra_session.execute("""
-                INSERT INTO users (id, name, email, gender, address)
-                VALUES (?, ?, ?, ?, ?)
-            """, (user_data['id'], user_data['name'], user_data['email'],
-                  user_data['gender'], user_data['address']))
-            self.metrics['astra_writes'] += 1
-            
-            print(f"   ✅ Direct dual write completed for {user_data['name']}")
-            return True
-            
-        except Exception as e:
-            print(f"   ❌ Direct dual write failed: {e}")
-            self.metrics['errors'] += 1
+        result = self.dual_writer.write(tuple(user_data[column] for column in USER_COLUMNS))
+        if result.origin_error or result.target_error:
+            print(f"   ❌ Direct dual write failed for {user_data['name']}: "
+                  f"origin={result.origin_error}, target={result.target_error}")
+            self._count('errors')
             return False
+        
+        if verbose:
+            print(f"   ✅ Direct dual write completed for {user_data['name']} in {result.latency_ms:.1f}ms")
+        return True
 
-    def perform_zdm_write(self, user_data: Dict) -> bool:
+    def perform_zdm_write(self, user_data: Dict, verbose: bool = True) -> bool:
         """Perform write through ZDM proxy (transparent dual write)"""
         if not self.zdm_session:
             print("   ⚠️  ZDM Proxy not available - skipping ZDM write")
             return False
             
         try:
-            print(f"   📝 ZDM proxy write for: {user_data['name']}")
+            if verbose:
+                print(f"   📝 ZDM proxy write for: {user_data['name']}")
             
             # Single write through ZDM proxy (automatically dual writes)
-            self.zdm_session.execute("""
-                INSERT INTO users (id, name, email, gender, address)
-                VALUES (?, ?, ?, ?, ?)
-            """, (user_data['id'], user_data['name'], user_data['email'],
-                  user_data['gender'], user_data['address']))
-            self.metrics['zdm_writes'] += 1
+            started = time.perf_counter()
+            self.zdm_session.execute(self.zdm_insert, tuple(user_data[column] for column in USER_COLUMNS))
+            self.zdm_latency.record((time.perf_counter() - started) * 1000)
+            self._count('zdm_writes')
             
-            print(f"   ✅ ZDM proxy write completed for {user_data['name']}")
+            if verbose:
+                print(f"   ✅ ZDM proxy write completed for {user_data['name']}")
             return True
             
         except Exception as e:
-            print(f"   ❌ ZDM proxy write failed: {e}")
-            self.metrics['errors'] += 1
+            print(f"   ❌ ZDM proxy write failed for {user_data['name']}: {e}")
+            self._count('errors')
             return False
 
-    def verify_data_consistency(self, user_id: uuid.UUID) -> Dict[str, bool]:
-        """Verify data exists and matches in both databases"""
-        consistency_results = {
-            'cassandra_exists': False,
-            'astra_exists': False,
-            'data_matches': False
-        }
+    def wait_until_visible(self, user_data: Dict, path: str) -> Dict:
+        """
+        Poll both clusters every `poll_interval` seconds until the row reads back
+        with the written values on each (or `visibility_timeout` passes).
+
+        Called right after the write is acknowledged; the time until each
+        cluster returns the row is recorded as write-to-visible latency for
+        `path` ('direct' or 'zdm'). Both clusters are read in parallel on every
+        poll, and a cluster is no longer polled once the row is visible there.
+        """
+        expected = {column: user_data[column] for column in USER_COLUMNS[1:]}
+        sessions = {'cassandra': self.cassandra_session, 'astra': self.astra_session}
+        visible_ms: Dict[str, Optional[float]] = {name: None for name in sessions}
+        rows = {name: None for name in sessions}
+        acked = time.perf_counter()
+        deadline = acked + self.visibility_timeout
+        polls = 0
+        while True:
+            waiting = [name for name, ms in visible_ms.items() if ms is None]
+            futures = {name: sessions[name].execute_async(self.lookups[name], (user_data['id'],))
+                       for name in waiting}
+            polls += 1
+            for name, future in futures.items():
+                try:
+                    rows[name] = future.result().one()
+                except Exception as e:
+                    print(f"   ⚠️  Visibility poll on {name} failed: {e}")
+                    continue
+                row = rows[name]
+                if row is not None and all(getattr(row, column) == value for column, value in expected.items()):
+                    visible_ms[name] = (time.perf_counter() - acked) * 1000
+            if all(ms is not None for ms in visible_ms.values()) or time.perf_counter() >= deadline:
+                break
+            time.sleep(self.poll_interval)
         
-        try:
-            # Check Cassandra
-            cassandra_result = self.cassandra_session.execute(
-                "SELECT name, email, gender, address FROM users WHERE id = ?", (user_id,)
-            )
-            cassandra_row = cassandra_result.one()
-            consistency_results['cassandra_exists'] = cassandra_row is not None
-            
-            # Check Astra
-            astra_result = self.astra_session.execute(
-                "SELECT name, email, gender, address FROM users WHERE id = ?", (user_id,)
-            )
-            astra_row = astra_result.one()
-            consistency_results['astra_exists'] = astra_row is not None
-            
-            # Compare data
-            if cassandra_row and astra_row:
-                consistency_results['data_matches'] = (
-                    cassandra_row.name == astra_row.name and
-                    cassandra_row.email == astra_row.email and
-                    cassandra_row.gender == astra_row.gender and
-                    cassandra_row.address == astra_row.address
-                )
-            
+        with self.metrics_lock:
             self.metrics['consistency_checks'] += 1
-            return consistency_results
-            
-        except Exception as e:
-            print(f"   ❌ Consistency check failed: {e}")
-            self.metrics['errors'] += 1
-            return consistency_results
+            self.metrics['consistency_polls'] += polls
+            if any(ms is None for ms in visible_ms.values()):
+                self.metrics['visibility_timeouts'] += 1
+        for name, ms in visible_ms.items():
+            if ms is not None:
+                self.visibility[path][name].record(ms)
+        if all(ms is not None for ms in visible_ms.values()):
+            self.visibility[path]['both'].record(max(visible_ms.values()))
+        
+        return {
+            'cassandra_exists': rows['cassandra'] is not None,
+            'astra_exists': rows['astra'] is not None,
+            'data_matches': all(ms is not None for ms in visible_ms.values()),
+            'visible_ms': visible_ms,
+        }
+
+    def _write_and_verify(self, path: str, user: Dict) -> Tuple[bool, Optional[Dict]]:
+        """Write one user through `path` and poll until it is visible on both clusters"""
+        if path == 'direct':
+            written = self.perform_dual_write_direct(user, verbose=False)
+        else:
+            written = self.perform_zdm_write(user, verbose=False)
+        if not written:
+            return False, None
+        return True, self.wait_until_visible(user, path)
+
+    def start_proxy_metrics(self):
+        """Scrape the ZDM proxy's metrics for the rest of the run when reachable"""
+        if not self.metrics_url or not self.zdm_session:
+            return
+        collector = ProxyMetricsCollector(self.metrics_url, self.metrics_interval)
+        if collector.start():
+            self.proxy_metrics = collector
+            print(f"📡 Scraping ZDM proxy metrics from {self.metrics_url} every {self.metrics_interval:.0f}s")
+        else:
+            print(f"⚠️  ZDM proxy metrics not reachable at {self.metrics_url} ({collector.last_error}) - "
+                  f"client-side latency only")
+
+    def report_proxy_metrics(self, client_latency: Dict[str, LatencyStats]):
+        if not self.proxy_metrics:
+            return
+        self.proxy_metrics.stop()
+        self.proxy_metrics.print_summary({label: stats for label, stats in client_latency.items() if stats.count})
+
+    @staticmethod
+    def make_test_user(i: int) -> Dict:
+        return {
+            'id': uuid.uuid4(),
+            'name': f'Phase B User {i+1}',
+            'email': f'phaseb-user{i+1}@example.co.uk',
+            'gender': ['Male', 'Female', 'Other'][i % 3],
+            'address': f'{i+1} ZDM Demo Street, Phase B City, PB{i+1} 1ZB'
+        }
 
     def generate_test_users(self, count: int = 5) -> List[Dict]:
         """Generate test user data for Phase B demonstration"""
-        users = []
-        for i in range(count):
-            user = {
-                'id': uuid.uuid4(),
-                'name': f'Phase B User {i+1}',
-                'email': f'phaseb-user{i+1}@example.co.uk',
-                'gender': ['Male', 'Female', 'Other'][i % 3],
-                'address': f'{i+1} ZDM Demo Street, Phase B City, PB{i+1} 1ZB'
-            }
-            users.append(user)
-        return users
+        return [self.make_test_user(i) for i in range(count)]
+
+    def drive_path(self, path: str, concurrency: int, users: int, duration: float) -> LoadResult:
+        """
+        Write `users` new users (or until `duration` seconds pass) through one
+        path with `concurrency` writes in flight: 'direct' uses the dual writer,
+        'zdm' sends single inserts through the proxy. Latency is per write,
+        from issue to acknowledgement.
+        """
+        result = LoadResult(path, concurrency)
+        slots = threading.BoundedSemaphore(concurrency)
+        lock = threading.Lock()
+        
+        def done(latency_ms: float, error: Optional[Exception]):
+            result.latency.record(latency_ms)
+            with lock:
+                if error is None:
+                    result.ok += 1
+                else:
+                    result.errors += 1
+                    result.last_error = str(error)
+            slots.release()
+        
+        started = time.perf_counter()
+        deadline = started + duration if duration else None
+        issued = 0
+        while (not users or issued < users) and (deadline is None or time.perf_counter() < deadline):
+            slots.acquire()
+            user = self.make_test_user(issued)
+            values = tuple(user[column] for column in USER_COLUMNS)
+            issued += 1
+            if path == 'direct':
+                self.dual_writer.write_async(
+                    values, callback=lambda r: done(r.latency_ms, r.origin_error or r.target_error))
+                continue
+            sent = time.perf_counter()
+            try:
+                future = self.zdm_session.execute_async(self.zdm_insert, values)
+            except Exception as e:
+                done(0.0, e)
+                continue
+            future.add_callbacks(
+                lambda _, sent=sent: done((time.perf_counter() - sent) * 1000, None),
+                lambda e, sent=sent: done((time.perf_counter() - sent) * 1000, e))
+        for _ in range(concurrency):
+            slots.acquire()
+        result.seconds = time.perf_counter() - started
+        return result
+
+    def run_load_test(self, concurrency_levels: List[int], users: int, duration: float) -> bool:
+        """
+        Drive the direct dual-write path and the ZDM proxy path in parallel at
+        each concurrency level and compare throughput, latency and errors.
+
+        Throughput that stops growing as concurrency rises marks the ceiling
+        of that path for the current cluster and proxy pod sizes.
+        """
+        print("🚀 Starting Phase B load run")
+        print("="*80)
+        self.metrics['start_time'] = datetime.now()
+        if not self.setup_connections():
+            print("❌ Cannot proceed - connection setup failed")
+            return False
+        paths = ['direct'] + (['zdm'] if self.zdm_session else [])
+        if not self.zdm_session:
+            print("⚠️  ZDM Proxy not available - load run covers the direct dual-write path only")
+        limit = f"{users:,} users" if users else "no user limit"
+        limit += f", {duration:.0f}s" if duration else ""
+        print(f"\n📊 Paths: {', '.join(paths)}; concurrency {', '.join(map(str, concurrency_levels))}; "
+              f"{limit} per path and level")
+        
+        self.start_proxy_metrics()
+        results: List[LoadResult] = []
+        for level in concurrency_levels:
+            print(f"\n🔄 Concurrency {level}...")
+            with concurrent.futures.ThreadPoolExecutor(max_workers=len(paths)) as pool:
+                futures = [pool.submit(self.drive_path, path, level, users, duration) for path in paths]
+                level_results = [future.result() for future in futures]
+            for result in level_results:
+                print(f"   {result.path:<7} {result.ok:,} writes in {result.seconds:.1f}s = "
+                      f"{result.throughput:,.0f}/s, p99 {result.latency.percentile(0.99):.1f}ms, "
+                      f"{result.errors} errors")
+            results.extend(level_results)
+            self._count('zdm_writes', sum(r.ok for r in level_results if r.path == 'zdm'))
+        
+        self.metrics['end_time'] = datetime.now()
+        self.dual_writer.drain()
+        self.print_load_report(results, paths)
+        zdm_latency = LatencyStats()
+        for result in results:
+            if result.path == 'zdm':
+                zdm_latency.samples.extend(result.latency.samples)
+        self.report_proxy_metrics({'ZDM writes': zdm_latency})
+        self.dual_writer.close()
+        return all(result.error_rate < 0.01 for result in results)
+
+    def print_load_report(self, results: List[LoadResult], paths: List[str]):
+        """Comparative throughput/latency/error table and per-path ceiling"""
+        labels = {'direct': 'Direct dual write', 'zdm': 'ZDM proxy'}
+        print("\n" + "="*80)
+        print("📊 PHASE B LOAD RUN - DIRECT DUAL WRITE vs ZDM PROXY")
+        print("="*80)
+        print(f"{'Conc':>6}  {'Path':<18}{'Writes':>9}{'Errors':>8}{'Writes/s':>10}"
+              f"{'p50':>8}{'p95':>8}{'p99':>8}{'max':>9}")
+        for result in results:
+            latency = result.latency
+            print(f"{result.concurrency:>6}  {labels[result.path]:<18}{result.ok:>9,}{result.errors:>8,}"
+                  f"{result.throughput:>10,.0f}{latency.percentile(0.5):>8.1f}{latency.percentile(0.95):>8.1f}"
+                  f"{latency.percentile(0.99):>8.1f}{latency.percentile(1.0):>9.1f}")
+        print("   (latencies in ms)")
+        
+        if 'zdm' in paths:
+            print("\n⚖️  ZDM proxy relative to direct dual write:")
+            by_level: Dict[int, Dict[str, LoadResult]] = {}
+            for result in results:
+                by_level.setdefault(result.concurrency, {})[result.path] = result
+            for level, pair in by_level.items():
+                direct, zdm = pair['direct'], pair['zdm']
+                ratio = zdm.throughput / direct.throughput if direct.throughput else 0.0
+                delta = zdm.latency.percentile(0.99) - direct.latency.percentile(0.99)
+                print(f"   Concurrency {level}: {ratio:.2f}x throughput, p99 {delta:+.1f}ms")
+        
+        print("\n📈 Throughput ceiling:")
+        for path in paths:
+            series = [result for result in results if result.path == path]
+            best = max(series, key=lambda r: r.throughput)
+            # First level where more concurrency bought less than 10% more throughput
+            flat = next((current for previous, current in zip(series, series[1:])
+                         if current.throughput < previous.throughput * 1.1), None)
+            note = (f", flat from concurrency {flat.concurrency} (more in flight only adds latency)"
+                    if flat else ", still rising - try higher concurrency")
+            print(f"   {labels[path]}: {best.throughput:,.0f} writes/s at concurrency {best.concurrency}"
+                  f"{note if len(series) > 1 else ''}")
+            errors = [result for result in series if result.errors]
+            if errors:
+                print(f"      ⚠️  Errors at concurrency {', '.join(str(r.concurrency) for r in errors)}: "
+                      f"{errors[-1].last_error}")
+        
+        print("\n⚡ Direct Dual Write Engine (all levels):")
+        self.dual_writer.print_summary()
+        print("="*80)
 
     def run_phase_b_demonstration(self) -> bool:
         """Run comprehensive Phase B dual write demonstration"""
@@ -294,54 +1150,61 @@ class PhaseB_ZDM_Implementation:
         print("📝 DUAL WRITE DEMONSTRATIONS")
         print("="*50)
         
-        for i, user in enumerate(self.test_users[:3]):  # First 3 users for direct dual write
-            print(f"\n🔄 Test {i+1}/3: Direct Dual Write")
-            print(f"   User: {user['name']} ({user['email']})")
-            
-            if self.perform_dual_write_direct(user):
-                # Verify consistency
-                time.sleep(1)  # Allow for propagation
-                consistency = self.verify_data_consistency(user['id'])
-                
-                if consistency['cassandra_exists'] and consistency['astra_exists']:
-                    if consistency['data_matches']:
-                        print(f"   ✅ Data consistency verified")
-                        success_count += 1
-                    else:
-                        print(f"   ⚠️  Data exists but doesn't match")
-                else:
-                    print(f"   ❌ Data missing: Cassandra={consistency['cassandra_exists']}, Astra={consistency['astra_exists']}")
-        
-        # ZDM proxy demonstrations
+        # First 3 users for direct dual write, the rest through the ZDM proxy
+        tasks = [('direct', user) for user in self.test_users[:3]]
         if self.zdm_session:
-            print(f"\n🔄 ZDM Proxy Demonstrations")
-            for i, user in enumerate(self.test_users[3:]):  # Remaining users for ZDM
-                print(f"\n🔄 Test {i+4}/{len(self.test_users)}: ZDM Proxy Write")
-                print(f"   User: {user['name']} ({user['email']})")
-                
-                if self.perform_zdm_write(user):
-                    # Verify consistency
-                    time.sleep(2)  # Allow more time for ZDM propagation
-                    consistency = self.verify_data_consistency(user['id'])
-                    
-                    if consistency['cassandra_exists'] and consistency['astra_exists']:
-                        if consistency['data_matches']:
-                            print(f"   ✅ ZDM dual write consistency verified")
-                            success_count += 1
-                        else:
-                            print(f"   ⚠️  ZDM write completed but data doesn't match")
-                    else:
-                        print(f"   ❌ ZDM dual write incomplete: Cassandra={consistency['cassandra_exists']}, Astra={consistency['astra_exists']}")
+            tasks += [('zdm', user) for user in self.test_users[3:]]
+        self.start_proxy_metrics()
+        print(f"\n🔄 Writing {len(tasks)} users and polling until visible on both clusters "
+              f"(every {self.poll_interval * 1000:.0f}ms, timeout {self.visibility_timeout:.0f}s)")
+        
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.verify_workers) as pool:
+            futures = {pool.submit(self._write_and_verify, path, user): (path, user) for path, user in tasks}
+            for future in concurrent.futures.as_completed(futures):
+                path, user = futures[future]
+                label = 'Direct dual write' if path == 'direct' else 'ZDM proxy write'
+                try:
+                    written, consistency = future.result()
+                except Exception as e:
+                    print(f"   ❌ {label} check failed for {user['name']}: {e}")
+                    self._count('errors')
+                    continue
+                if not written:
+                    continue
+                visible = consistency['visible_ms']
+                if consistency['data_matches']:
+                    print(f"   ✅ {label} visible for {user['name']}: Cassandra {visible['cassandra']:.0f}ms, "
+                          f"Astra DB {visible['astra']:.0f}ms after ack")
+                    success_count += 1
+                elif consistency['cassandra_exists'] and consistency['astra_exists']:
+                    print(f"   ⚠️  {label} for {user['name']}: data exists but doesn't match "
+                          f"after {self.visibility_timeout:.0f}s")
+                else:
+                    print(f"   ❌ {label} for {user['name']} not visible after {self.visibility_timeout:.0f}s: "
+                          f"Cassandra={consistency['cassandra_exists']}, Astra={consistency['astra_exists']}")
         
         self.metrics['end_time'] = datetime.now()
         
         # Print comprehensive results
         self.print_phase_b_summary()
+        self.report_proxy_metrics({'ZDM writes': self.zdm_latency})
+        self.dual_writer.close()
         
         return success_count >= len(self.test_users) * 0.8  # 80% success rate
 
     def print_phase_b_summary(self):
         """Print comprehensive Phase B implementation summary"""
+        if self.dual_writer:
+            # Background target legs (DUAL_ASYNC_ON_SECONDARY) count once they finish
+            self.dual_writer.drain()
+            self.metrics['cassandra_writes'] = self.dual_writer.sides['origin'].writes
+            self.metrics['astra_writes'] = self.dual_writer.sides['target'].writes
+            if self.write_mode == DUAL_ASYNC_ON_SECONDARY:
+                # Target failures surface only after perform_dual_write_direct returned
+                self.metrics['errors'] += self.dual_writer.sides['target'].failures
+            if self.dual_writer.retry_log and not self.dual_writer.retry_log.wait_empty(self.retry_drain_timeout):
+                print(f"⚠️  {self.dual_writer.retry_log.depth} failed target writes still queued - "
+                      f"they are replayed on the next run")
         duration = (self.metrics['end_time'] - self.metrics['start_time']).total_seconds()
         
         print("\n" + "="*80)
@@ -359,11 +1222,27 @@ class PhaseB_ZDM_Implementation:
         print(f"   Total Write Operations:  {self.metrics['cassandra_writes'] + self.metrics['astra_writes'] + self.metrics['zdm_writes']}")
         print()
         
+        if self.dual_writer:
+            print("⚡ Direct Dual Write Engine:")
+            self.dual_writer.print_summary()
+            print()
+        
         print("🔍 Consistency Verification:")
         print(f"   Consistency Checks:      {self.metrics['consistency_checks']}")
+        print(f"   Visibility Polls:        {self.metrics['consistency_polls']}")
+        print(f"   Not Visible in Time:     {self.metrics['visibility_timeouts']}")
         print(f"   Errors Encountered:      {self.metrics['errors']}")
         print()
         
+        print("⏳ Write-to-Visible Latency (after ack):")
+        for path, label in (('direct', 'Direct dual write'), ('zdm', 'ZDM proxy')):
+            if not any(stats.count for stats in self.visibility[path].values()):
+                continue
+            print(f"   {label}:")
+            for cluster, name in (('cassandra', 'Cassandra'), ('astra', 'Astra DB'), ('both', 'Both')):
+                print(f"      {name + ':':<22} {self.visibility[path][cluster].summary()}")
+        print()
+        
         # Connection status
         print("🔗 Connection Status:")
         print(f"   Cassandra (Origin):      {'✅ Connected' if self.cassandra_session else '❌ Failed'}")
@@ -407,23 +1286,67 @@ class PhaseB_ZDM_Implementation:
     def get_zdm_proxy_metrics(self) -> Optional[Dict]:
         """Fetch ZDM proxy metrics if available"""
         try:
-            response = requests.get("http://localhost:30044/metrics", timeout=5)
+            response = requests.get(self.metrics_url or ZDM_METRICS_URL, timeout=5)
             if response.status_code == 200:
-                return {"status": "available", "raw_metrics": response.text}
+                return {"status": "available", "raw_metrics": response.text,
+                        "samples": parse_prometheus(response.text)}
         except:
             pass
         return None
 
 def main():
     """Main execution function"""
+    parser = argparse.ArgumentParser(description='Phase B dual write demonstration')
+    parser.add_argument('--write-mode', choices=WRITE_MODES, default=DUAL_SYNC,
+                        help='Direct dual writes wait for both clusters, or only for Cassandra (default DUAL_SYNC)')
+    parser.add_argument('--max-in-flight', type=int, default=128,
+                        help='Outstanding direct dual writes, background target legs included')
+    parser.add_argument('--retry-log', default='dual-write-retry.ndjson',
+                        help='Durable log of failed Astra DB writes, replayed in the background ("" disables)')
+    parser.add_argument('--retry-drain-timeout', type=float, default=30.0,
+                        help='Seconds to wait for queued retries before the summary')
+    parser.add_argument('--visibility-timeout', type=float, default=5.0,
+                        help='Seconds to poll for a written row before reporting it missing')
+    parser.add_argument('--poll-interval', type=float, default=0.01,
+                        help='Seconds between visibility polls')
+    parser.add_argument('--verify-workers', type=int, default=16,
+                        help='Users written and polled concurrently')
+    parser.add_argument('--metrics-url', default=ZDM_METRICS_URL,
+                        help='ZDM proxy Prometheus endpoint scraped during runs ("" disables)')
+    parser.add_argument('--metrics-interval', type=float, default=5.0,
+                        help='Seconds between ZDM proxy metric scrapes')
+    parser.add_argument('--load', action='store_true',
+                        help='Run a load test of the direct and ZDM paths instead of the demonstration')
+    parser.add_argument('--users', type=int, default=10000,
+                        help='Load run: users written per path and concurrency level (0 = no limit)')
+    parser.add_argument('--concurrency', default='32',
+                        help='Load run: writes in flight per path; a comma list (e.g. 8,32,128) sweeps levels')
+    parser.add_argument('--duration', type=float, default=0,
+                        help='Load run: seconds per concurrency level (0 = until --users are written)')
+    args = parser.parse_args()
+    concurrency_levels = [int(level) for level in args.concurrency.split(',') if level.strip()]
+    if args.load and not args.users and not args.duration:
+        parser.error('--load needs --users or --duration')
+    
     print("🎯 Phase B Zero Downtime Migration Implementation")
     print("   Demonstrating dual write capabilities with ZDM proxy")
     print()
     
-    phase_b = PhaseB_ZDM_Implementation()
+    # The dual writer must not cap the load run below its concurrency
+    max_in_flight = max([args.max_in_flight] + (concurrency_levels if args.load else []))
+    phase_b = PhaseB_ZDM_Implementation(write_mode=args.write_mode, max_in_flight=max_in_flight,
+                                        retry_log_path=args.retry_log or None,
+                                        retry_drain_timeout=args.retry_drain_timeout,
+                                        visibility_timeout=args.visibility_timeout,
+                                        poll_interval=args.poll_interval, verify_workers=args.verify_workers,
+                                        metrics_url=args.metrics_url or None,
+                                        metrics_interval=args.metrics_interval)
     
     try:
-        success = phase_b.run_phase_b_demonstration()
+        if args.load:
+            success = phase_b.run_load_test(concurrency_levels, args.users, args.duration)
+        else:
+            success = phase_b.run_phase_b_demonstration()
         
         # Optional: Display ZDM metrics if available
         metrics = phase_b.get_zdm_proxy_metrics()
@@ -0,0 +1,1221 @@
+#!/usr/bin/env python3
+"""
+In-process stand-in for a Cassandra / Astra DB cluster (cassandra-driver API subset)
+
+`CQL_BACKEND=fake` makes python-api/main.py, the data generator, sync-data.py
+and the consistency validator use `FakeCluster` instead of the driver's
+`Cluster`, so they run and can be benchmarked without a cluster, secure
+connect bundle or ZDM proxy. Sessions support `execute`, `execute_async`,
+`prepare` (statements work in driver `BatchStatement`s), paging with
+`fetch_size`, `token()` range queries, `WRITETIME()`/`TTL()` selectors and
+`USING TIMESTAMP` last-write-wins. Requests complete on a scheduler thread
+after an injected latency, like the driver's event loop, so client-side
+concurrency behaves as against a real cluster.
+
+Settings (environment), either one value for every cluster or per cluster as
+`name=value;name=value;default=value`. A cluster is named after its first
+contact point, or `astra` when created with a secure connect bundle:
+- FAKE_CQL_LATENCY: ms per request - `2`, `fixed:2`, `uniform:1,5`, `normal:3,1`,
+  `lognormal:2,0.5` (median, sigma) or `exp:2` (mean); default 0
+- FAKE_CQL_FAILURE_RATE: fraction of reads/writes failing with OperationTimedOut
+- FAKE_CQL_CONCURRENCY: requests served at once (0 = unlimited); the rest queue,
+  which caps throughput at concurrency / mean latency
+- FAKE_CQL_ROWS: demo.users rows loaded at start (the table always exists); the same
+  rows on every cluster
+- FAKE_CQL_DIVERGENCE: fraction of those rows missing or changed on a cluster
+- FAKE_CQL_SEED: seed for data, latency and failures (default 42)
+
+Not modelled: replication, consistency levels, TTL expiry, clustering order
+other than ascending, collection updates and lightweight transactions other
+than `INSERT ... IF NOT EXISTS`.
+"""
+
+import bisect
+import heapq
+import itertools
+import math
+import os
+import random
+import re
+import threading
+import time
+import uuid
+import zlib
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from cassandra import InvalidRequest, OperationTimedOut
+from cassandra.cqltypes import _cqltypes as CQL_TYPES
+from cassandra.metadata import Murmur3Token
+from cassandra.query import UNSET_VALUE, BoundStatement, PreparedStatement, named_tuple_factory
+
+MURMUR3_PARTITIONER = 'org.apache.cassandra.dht.Murmur3Partitioner'
+SYSTEM_KEYSPACES = ('system', 'system_schema', 'system_auth', 'system_distributed', 'system_traces',
+                    'system_views', 'system_virtual_schema')
+DEFAULT_FETCH_SIZE = 5000
+SEED_WRITETIME = 1_700_000_000_000_000
+
+
+def cluster_setting(variable: str, name: str, default: str) -> str:
+    """Value of a FAKE_CQL_* variable for cluster `name` ('a=1;default=2' or a plain value)"""
+    raw = os.getenv(variable, '').strip()
+    if not raw:
+        return default
+    if '=' not in raw:
+        return raw
+    entries = dict(entry.strip().split('=', 1) for entry in raw.split(';') if '=' in entry)
+    return entries.get(name, entries.get('default', default)).strip()
+
+
+def latency_model(spec: str) -> Callable[[random.Random], float]:
+    """Sampler of request latency in seconds from a FAKE_CQL_LATENCY spec (ms)"""
+    kind, _, args = spec.partition(':')
+    if not args:
+        kind, args = 'fixed', kind
+    params = [float(value) for value in args.split(',') if value.strip()]
+    models = {
+        'fixed': lambda rng: params[0],
+        'uniform': lambda rng: rng.uniform(params[0], params[1]),
+        'normal': lambda rng: max(0.0, rng.gauss(params[0], params[1])),
+        'lognormal': lambda rng: rng.lognormvariate(math.log(params[0]), params[1]) if params[0] > 0 else 0.0,
+        'exp': lambda rng: rng.expovariate(1 / params[0]) if params[0] > 0 else 0.0,
+    }
+    if kind not in models:
+        raise ValueError(f"Unknown latency distribution '{kind}' (expected {', '.join(models)})")
+    sample = models[kind]
+    return lambda rng: sample(rng) / 1000.0
+
+
+# ---------------------------------------------------------------------------
+# Schema and storage
+# ---------------------------------------------------------------------------
+
+class FakeColumn:
+    def __init__(self, name: str, cql_type: str):
+        self.name = name
+        self.cql_type = cql_type
+
+
+def serialize_key(columns: List[FakeColumn], values: Tuple) -> bytes:
+    """Partition key bytes as Cassandra serializes them (composite for several columns)"""
+    parts = []
+    for column, value in zip(columns, values):
+        cql_class = CQL_TYPES.get(column.cql_type)
+        try:
+            parts.append(cql_class.serialize(value, 4) if cql_class else repr(value).encode())
+        except Exception as e:
+            raise InvalidRequest(f"Invalid value {value!r} for {column.name} ({column.cql_type}): {e}")
+    if len(parts) == 1:
+        return parts[0]
+    return b''.join(len(part).to_bytes(2, 'big') + part + b'\x00' for part in parts)
+
+
+class _Row:
+    __slots__ = ('marker', 'cells')
+
+    def __init__(self):
+        self.marker: Optional[int] = None  # writetime of the INSERT row marker
+        self.cells: Dict[str, Tuple[Any, int, Optional[int]]] = {}  # column -> (value, writetime, ttl)
+
+
+class FakeTable:
+    """A table's metadata (shaped like the driver's TableMetadata) and its rows in token order"""
+
+    def __init__(self, keyspace: str, name: str, columns: List[FakeColumn], partition_key: List[str],
+                 clustering_key: List[str]):
+        self.keyspace_name = keyspace
+        self.name = name
+        by_name = {column.name: column for column in columns}
+        regular = sorted(c for c in by_name if c not in partition_key and c not in clustering_key)
+        # Same column order as Cassandra: partition key, clustering key, then regular columns by name
+        self.columns = OrderedDict((c, by_name[c]) for c in partition_key + clustering_key + regular)
+        self.partition_key = [by_name[c] for c in partition_key]
+        self.clustering_key = [by_name[c] for c in clustering_key]
+        self.partitions: Dict[tuple, Dict[tuple, _Row]] = {}
+        self.tombstones: Dict[tuple, int] = {}  # (partition key, clustering key) -> deletion writetime
+        self.ring: List[Tuple[int, tuple]] = []  # sorted (token, partition key)
+
+    @property
+    def primary_key(self) -> List[FakeColumn]:
+        return self.partition_key + self.clustering_key
+
+    def token(self, partition_key: tuple) -> int:
+        return Murmur3Token.from_key(serialize_key(self.partition_key, partition_key)).value
+
+    def _row(self, partition_key: tuple, clustering_key: tuple) -> _Row:
+        partition = self.partitions.get(partition_key)
+        if partition is None:
+            partition = self.partitions[partition_key] = {}
+            bisect.insort(self.ring, (self.token(partition_key), partition_key))
+        row = partition.get(clustering_key)
+        if row is None:
+            row = partition[clustering_key] = _Row()
+        return row
+
+    def write(self, partition_key: tuple, clustering_key: tuple, cells: Dict[str, Any], writetime: int,
+              ttl: Optional[int], marker: bool):
+        """Upsert cells; a cell older than the stored one or than a row deletion is ignored"""
+        if ttl is UNSET_VALUE:
+            ttl = None
+        deleted_at = self.tombstones.get((partition_key, clustering_key), -1)
+        if writetime <= deleted_at:
+            return
+        row = self._row(partition_key, clustering_key)
+        if marker and (row.marker is None or writetime >= row.marker):
+            row.marker = writetime
+        for column, value in cells.items():
+            if value is UNSET_VALUE:
+                continue
+            current = row.cells.get(column)
+            if current is not None and current[1] > writetime:
+                continue
+            if value is None:
+                row.cells.pop(column, None)
+            else:
+                row.cells[column] = (value, writetime, ttl or None)
+        self._drop_if_empty(partition_key, clustering_key)
+
+    def delete(self, partition_key: tuple, clustering_key: Optional[tuple], columns: Optional[List[str]],
+               writetime: int):
+        """Delete a row, a whole partition (clustering_key None) or some columns, up to `writetime`"""
+        partition = self.partitions.get(partition_key, {})
+        keys = [clustering_key] if clustering_key is not None else list(partition) or [()]
+        for key in keys:
+            row = partition.get(key)
+            if columns is None:
+                self.tombstones[(partition_key, key)] = max(writetime, self.tombstones.get((partition_key, key), -1))
+            if row is None:
+                continue
+            for column in list(columns if columns is not None else row.cells):
+                cell = row.cells.get(column)
+                if cell is not None and cell[1] <= writetime:
+                    del row.cells[column]
+            if columns is None and row.marker is not None and row.marker <= writetime:
+                row.marker = None
+            self._drop_if_empty(partition_key, key)
+
+    def _drop_if_empty(self, partition_key: tuple, clustering_key: tuple):
+        partition = self.partitions.get(partition_key)
+        row = partition.get(clustering_key) if partition else None
+        if row is None or row.marker is not None or row.cells:
+            return
+        del partition[clustering_key]
+        if not partition:
+            del self.partitions[partition_key]
+            index = bisect.bisect_left(self.ring, (self.token(partition_key), partition_key))
+            del self.ring[index]
+
+    def scan(self, token_low: Optional[Tuple[int, bool]] = None, token_high: Optional[Tuple[int, bool]] = None,
+             partition_keys: Optional[List[tuple]] = None):
+        """(partition key, clustering key, row) in token then clustering order"""
+        if partition_keys is not None:
+            keys = sorted(((self.token(key), key) for key in partition_keys if key in self.partitions))
+        else:
+            start, end = 0, len(self.ring)
+            if token_low is not None:
+                value, inclusive = token_low
+                start = bisect.bisect_left(self.ring, (value if inclusive else value + 1,))
+            if token_high is not None:
+                value, inclusive = token_high
+                end = bisect.bisect_left(self.ring, (value + 1 if inclusive else value,))
+            keys = self.ring[start:end]
+        for _, partition_key in keys:
+            partition = self.partitions.get(partition_key, {})
+            for clustering_key in sorted(partition):
+                yield partition_key, clustering_key, partition[clustering_key]
+
+
+class FakeKeyspace:
+    def __init__(self, name: str):
+        self.name = name
+        self.tables: Dict[str, FakeTable] = {}
+        self.user_types: Dict = {}
+
+
+class FakeStore:
+    """All keyspaces of one named cluster; shared by every FakeCluster with that name"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.keyspaces: Dict[str, FakeKeyspace] = {'demo': FakeKeyspace('demo')}
+        self.lock = threading.RLock()
+        seed = int(os.getenv('FAKE_CQL_SEED', '42'))
+        self.rng = random.Random(seed ^ zlib.crc32(name.encode()))
+        self.latency = latency_model(cluster_setting('FAKE_CQL_LATENCY', name, '0'))
+        self.failure_rate = float(cluster_setting('FAKE_CQL_FAILURE_RATE', name, '0'))
+        concurrency = int(cluster_setting('FAKE_CQL_CONCURRENCY', name, '0'))
+        self.servers = [0.0] * concurrency  # heap of times each server is next free
+        self.requests = self.failures = 0
+        self._seed_users(int(cluster_setting('FAKE_CQL_ROWS', name, '0')), seed,
+                         float(cluster_setting('FAKE_CQL_DIVERGENCE', name, '0')))
+
+    def _seed_users(self, rows: int, seed: int, divergence: float):
+        columns = [FakeColumn('id', 'uuid')] + [FakeColumn(c, 'text') for c in ('name', 'email', 'gender', 'address')]
+        table = self.keyspaces['demo'].tables['users'] = FakeTable('demo', 'users', columns, ['id'], [])
+        data = random.Random(seed)  # same rows on every cluster
+        for i in range(rows):
+            user_id = uuid.UUID(int=data.getrandbits(128), version=4)
+            cells = {
+                'name': f"Fake User {i}",
+                'email': f"fake.user{i}@example.co.uk",
+                'gender': data.choice(['Male', 'Female', 'Non-binary', 'Prefer not to say']),
+                'address': f"{i} Stand-in Street, Testford",
+            }
+            if divergence and self.rng.random() < divergence:
+                if self.rng.random() < 0.5:
+                    continue
+                cells['email'] = f"diverged.{cells['email']}"
+            table.write((user_id,), (), cells, SEED_WRITETIME + i, None, marker=True)
+
+    def table(self, keyspace: str, name: str) -> FakeTable:
+        space = self.keyspaces.get(keyspace)
+        if space is None:
+            raise InvalidRequest(f"Keyspace {keyspace} does not exist")
+        table = space.tables.get(name)
+        if table is None:
+            raise InvalidRequest(f"unconfigured table {name}")
+        return table
+
+    def schedule(self, now: float, mutation_or_read: bool) -> Tuple[float, bool]:
+        """Completion time of a request issued at `now` and whether it fails"""
+        with self.lock:
+            self.requests += 1
+            latency = self.latency(self.rng)
+            failed = mutation_or_read and self.failure_rate > 0 and self.rng.random() < self.failure_rate
+            if failed:
+                self.failures += 1
+            if not self.servers:
+                return now + latency, failed
+            start = max(now, heapq.heappop(self.servers))
+            heapq.heappush(self.servers, start + latency)
+            return start + latency, failed
+
+
+_stores: Dict[str, FakeStore] = {}
+_stores_lock = threading.Lock()
+
+
+def store_for(name: str) -> FakeStore:
+    with _stores_lock:
+        if name not in _stores:
+            _stores[name] = FakeStore(name)
+        return _stores[name]
+
+
+# ---------------------------------------------------------------------------
+# CQL subset
+# ---------------------------------------------------------------------------
+
+class Bind:
+    """A bind marker (`?`, or `%s` in a simple statement) at position `index`"""
+    __slots__ = ('index',)
+
+    def __init__(self, index: int):
+        self.index = index
+
+
+def _resolve(term, values: List):
+    if isinstance(term, Bind):
+        return values[term.index]
+    if isinstance(term, list):
+        return [_resolve(item, values) for item in term]
+    return term
+
+
+def _split_top(text: str, separator: str = ',', angle: bool = False) -> List[str]:
+    """Split on `separator` outside quotes and brackets (and `<>` type parameters with `angle`)"""
+    opening, closing = ('(<[{', ')>]}') if angle else ('([{', ')]}')
+    parts, depth, quote, current = [], 0, None, []
+    i = 0
+    while i < len(text):
+        char = text[i]
+        if quote:
+            current.append(char)
+            if char == quote:
+                quote = None
+        elif char in '\'"':
+            quote = char
+            current.append(char)
+        elif char in opening:
+            depth += 1
+            current.append(char)
+        elif char in closing:
+            depth -= 1
+            current.append(char)
+        elif depth == 0 and text.startswith(separator, i) and (
+                separator in ',.' or (text[i - 1:i].isspace() and text[i + len(separator):][:1].isspace())):
+            parts.append(''.join(current))
+            current = []
+            i += len(separator)
+            continue
+        else:
+            current.append(char)
+        i += 1
+    parts.append(''.join(current))
+    return [part.strip() for part in parts if part.strip()]
+
+
+def _split_and(text: str) -> List[str]:
+    return _split_top(re.sub(r'\s+and\s+', ' AND ', text, flags=re.IGNORECASE), 'AND')
+
+
+def _closing(text: str, start: int) -> int:
+    """Index of the parenthesis closing the one at `start`"""
+    depth, quote = 0, None
+    for i in range(start, len(text)):
+        char = text[i]
+        if quote:
+            quote = None if char == quote else quote
+        elif char in '\'"':
+            quote = char
+        elif char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+            if depth == 0:
+                return i
+    raise InvalidRequest(f"Unbalanced parentheses in: {text}")
+
+
+def _ident(text: str) -> str:
+    text = text.strip()
+    if text.startswith('"') and text.endswith('"'):
+        return text[1:-1].replace('""', '"')
+    return text.lower()
+
+
+def _qualified(text: str, keyspace: Optional[str]) -> Tuple[str, str]:
+    parts = _split_top(text, '.')
+    if len(parts) == 2:
+        return _ident(parts[0]), _ident(parts[1])
+    if not keyspace:
+        raise InvalidRequest("No keyspace has been specified. USE a keyspace, or explicitly specify keyspace.tablename")
+    return keyspace, _ident(parts[0])
+
+
+UUID_LITERAL = re.compile(r'^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$')
+
+
+def _term(text: str, binds: itertools.count):
+    text = text.strip()
+    if text in ('?', '%s'):
+        return Bind(next(binds))
+    if text.startswith("'") and text.endswith("'") and len(text) >= 2:
+        return text[1:-1].replace("''", "'")
+    if text.startswith('(') and text.endswith(')') or text.startswith('[') and text.endswith(']'):
+        return [_term(item, binds) for item in _split_top(text[1:-1])]
+    lowered = text.lower()
+    if lowered in ('true', 'false'):
+        return lowered == 'true'
+    if lowered == 'null':
+        return None
+    if UUID_LITERAL.match(text):
+        return uuid.UUID(text)
+    try:
+        return int(text)
+    except ValueError:
+        pass
+    try:
+        return float(text)
+    except ValueError:
+        raise InvalidRequest(f"Unsupported term for the fake CQL backend: {text}")
+
+
+def _using(text: str, binds: itertools.count) -> Dict[str, Any]:
+    return {kind.lower(): _term(value, binds)
+            for kind, value in re.findall(r'(timestamp|ttl)\s+(\S+)', text or '', flags=re.IGNORECASE)}
+
+
+CONDITION = re.compile(r'^(token\s*\((.*?)\)|"[^"]+"|\w+)\s*(<=|>=|=|<|>|\s+in\s+)\s*(.*)$',
+                       re.IGNORECASE | re.DOTALL)
+
+
+def _conditions(text: Optional[str], binds: itertools.count) -> List[Tuple]:
+    """[(column or ('token', columns), operator, term)]"""
+    conditions = []
+    for part in _split_and(text or ''):
+        match = CONDITION.match(part)
+        if not match:
+            raise InvalidRequest(f"Unsupported WHERE condition for the fake CQL backend: {part}")
+        target, token_columns, operator, term = match.groups()
+        operator = operator.strip().lower()
+        if token_columns is not None:
+            target = ('token', [_ident(c) for c in _split_top(token_columns)])
+        else:
+            target = _ident(target)
+        conditions.append((target, operator, _term(term, binds)))
+    return conditions
+
+
+def _compare(value, operator: str, expected) -> bool:
+    if operator == '=':
+        return value == expected
+    if operator == 'in':
+        return value in expected
+    if value is None or expected is None:
+        return False
+    return {'<': value < expected, '<=': value <= expected, '>': value > expected, '>=': value >= expected}[operator]
+
+
+class Plan:
+    """A parsed statement; `run(store, values)` returns (column names, rows)"""
+    kind = 'schema'
+    bind_count = 0
+    keyspace: Optional[str] = None
+    table: Optional[str] = None
+    routing: List[Tuple[str, Any]] = []  # (partition key column, term) for routing keys
+
+    def run(self, store: FakeStore, values: List) -> Tuple[List[str], List[tuple]]:
+        raise NotImplementedError
+
+
+class CreateKeyspace(Plan):
+    def __init__(self, name: str, if_not_exists: bool):
+        self.name, self.if_not_exists = name, if_not_exists
+
+    def run(self, store, values):
+        if self.name in store.keyspaces and not self.if_not_exists:
+            raise InvalidRequest(f"Keyspace {self.name} already exists")
+        store.keyspaces.setdefault(self.name, FakeKeyspace(self.name))
+        return [], []
+
+
+class CreateTable(Plan):
+    def __init__(self, keyspace: str, name: str, body: str, if_not_exists: bool):
+        self.keyspace, self.table, self.if_not_exists = keyspace, name, if_not_exists
+        self.columns, partition_key, clustering_key = [], [], []
+        for definition in _split_top(body, angle=True):
+            match = re.match(r'^primary\s+key\s*\((.*)\)$', definition, re.IGNORECASE | re.DOTALL)
+            if match:
+                parts = _split_top(match.group(1))
+                first = parts[0]
+                partition_key = ([_ident(c) for c in _split_top(first[1:-1])] if first.startswith('(')
+                                 else [_ident(first)])
+                clustering_key = [_ident(c) for c in parts[1:]]
+                continue
+            name_part, _, type_part = definition.partition(' ')
+            inline_key = re.search(r'\s+primary\s+key\s*$', type_part, re.IGNORECASE)
+            if inline_key:
+                type_part = type_part[:inline_key.start()]
+                partition_key = [_ident(name_part)]
+            cql_type = re.sub(r'\s*,\s*', ', ', re.sub(r'\s+', ' ', type_part.strip().lower()))
+            self.columns.append(FakeColumn(_ident(name_part), re.sub(r'\s*([<>])\s*', r'\1', cql_type)))
+        if not partition_key:
+            raise InvalidRequest(f"No PRIMARY KEY specified for table {name}")
+        self.partition_key, self.clustering_key = partition_key, clustering_key
+
+    def run(self, store, values):
+        space = store.keyspaces.get(self.keyspace)
+        if space is None:
+            raise InvalidRequest(f"Keyspace {self.keyspace} does not exist")
+        if self.table in space.tables:
+            if self.if_not_exists:
+                return [], []
+            raise InvalidRequest(f"Table {self.keyspace}.{self.table} already exists")
+        space.tables[self.table] = FakeTable(self.keyspace, self.table, self.columns, self.partition_key,
+                                             self.clustering_key)
+        return [], []
+
+
+class Drop(Plan):
+    def __init__(self, what: str, keyspace: str, table: Optional[str], if_exists: bool, truncate: bool = False):
+        self.what, self.keyspace, self.table, self.if_exists, self.truncate = what, keyspace, table, if_exists, truncate
+
+    def run(self, store, values):
+        if self.what == 'keyspace':
+            if store.keyspaces.pop(self.keyspace, None) is None and not self.if_exists:
+                raise InvalidRequest(f"Keyspace {self.keyspace} does not exist")
+            return [], []
+        if self.truncate:
+            table = store.table(self.keyspace, self.table)
+            table.partitions.clear()
+            table.tombstones.clear()
+            table.ring.clear()
+            return [], []
+        space = store.keyspaces.get(self.keyspace)
+        if (space is None or space.tables.pop(self.table, None) is None) and not self.if_exists:
+            raise InvalidRequest(f"unconfigured table {self.table}")
+        return [], []
+
+
+class Use(Plan):
+    def __init__(self, keyspace: str):
+        self.keyspace = keyspace
+
+    def run(self, store, values):
+        if self.keyspace not in store.keyspaces:
+            raise InvalidRequest(f"Keyspace '{self.keyspace}' does not exist")
+        return [], []
+
+
+def _key_from_conditions(table: FakeTable, conditions: List[Tuple], values: List
+                         ) -> Tuple[List[tuple], Optional[tuple], List[Tuple]]:
+    """(partition keys, clustering key or None, remaining filters) from WHERE equalities"""
+    equal = {}
+    remaining = []
+    for target, operator, term in conditions:
+        if isinstance(target, str) and operator in ('=', 'in') and target in table.columns:
+            equal[target] = (operator, _resolve(term, values))
+        else:
+            remaining.append((target, operator, term))
+    partition_names = [c.name for c in table.partition_key]
+    if not all(name in equal for name in partition_names):
+        return [], None, conditions
+    choices = [equal[name][1] if equal[name][0] == 'in' else [equal[name][1]] for name in partition_names]
+    partition_keys = [tuple(key) for key in itertools.product(*choices)]
+    clustering_names = [c.name for c in table.clustering_key]
+    if clustering_names and all(name in equal and equal[name][0] == '=' for name in clustering_names):
+        clustering_key = tuple(equal[name][1] for name in clustering_names)
+    else:
+        clustering_key = None
+        remaining += [(name, operator, value) for name, (operator, value) in equal.items()
+                      if name in clustering_names]
+    remaining += [(name, operator, value) for name, (operator, value) in equal.items()
+                  if name not in partition_names and name not in clustering_names]
+    return partition_keys, clustering_key, remaining
+
+
+def _writetime(term, values: List) -> int:
+    value = _resolve(term, values) if term is not None else None
+    return int(value) if value is not None and value is not UNSET_VALUE else time.time_ns() // 1000
+
+
+class Insert(Plan):
+    kind = 'write'
+
+    def __init__(self, keyspace: str, table: FakeTable, columns: List[str], terms: List, using: Dict,
+                 if_not_exists: bool):
+        self.keyspace, self.table, self.meta = keyspace, table.name, table
+        self.columns, self.terms, self.using, self.if_not_exists = columns, terms, using, if_not_exists
+        self.routing = [(c.name, terms[columns.index(c.name)]) for c in table.partition_key if c.name in columns]
+
+    def run(self, store, values):
+        table = store.table(self.keyspace, self.table)
+        row = dict(zip(self.columns, (_resolve(term, values) for term in self.terms)))
+        missing = [c.name for c in table.primary_key if row.get(c.name) is None]
+        if missing:
+            raise InvalidRequest(f"Some primary key parts are missing: {', '.join(missing)}")
+        partition_key = tuple(row.pop(c.name) for c in table.partition_key)
+        clustering_key = tuple(row.pop(c.name) for c in table.clustering_key)
+        if self.if_not_exists:
+            exists = clustering_key in table.partitions.get(partition_key, {})
+            if not exists:
+                table.write(partition_key, clustering_key, row, _writetime(None, values), None, marker=True)
+            return ['[applied]'], [(not exists,)]
+        ttl = _resolve(self.using.get('ttl'), values)
+        table.write(partition_key, clustering_key, row, _writetime(self.using.get('timestamp'), values),
+                    ttl, marker=True)
+        return [], []
+
+
+class Update(Plan):
+    kind = 'write'
+
+    def __init__(self, keyspace: str, table: FakeTable, using: Dict, assignments: List[Tuple[str, Any]],
+                 conditions: List[Tuple]):
+        self.keyspace, self.table = keyspace, table.name
+        self.using, self.assignments, self.conditions = using, assignments, conditions
+        self.routing = [(target, term) for target, operator, term in conditions
+                        if operator == '=' and target in [c.name for c in table.partition_key]]
+
+    def run(self, store, values):
+        table = store.table(self.keyspace, self.table)
+        partition_keys, clustering_key, _ = _key_from_conditions(table, self.conditions, values)
+        if not partition_keys or (table.clustering_key and clustering_key is None):
+            raise InvalidRequest("UPDATE needs the full primary key in the fake CQL backend")
+        cells = {column: _resolve(term, values) for column, term in self.assignments}
+        writetime = _writetime(self.using.get('timestamp'), values)
+        for partition_key in partition_keys:
+            table.write(partition_key, clustering_key or (), cells, writetime,
+                        _resolve(self.using.get('ttl'), values), marker=False)
+        return [], []
+
+
+class Delete(Plan):
+    kind = 'write'
+
+    def __init__(self, keyspace: str, table: FakeTable, columns: List[str], using: Dict, conditions: List[Tuple]):
+        self.keyspace, self.table = keyspace, table.name
+        self.columns, self.using, self.conditions = columns or None, using, conditions
+        self.routing = [(target, term) for target, operator, term in conditions
+                        if operator == '=' and target in [c.name for c in table.partition_key]]
+
+    def run(self, store, values):
+        table = store.table(self.keyspace, self.table)
+        partition_keys, clustering_key, _ = _key_from_conditions(table, self.conditions, values)
+        if not partition_keys:
+            raise InvalidRequest("DELETE needs the partition key in the fake CQL backend")
+        writetime = _writetime(self.using.get('timestamp'), values)
+        for partition_key in partition_keys:
+            table.delete(partition_key, clustering_key if table.clustering_key else (), self.columns, writetime)
+        return [], []
+
+
+SELECTOR = re.compile(r'^(?:(count)\s*\(\s*(?:\*|1)\s*\)|(token|writetime|ttl)\s*\((.*)\)|("[^"]+"|\w+|\*))'
+                      r'(?:\s+as\s+("[^"]+"|\w+))?$', re.IGNORECASE | re.DOTALL)
+
+SYSTEM_LOCAL = {'cluster_name': 'fake', 'release_version': '4.0.11-fake', 'partitioner': MURMUR3_PARTITIONER,
+                'data_center': 'datacenter1', 'rack': 'rack1', 'key': 'local'}
+
+
+class Select(Plan):
+    kind = 'read'
+
+    def __init__(self, keyspace: str, table: Optional[FakeTable], table_name: str, selectors: str,
+                 conditions: List[Tuple], limit):
+        self.keyspace, self.table, self.meta = keyspace, table_name, table
+        self.conditions, self.limit = conditions, limit
+        self.selectors: List[Tuple[str, Any]] = []
+        self.names: List[str] = []
+        for text in _split_top(selectors):
+            match = SELECTOR.match(text.strip())
+            if not match:
+                raise InvalidRequest(f"Unsupported selector for the fake CQL backend: {text}")
+            count, function, argument, column, alias = match.groups()
+            if count:
+                self.selectors.append(('count', None))
+                name = 'count'
+            elif function:
+                function = function.lower()
+                columns = [_ident(c) for c in _split_top(argument)]
+                self.selectors.append((function, columns if function == 'token' else columns[0]))
+                name = f"system.token({', '.join(columns)})" if function == 'token' else f"{function}({columns[0]})"
+            elif column == '*':
+                for name in (table.columns if table else SYSTEM_LOCAL):
+                    self.selectors.append(('column', name))
+                    self.names.append(name)
+                continue
+            else:
+                self.selectors.append(('column', _ident(column)))
+                name = _ident(column)
+            self.names.append(_ident(alias) if alias else name)
+        if table is not None:
+            self.routing = [(target, term) for target, operator, term in conditions
+                            if operator == '=' and target in [c.name for c in table.partition_key]]
+
+    def run(self, store, values):
+        limit = _resolve(self.limit, values)
+        if self.keyspace in SYSTEM_KEYSPACES:
+            rows = [tuple(SYSTEM_LOCAL.get(name) for kind, name in self.selectors)] if self.table == 'local' else []
+            return self.names, rows
+        table = store.table(self.keyspace, self.table)
+        partition_keys, clustering_key, remaining = _key_from_conditions(table, self.conditions, values)
+        token_low = token_high = None
+        filters = []
+        for target, operator, term in remaining:
+            value = _resolve(term, values)
+            if isinstance(target, tuple):
+                if operator in ('>', '>='):
+                    token_low = (value, operator == '>=')
+                elif operator in ('<', '<='):
+                    token_high = (value, operator == '<=')
+                else:
+                    token_low = token_high = (value, True)
+            else:
+                filters.append((target, operator, value))
+        if partition_keys:
+            matches = table.scan(partition_keys=partition_keys)
+        else:
+            matches = table.scan(token_low, token_high)
+        partition_names = [c.name for c in table.partition_key]
+        clustering_names = [c.name for c in table.clustering_key]
+        rows, count = [], 0
+        for partition_key, row_key, row in matches:
+            if clustering_key is not None and row_key != clustering_key:
+                continue
+            record = dict(zip(partition_names, partition_key))
+            record.update(zip(clustering_names, row_key))
+            if not all(_compare(record.get(c, row.cells.get(c, (None,))[0]), op, v) for c, op, v in filters):
+                continue
+            count += 1
+            if not any(kind == 'count' for kind, _ in self.selectors):
+                rows.append(self._project(table, partition_key, record, row))
+            if limit is not None and count >= limit:
+                break
+        if any(kind == 'count' for kind, _ in self.selectors):
+            return self.names, [(count,)]
+        return self.names, rows
+
+    def _project(self, table: FakeTable, partition_key: tuple, record: Dict, row: _Row) -> tuple:
+        values = []
+        for kind, argument in self.selectors:
+            if kind == 'token':
+                values.append(table.token(partition_key))
+            elif kind == 'column':
+                values.append(record[argument] if argument in record else row.cells.get(argument, (None,))[0])
+            else:
+                cell = row.cells.get(argument)
+                values.append(None if cell is None else cell[1] if kind == 'writetime' else cell[2])
+        return tuple(values)
+
+
+def parse(query: str, store: FakeStore, keyspace: Optional[str]) -> Plan:
+    """Parse one CQL statement of the supported subset into a Plan"""
+    text = query.strip().rstrip(';').strip()
+    binds = itertools.count()
+    flags = re.IGNORECASE | re.DOTALL
+    plan: Plan
+
+    match = re.match(r'^create\s+keyspace\s+(if\s+not\s+exists\s+)?("[^"]+"|\w+)', text, flags)
+    if match:
+        plan = CreateKeyspace(_ident(match.group(2)), bool(match.group(1)))
+    elif re.match(r'^create\s+(table|columnfamily)\s', text, flags):
+        match = re.match(r'^create\s+(?:table|columnfamily)\s+(if\s+not\s+exists\s+)?([^\s(]+)\s*\(', text, flags)
+        if not match:
+            raise InvalidRequest(f"Unsupported CREATE TABLE for the fake CQL backend: {text}")
+        ks, name = _qualified(match.group(2), keyspace)
+        opening = match.end() - 1
+        plan = CreateTable(ks, name, text[opening + 1:_closing(text, opening)], bool(match.group(1)))
+    elif re.match(r'^create\s', text, flags):
+        plan = Plan()  # indexes, types, roles: accepted and ignored
+        plan.run = lambda store, values: ([], [])
+    elif re.match(r'^use\s', text, flags):
+        plan = Use(_ident(text.split(None, 1)[1]))
+    elif re.match(r'^(drop|truncate)\s', text, flags):
+        match = re.match(r'^(?:drop\s+(keyspace|table)\s+(if\s+exists\s+)?|truncate\s+(?:table\s+)?)(\S+)$',
+                         text, flags)
+        if not match:
+            raise InvalidRequest(f"Unsupported statement for the fake CQL backend: {text}")
+        what = (match.group(1) or 'table').lower()
+        if what == 'keyspace':
+            plan = Drop('keyspace', _ident(match.group(3)), None, bool(match.group(2)))
+        else:
+            ks, name = _qualified(match.group(3), keyspace)
+            plan = Drop('table', ks, name, bool(match.group(2)), truncate=text.lower().startswith('truncate'))
+    elif re.match(r'^insert\s', text, flags):
+        match = re.match(r'^insert\s+into\s+([^\s(]+)\s*\(', text, flags)
+        if not match:
+            raise InvalidRequest(f"Unsupported INSERT for the fake CQL backend: {text}")
+        ks, name = _qualified(match.group(1), keyspace)
+        columns_end = _closing(text, match.end() - 1)
+        columns = [_ident(c) for c in _split_top(text[match.end():columns_end])]
+        values_match = re.match(r'\s*values\s*\(', text[columns_end + 1:], flags)
+        if not values_match:
+            raise InvalidRequest(f"Unsupported INSERT for the fake CQL backend: {text}")
+        values_start = columns_end + 1 + values_match.end() - 1
+        values_end = _closing(text, values_start)
+        terms = [_term(t, binds) for t in _split_top(text[values_start + 1:values_end])]
+        rest = text[values_end + 1:]
+        using = _using(rest, binds)
+        plan = Insert(ks, store.table(ks, name), columns, terms, using,
+                      bool(re.search(r'if\s+not\s+exists', rest, flags)))
+    elif re.match(r'^update\s', text, flags):
+        match = re.match(r'^update\s+(\S+)\s+(using\s+.*?\s+)?set\s+(.*?)\s+where\s+(.*?)(?:\s+if\s+.*)?$', text, flags)
+        if not match:
+            raise InvalidRequest(f"Unsupported UPDATE for the fake CQL backend: {text}")
+        ks, name = _qualified(match.group(1), keyspace)
+        using = _using(match.group(2), binds)
+        assignments = []
+        for assignment in _split_top(match.group(3)):
+            column, _, term = assignment.partition('=')
+            if re.search(rf'\b{re.escape(column.strip())}\b', re.sub(r"'(?:[^']|'')*'", '', term)):
+                raise InvalidRequest(f"Collection/counter updates are not supported by the fake CQL backend: "
+                                     f"{assignment}")
+            assignments.append((_ident(column), _term(term, binds)))
+        plan = Update(ks, store.table(ks, name), using, assignments, _conditions(match.group(4), binds))
+    elif re.match(r'^delete\s', text, flags):
+        match = re.match(r'^delete\s+(.*?)\s*from\s+(\S+)\s*(using\s+.*?)?\s*where\s+(.*)$', text, flags)
+        if not match:
+            raise InvalidRequest(f"Unsupported DELETE for the fake CQL backend: {text}")
+        ks, name = _qualified(match.group(2), keyspace)
+        columns = [_ident(c) for c in _split_top(match.group(1))]
+        using = _using(match.group(3), binds)
+        plan = Delete(ks, store.table(ks, name), columns, using, _conditions(match.group(4), binds))
+    elif re.match(r'^select\s', text, flags):
+        match = re.match(r'^select\s+(.*?)\s+from\s+(\S+)(?:\s+where\s+(.*?))?(?:\s+limit\s+(\S+))?'
+                         r'(?:\s+allow\s+filtering)?$', text, flags)
+        if not match:
+            raise InvalidRequest(f"Unsupported SELECT for the fake CQL backend: {text}")
+        ks, name = _qualified(match.group(2), keyspace)
+        table = None if ks in SYSTEM_KEYSPACES else store.table(ks, name)
+        conditions = _conditions(match.group(3), binds)
+        limit = _term(match.group(4), binds) if match.group(4) else None
+        plan = Select(ks, table, name, match.group(1), conditions, limit)
+    else:
+        raise InvalidRequest(f"Unsupported statement for the fake CQL backend: {text}")
+    plan.bind_count = next(binds)
+    return plan
+
+
+# ---------------------------------------------------------------------------
+# Driver-shaped API
+# ---------------------------------------------------------------------------
+
+class _Scheduler:
+    """Completes requests at their due time on one thread, like the driver's event loop"""
+
+    def __init__(self):
+        self.heap: List[Tuple[float, int, Callable]] = []
+        self.condition = threading.Condition()
+        self.sequence = itertools.count()
+        self.thread = threading.Thread(target=self._run, name='fake-cql-loop', daemon=True)
+        self.thread.start()
+
+    def call_at(self, due: float, fn: Callable):
+        with self.condition:
+            heapq.heappush(self.heap, (due, next(self.sequence), fn))
+            self.condition.notify()
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while not self.heap:
+                    self.condition.wait()
+                due, _, fn = self.heap[0]
+                delay = due - time.monotonic()
+                if delay > 0:
+                    self.condition.wait(delay)
+                    continue
+                heapq.heappop(self.heap)
+            try:
+                fn()
+            except Exception as e:
+                print(f"⚠️  Fake CQL callback failed: {e}")
+
+
+_scheduler: Optional[_Scheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def scheduler() -> _Scheduler:
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = _Scheduler()
+        return _scheduler
+
+
+class FakePreparedStatement(PreparedStatement):
+    """Prepared statement backed by a Plan; accepted by the driver's BatchStatement"""
+
+    def __init__(self, query: str, plan: Plan, keyspace: Optional[str]):
+        self.query_string = query
+        self.plan = plan
+        self.query_id = uuid.uuid4().bytes
+        self.keyspace = keyspace
+        self.fetch_size = None
+        self.consistency_level = None
+        self.serial_consistency_level = None
+        self.custom_payload = None
+        self.is_idempotent = False
+        self.routing_key_indexes = None
+        self.column_metadata = []
+        self.result_metadata = None
+        self.protocol_version = 4
+
+    def bind(self, values=None) -> 'FakeBoundStatement':
+        return FakeBoundStatement(self, values)
+
+    def __str__(self):
+        return self.query_string
+
+
+class FakeBoundStatement(BoundStatement):
+    def __init__(self, prepared: FakePreparedStatement, values=None):
+        values = list(values or ())
+        if len(values) != prepared.plan.bind_count:
+            raise ValueError(f"Expected {prepared.plan.bind_count} arguments, got {len(values)} "
+                             f"for: {prepared.query_string}")
+        self.prepared_statement = prepared
+        self.values = values
+        self.keyspace = prepared.keyspace
+        self.fetch_size = prepared.fetch_size
+        self.consistency_level = prepared.consistency_level
+        self.serial_consistency_level = prepared.serial_consistency_level
+        self.custom_payload = None
+        self.is_idempotent = prepared.is_idempotent
+        self.paging_state = None
+        self.timestamp = None
+
+    @property
+    def routing_key(self) -> Optional[bytes]:
+        plan = self.prepared_statement.plan
+        meta = getattr(plan, 'meta', None)
+        if meta is None or not plan.routing or len(plan.routing) != len(meta.partition_key):
+            return None
+        terms = dict(plan.routing)
+        return serialize_key(meta.partition_key,
+                             tuple(_resolve(terms[c.name], self.values) for c in meta.partition_key))
+
+    def __str__(self):
+        return self.prepared_statement.query_string
+
+
+class FakeResultSet:
+    """Pages of a materialized result; fetching a further page costs a request"""
+
+    def __init__(self, session: 'FakeSession', names: List[str], rows: List[tuple], fetch_size: int,
+                 offset: int = 0):
+        self.session = session
+        self.column_names = names
+        self._rows = named_tuple_factory(names, rows) if names else []
+        self.fetch_size = fetch_size or len(self._rows) or 1
+        self._offset = offset
+        self.current_rows = self._rows[offset:offset + self.fetch_size]
+
+    @property
+    def has_more_pages(self) -> bool:
+        return self._offset + self.fetch_size < len(self._rows)
+
+    @property
+    def paging_state(self) -> Optional[bytes]:
+        return str(self._offset + self.fetch_size).encode() if self.has_more_pages else None
+
+    def fetch_next_page(self):
+        if not self.has_more_pages:
+            return
+        self.session._wait_for_request(read=True)
+        self._offset += self.fetch_size
+        self.current_rows = self._rows[self._offset:self._offset + self.fetch_size]
+
+    def __iter__(self):
+        while True:
+            yield from self.current_rows
+            if not self.has_more_pages:
+                return
+            self.fetch_next_page()
+
+    def one(self):
+        return self.current_rows[0] if self.current_rows else None
+
+    def all(self) -> List:
+        return list(self)
+
+    def __bool__(self):
+        return bool(self.current_rows)
+
+    @property
+    def was_applied(self) -> bool:
+        row = self.one()
+        return bool(row[0]) if row is not None and self.column_names == ['[applied]'] else True
+
+
+class FakeResponseFuture:
+    """Driver-style future: result(), add_callbacks(); callbacks run on the scheduler thread"""
+
+    def __init__(self, query):
+        self.query = query
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._result: Optional[FakeResultSet] = None
+        self._error: Optional[BaseException] = None
+        self._callbacks: List[Tuple[Callable, tuple, dict]] = []
+        self._errbacks: List[Tuple[Callable, tuple, dict]] = []
+
+    def _complete(self, result: Optional[FakeResultSet] = None, error: Optional[BaseException] = None):
+        with self._lock:
+            self._result, self._error = result, error
+            self._event.set()
+            callbacks = self._errbacks if error is not None else self._callbacks
+        for fn, args, kwargs in callbacks:
+            fn(error if error is not None else result.current_rows, *args, **kwargs)
+
+    def result(self, timeout: Optional[float] = None) -> FakeResultSet:
+        if not self._event.wait(timeout):
+            raise OperationTimedOut(errors={'fake': 'client timeout'}, last_host='fake')
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+    def done(self) -> bool:
+        return self._event.is_set()
+
+    @property
+    def has_more_pages(self) -> bool:
+        return bool(self._result and self._result.has_more_pages)
+
+    def add_callback(self, fn: Callable, *args, **kwargs):
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append((fn, args, kwargs))
+                return self
+        if self._error is None:
+            fn(self._result.current_rows, *args, **kwargs)
+        return self
+
+    def add_errback(self, fn: Callable, *args, **kwargs):
+        with self._lock:
+            if not self._event.is_set():
+                self._errbacks.append((fn, args, kwargs))
+                return self
+        if self._error is not None:
+            fn(self._error, *args, **kwargs)
+        return self
+
+    def add_callbacks(self, callback: Callable, errback: Callable, callback_args=(), callback_kwargs=None,
+                      errback_args=(), errback_kwargs=None):
+        self.add_callback(callback, *callback_args, **(callback_kwargs or {}))
+        self.add_errback(errback, *errback_args, **(errback_kwargs or {}))
+
+
+class FakeSession:
+    def __init__(self, cluster: 'FakeCluster', keyspace: Optional[str] = None):
+        self.cluster = cluster
+        self.store = cluster.store
+        self.keyspace = None
+        self.default_fetch_size = DEFAULT_FETCH_SIZE
+        self.default_timeout = 10.0
+        self.row_factory = named_tuple_factory
+        self.plans: Dict[Tuple[str, Optional[str]], Plan] = {}
+        self.prepared: Dict[bytes, FakePreparedStatement] = {}
+        if keyspace:
+            self.set_keyspace(keyspace)
+
+    def _plan(self, query: str) -> Plan:
+        key = (query, self.keyspace)
+        plan = self.plans.get(key)
+        if plan is None:
+            with self.store.lock:
+                plan = self.plans[key] = parse(query, self.store, self.keyspace)
+        return plan
+
+    def set_keyspace(self, keyspace: str):
+        if keyspace not in self.store.keyspaces:
+            raise InvalidRequest(f"Keyspace '{keyspace}' does not exist")
+        self.keyspace = keyspace
+
+    def prepare(self, query: str, custom_payload=None, keyspace: Optional[str] = None) -> FakePreparedStatement:
+        self._wait_for_request(read=False)
+        statement = FakePreparedStatement(query, self._plan(query), keyspace or self.keyspace)
+        self.prepared[statement.query_id] = statement
+        return statement
+
+    def _statements(self, query, parameters) -> Tuple[List[Tuple[Plan, List]], Optional[int]]:
+        """[(plan, values)] for a string, simple, prepared, bound or batch statement, and its fetch size"""
+        if isinstance(query, str):
+            return [(self._plan(query), list(parameters or ()))], None
+        if isinstance(query, FakePreparedStatement):
+            query = query.bind(parameters)
+        if isinstance(query, FakeBoundStatement):
+            return [(query.prepared_statement.plan, query.values)], query.fetch_size
+        entries = getattr(query, '_statements_and_parameters', None)
+        if entries is not None:  # BatchStatement
+            statements = []
+            for is_prepared, statement, values in entries:
+                if is_prepared:
+                    statements.append((self.prepared[statement].plan, list(values)))
+                else:
+                    statements.append((self._plan(statement), list(values or ())))
+            return statements, None
+        return [(self._plan(query.query_string), list(parameters or ()))], getattr(query, 'fetch_size', None)
+
+    def execute_async(self, query, parameters=None, trace=False, custom_payload=None, timeout=None,
+                      execution_profile=None, paging_state=None, host=None, execute_as=None) -> FakeResponseFuture:
+        statements, fetch_size = self._statements(query, parameters)
+        future = FakeResponseFuture(query)
+        data_request = any(plan.kind != 'schema' for plan, _ in statements)
+        due, failed = self.store.schedule(time.monotonic(), data_request)
+        offset = int(paging_state) if paging_state else 0
+
+        def complete():
+            if failed:
+                future._complete(error=OperationTimedOut(errors={self.store.name: 'injected failure'},
+                                                         last_host=self.store.name))
+                return
+            try:
+                with self.store.lock:
+                    names, rows = [], []
+                    for plan, values in statements:
+                        if isinstance(plan, Use):
+                            plan.run(self.store, values)
+                            self.keyspace = plan.keyspace
+                            continue
+                        names, rows = plan.run(self.store, values)
+            except Exception as e:
+                future._complete(error=e)
+                return
+            future._complete(FakeResultSet(self, names, rows, fetch_size or self.default_fetch_size, offset))
+
+        if threading.current_thread() is scheduler().thread:
+            # Called from a callback: waiting on the loop would deadlock, so complete inline
+            time.sleep(max(0.0, due - time.monotonic()))
+            complete()
+        else:
+            scheduler().call_at(due, complete)
+        return future
+
+    def execute(self, query, parameters=None, timeout=None, trace=False, custom_payload=None,
+                execution_profile=None, paging_state=None, host=None, execute_as=None) -> FakeResultSet:
+        return self.execute_async(query, parameters, paging_state=paging_state).result()
+
+    def _wait_for_request(self, read: bool):
+        """Spend one request's latency (page fetches, prepares) and raise injected failures"""
+        due, failed = self.store.schedule(time.monotonic(), read)
+        time.sleep(max(0.0, due - time.monotonic()))
+        if failed:
+            raise OperationTimedOut(errors={self.store.name: 'injected failure'}, last_host=self.store.name)
+
+    def shutdown(self):
+        pass
+
+
+class FakeHost:
+    def __init__(self, name: str):
+        self.endpoint = name
+        self.address = name
+        self.datacenter = 'datacenter1'
+        self.rack = 'rack1'
+        self.is_up = True
+
+    def __str__(self):
+        return self.endpoint
+
+
+class FakeMetadata:
+    """Live view of a store's schema shaped like `cluster.metadata`; no token map (single fake node)"""
+
+    def __init__(self, store: FakeStore):
+        self.store = store
+        self.token_map = None
+        self.partitioner = MURMUR3_PARTITIONER
+        self.cluster_name = f"fake-{store.name}"
+        self.host = FakeHost(store.name)
+
+    @property
+    def keyspaces(self) -> Dict[str, FakeKeyspace]:
+        return self.store.keyspaces
+
+    def all_hosts(self) -> List[FakeHost]:
+        return [self.host]
+
+
+class FakeCluster:
+    """
+    Drop-in for `cassandra.cluster.Cluster`: takes (and ignores) the same
+    connection options; clusters with the same name share one in-memory store.
+    """
+
+    def __init__(self, contact_points=None, port: int = 9042, cloud: Optional[Dict] = None, **kwargs):
+        if cloud:
+            self.name = 'astra'
+        else:
+            self.name = str(list(contact_points)[0]) if contact_points else '127.0.0.1'
+        self.port = port
+        self.store = store_for(self.name)
+        self.metadata = FakeMetadata(self.store)
+        self.sessions: List[FakeSession] = []
+
+    def connect(self, keyspace: Optional[str] = None, wait_for_all_pools: bool = False) -> FakeSession:
+        session = FakeSession(self, keyspace)
+        self.sessions.append(session)
+        return session
+
+    def refresh_schema_metadata(self, *args, **kwargs):
+        pass
+
+    def refresh_keyspace_metadata(self, *args, **kwargs):
+        pass
+
+    def refresh_table_metadata(self, *args, **kwargs):
+        pass
+
+    def shutdown(self):
+        self.sessions.clear()
+
+
+def cluster_class():
+    """`FakeCluster` when CQL_BACKEND=fake, else the driver's Cluster"""
+    if os.getenv('CQL_BACKEND', '').lower() == 'fake':
+        return FakeCluster
+    from cassandra.cluster import Cluster
+    return Cluster
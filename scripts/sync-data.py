@@ -4,25 +4,52 @@ Data synchronization script for migrating existing data from Cassandra to Astra
 This implements DataStax Phase 2: Migrate Existing Data
 
 Usage:
-    python sync-data.py [--dry-run] [--batch-size=1000]
+    python sync-data.py [--tables=demo.users,ks.* | --keyspaces=ks1,ks2 | --keyspaces='*']
+                        [--batch-size=1000] [--splits=64] [--scan-workers=4]
+                        [--skip-existing | --no-writetime]
+                        [--dry-run [--estimate-ranges=4] [--estimate-rows=50000] [--probe-writes=0]]
+                        [--checkpoint=sync-checkpoint.jsonl] [--restart | --failed-only | --ranges=START:END,...]
 """
 
 import os
 import sys
 import json
 import argparse
+import threading
 from cassandra.cluster import Cluster
 from cassandra.auth import PlainTextAuthProvider
 from cassandra.policies import DCAwareRoundRobinPolicy
+from cassandra.metadata import protect_name
 import uuid
-from typing import List, Dict, Any
-import time
+from functools import partial
+from operator import itemgetter
+from typing import Callable, Dict, Iterator, Iterable, Any, List, Optional
+
+from zdm_sync.checkpoint import Checkpoint, RangeTracker
+from zdm_sync.digest import RangeDigestValidator
+from zdm_sync.estimate import (format_duration, print_estimate, probe_writes, sample_ranges, sample_reads,
+                               size_estimates)
+from zdm_sync.id_set import CompactIdSet
+from zdm_sync.staging import (COMPRESSIONS, FORMATS, StageManifest, StagedSource, StagingSink, resolve_compression,
+                              table_dir)
+from zdm_sync.tables import TableProgress, TableRange, TableSpec, select_tables
+from zdm_sync.timestamps import TimestampedInserts
+from zdm_sync.throttle import OriginThrottle
+from zdm_sync.token_ranges import TokenRange, ring_ranges, range_query, scan_pages, stream_ranges
+from zdm_sync.writer import ConcurrentWriter
+
+# CQL_BACKEND=fake runs against the in-process stand-in in fake_cql.py for offline benchmarking
+FAKE_BACKEND = os.getenv('CQL_BACKEND', '').lower() == 'fake'
+if FAKE_BACKEND:
+    from fake_cql import FakeCluster as Cluster
 
 def load_astra_config():
     """Load Astra DB configuration from secure connect bundle and token"""
     
     # Load secure connect bundle path
     bundle_path = os.getenv('ASTRA_SECURE_BUNDLE_PATH', './secure-connect-migration-cql-demo.zip')
+    if FAKE_BACKEND:
+        return {'secure_connect_bundle': bundle_path, 'username': 'token', 'password': ''}
     if not os.path.exists(bundle_path):
         raise FileNotFoundError(f"Astra secure connect bundle not found: {bundle_path}")
     
@@ -76,136 +103,577 @@ def connect_to_astra():
     print("✅ Connected to Astra DB")
     return cluster, session
 
-def get_cassandra_data(cassandra_session, batch_size: int = 1000) -> List[Dict[str, Any]]:
-    """Fetch all data from Cassandra"""
-    print(f"Fetching data from Cassandra (batch size: {batch_size})...")
+def checkpoint_path(args, table: str) -> Optional[str]:
+    """Per-table checkpoint file: `--checkpoint` with the table name inserted before the extension"""
+    if args.checkpoint == '' or args.dry_run:
+        return None
+    if args.checkpoint is None and args.sink == 'stage':
+        return os.path.join(table_dir(args.stage_dir, table), 'checkpoint.jsonl')
+    root, extension = os.path.splitext(args.checkpoint or 'sync-checkpoint.jsonl')
+    return f"{root}.{table}{extension or '.jsonl'}"
+
+def plan_token_ranges(table: str, all_ranges: Callable[[], List[TokenRange]], args,
+                      checkpoint: Optional[Checkpoint]) -> List[TokenRange]:
+    """
+    Decide which token ranges of `table` this run scans, resuming from the
+    checkpoint when present; `all_ranges()` supplies the full plan for a fresh run
+    """
+    if args.ranges:
+        ranges = [TokenRange.parse(text) for text in args.ranges.split(',') if text.strip()]
+        print(f"{table}: re-running {len(ranges)} explicitly requested token ranges")
+        if checkpoint is not None and not checkpoint.load():
+            checkpoint.start(table, ranges)
+        return ranges
+    
+    if checkpoint is not None:
+        if args.restart:
+            checkpoint.reset()
+        elif checkpoint.load():
+            ranges = checkpoint.failed() if args.failed_only else checkpoint.pending()
+            print(f"{table}: resuming from checkpoint {checkpoint.path}: "
+                  f"{len(checkpoint.completed())}/{len(checkpoint.plan)} ranges done, "
+                  f"{len(checkpoint.failed())} failed, {len(ranges)} to scan")
+            return ranges
+    
+    ranges = all_ranges()
+    if checkpoint is not None:
+        checkpoint.start(table, ranges)
+        print(f"{table}: tracking progress in checkpoint {checkpoint.path}")
+    return ranges
+
+def table_sizes(specs: List[TableSpec], cassandra_cluster=None, cassandra_session=None,
+                staged: Optional[StagedSource] = None) -> Dict[str, int]:
+    """Approximate bytes per table, from `system.size_estimates` or the staged files"""
+    sizes = {}
+    for spec in specs:
+        if staged is not None:
+            directory = table_dir(staged.stage_dir, spec.name)
+            sizes[spec.name] = sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+            continue
+        estimates = size_estimates(cassandra_cluster, cassandra_session, spec.keyspace, spec.table)
+        sizes[spec.name] = estimates[1] if estimates else 0
+    return sizes
+
+def schedule_ranges(specs: List[TableSpec], ranges_by_table: Dict[str, List[TokenRange]],
+                    sizes: Dict[str, int], throttle: Optional[OriginThrottle] = None) -> List[TableRange]:
+    """
+    Order work for the shared scan pool: largest tables first, so the longest
+    tables start early and small ones fill the gaps at the end
+    """
+    items = []
+    for spec in sorted(specs, key=lambda s: (-sizes.get(s.name, 0), s.name)):
+        ranges = ranges_by_table[spec.name]
+        if throttle is not None:
+            ranges = throttle.order(ranges, spec.keyspace)
+        items.extend(TableRange(spec.name, token_range) for token_range in ranges)
+    return items
+
+def get_cassandra_data(cassandra_session, specs: Dict[str, TableSpec], items: List[TableRange],
+                       batch_size: int = 1000, workers: int = 4, range_filter=None,
+                       preserve_writetime: bool = True,
+                       throttle: Optional[OriginThrottle] = None) -> Iterator[Any]:
+    """
+    Stream rows from Cassandra by scanning table token ranges in parallel.
+    
+    Yields `(table_range, rows)` page by page as the scans return them and
+    `(table_range, None)` when a range is finished, so memory is bounded by
+    workers x batch_size rows rather than the size of the tables. All tables
+    share the same `workers` scan threads. `range_filter` builds a per-range
+    row predicate (see AstraExistingIds). With `preserve_writetime` every value
+    column is read with its WRITETIME and TTL. `throttle` keeps the scans from
+    degrading production reads on the origin.
+    """
+    print(f"Streaming data from Cassandra ({len(items)} token ranges of {len(specs)} tables, "
+          f"{workers} parallel scans, fetch size {batch_size})...")
     
-    query = "SELECT id, name, email, gender, address FROM demo.users"
-    result = cassandra_session.execute(query)
+    queries = {name: cassandra_session.prepare(spec.select_cql(preserve_writetime)) for name, spec in specs.items()}
     
-    rows = []
-    for row in result:
-        rows.append({
-            'id': row.id,
-            'name': row.name,
-            'email': row.email,
-            'gender': row.gender,
-            'address': row.address
-        })
+    def scan(item: TableRange):
+        return scan_pages(cassandra_session, queries[item.table], item.token_range, batch_size,
+                          throttle, specs[item.table].keyspace)
     
-    print(f"✅ Fetched {len(rows)} records from Cassandra")
-    return rows
+    fetched = 0
+    completed_ranges = 0
+    for item, rows in stream_ranges(scan, items, workers, range_filter=range_filter):
+        if rows is None:
+            completed_ranges += 1
+        else:
+            fetched += len(rows)
+        yield item, rows
+    
+    print(f"✅ Fetched {fetched} records from Cassandra across {completed_ranges} token ranges")
+    if throttle is not None and throttle.summary():
+        print(throttle.summary())
 
-def get_astra_existing_ids(astra_session) -> set:
-    """Get existing IDs in Astra DB to avoid duplicates"""
-    print("Checking existing records in Astra DB...")
+class AstraExistingIds:
+    """
+    Per-token-range dedup against Astra DB.
+    
+    For each table range being scanned, loads only that range's primary keys
+    from Astra and drops them once the range is done, so resident memory is
+    bounded by the ranges in flight rather than the size of the table. Tables
+    keyed by a single UUID use a CompactIdSet (16 bytes per id, optionally
+    memory-mapped under `spill_dir`); other keys are kept as tuples.
+    """
     
-    query = "SELECT id FROM demo.users"
-    result = astra_session.execute(query)
+    def __init__(self, astra_session, specs: Dict[str, TableSpec], batch_size: int = 1000, spill_dir: str = None):
+        self.astra_session = astra_session
+        self.specs = specs
+        self.batch_size = batch_size
+        self.spill_dir = spill_dir
+        self.queries = {
+            name: astra_session.prepare(range_query(
+                f"SELECT {', '.join(protect_name(c) for c in spec.key_columns)} FROM {spec.qualified}",
+                spec.token_columns))
+            for name, spec in specs.items()
+        }
+        self.lock = threading.Lock()
+        self.existing = 0
+        self.skipped = 0
     
-    existing_ids = {row.id for row in result}
-    print(f"✅ Found {len(existing_ids)} existing records in Astra DB")
-    return existing_ids
+    def __call__(self, item: TableRange):
+        spec = self.specs[item.table]
+        statement = self.queries[item.table].bind((item.token_range.start, item.token_range.end))
+        statement.fetch_size = self.batch_size
+        rows = self.astra_session.execute(statement)
+        if len(spec.key_columns) == 1 and spec.types.get(spec.key_columns[0]) in ('uuid', 'timeuuid'):
+            ids = CompactIdSet((row[0] for row in rows), spill_dir=self.spill_dir)
+            key = itemgetter(0)
+        else:
+            ids = {tuple(row) for row in rows}
+            key = lambda row, n=len(spec.key_columns): tuple(row[:n])
+        with self.lock:
+            self.existing += len(ids)
+        return RangeFilter(self, ids, key)
 
-def sync_data_to_astra(astra_session, rows: List[Dict[str, Any]], existing_ids: set, dry_run: bool = False):
-    """Sync data to Astra DB, skipping existing records"""
+class RangeFilter:
+    """Row predicate for one token range: keep rows not already in Astra DB"""
     
-    # Filter out existing records
-    new_rows = [row for row in rows if row['id'] not in existing_ids]
+    def __init__(self, owner: AstraExistingIds, ids, key: Callable):
+        self.owner = owner
+        self.ids = ids
+        self.key = key
     
-    if not new_rows:
+    def __call__(self, row) -> bool:
+        if self.key(row) in self.ids:
+            with self.owner.lock:
+                self.owner.skipped += 1
+            return False
+        return True
+    
+    def close(self):
+        if isinstance(self.ids, CompactIdSet):
+            self.ids.close()
+
+class RowCompletion:
+    """Reports a row to the tracker once every write it was split into has finished"""
+    
+    def __init__(self, on_done, writes: int, counts: dict, lock: threading.Lock):
+        self.on_done = on_done
+        self.remaining = writes
+        self.success = True
+        self.counts = counts
+        self.lock = lock
+    
+    def __call__(self, success: bool):
+        with self.lock:
+            self.success = self.success and success
+            self.remaining -= 1
+            if self.remaining:
+                return
+            self.counts['synced' if self.success else 'failed'] += 1
+        self.on_done(self.success)
+
+def sync_data_to_astra(astra_session, specs: Dict[str, TableSpec], pages: Iterable[Any], tracker: TableProgress,
+                       max_in_flight: int = 256, target_latency_ms: float = 50.0, max_retries: int = 5,
+                       preserve_writetime: bool = True):
+    """
+    Sync streamed `(table_range, rows)` pages concurrently through one shared
+    writer, reporting every row back to `tracker` so finished ranges are
+    checkpointed.
+    
+    With `preserve_writetime` each row is written with its original cell
+    timestamps and TTLs, so a newer dual-written value in Astra DB is never
+    overwritten by older migrated data.
+    """
+    
+    print("Syncing records to Astra DB" + (" (preserving WRITETIME and TTL)..." if preserve_writetime else "..."))
+    
+    inserts = {}
+    plain_inserts = {}
+    for name, spec in specs.items():
+        if preserve_writetime:
+            inserts[name] = TimestampedInserts(astra_session, spec.qualified, spec.key_columns,
+                                               spec.value_columns, spec.multi_cell_columns)
+        else:
+            plain_inserts[name] = astra_session.prepare(spec.insert_cql)
+            plain_inserts[name].is_idempotent = True
+    
+    # Concurrent insert; Astra's capacity sets the pace via adaptive throttling
+    writer = ConcurrentWriter(
+        astra_session,
+        None,
+        max_in_flight=max_in_flight,
+        target_latency_ms=target_latency_ms,
+        max_retries=max_retries
+    )
+    counts = {'synced': 0, 'failed': 0}
+    counts_lock = threading.Lock()
+    try:
+        for item, rows in pages:
+            if rows is None:
+                tracker.scan_finished(item)
+                continue
+            tracker.rows_queued(item, len(rows))
+            on_done = partial(tracker.row_done, item)
+            if not preserve_writetime:
+                statement = plain_inserts[item.table]
+                for row in rows:
+                    writer.write(tuple(row), RowCompletion(on_done, 1, counts, counts_lock), statement=statement)
+                continue
+            for row in rows:
+                writes = inserts[item.table].writes(row)
+                if not writes:
+                    on_done(True)  # untimed row, skipped and reported below
+                    continue
+                completion = RowCompletion(on_done, len(writes), counts, counts_lock)
+                for statement, params in writes:
+                    writer.write(params, completion, statement=statement)
+    finally:
+        writer.close()
+    synced_count = counts['synced']
+    
+    print(f"✅ {tracker.done_ranges} token ranges completed")
+    if counts['failed']:
+        failed = tracker.failed_ranges
+        print(f"⚠️  {counts['failed']} records failed after {max_retries} retries in "
+              f"{len(failed)} token ranges - re-run with --failed-only or:")
+        for table in sorted({item.table for item in failed}):
+            ranges = ','.join(f'{i.token_range.start}:{i.token_range.end}' for i in failed if i.table == table)
+            print(f"   --tables={table} --ranges={ranges}")
+    for name, table_inserts in inserts.items():
+        if table_inserts.untimed_rows:
+            keys = ', '.join(str(key[0] if len(key) == 1 else key) for key in table_inserts.untimed_keys)
+            print(f"⚠️  {name}: skipped {table_inserts.untimed_rows} rows with no timestamped cell (only the "
+                  f"primary key or non-frozen collections set), e.g. {keys}")
+            print("   Writing them at the current time could resurrect rows deleted through the ZDM proxy; "
+                  "copy them once dual writes have stopped with --no-writetime (which skips existing rows)")
+    
+    if not synced_count and not counts['failed']:
         print("✅ No new records to sync - all data already exists in Astra DB")
         return 0
     
-    print(f"Syncing {len(new_rows)} new records to Astra DB...")
-    
-    if dry_run:
-        print("🔍 DRY RUN - Would sync the following records:")
-        for i, row in enumerate(new_rows[:5]):  # Show first 5
-            print(f"  {i+1}. {row['name']} ({row['email']})")
-        if len(new_rows) > 5:
-            print(f"  ... and {len(new_rows) - 5} more records")
-        return len(new_rows)
-    
-    # Prepare insert statement
-    insert_stmt = astra_session.prepare("""
-        INSERT INTO demo.users (id, name, email, gender, address)
-        VALUES (?, ?, ?, ?, ?)
-    """)
-    
-    # Batch insert
-    batch_size = 100
-    synced_count = 0
-    
-    for i in range(0, len(new_rows), batch_size):
-        batch = new_rows[i:i + batch_size]
-        
-        for row in batch:
-            astra_session.execute(insert_stmt, [
-                row['id'],
-                row['name'],
-                row['email'],
-                row['gender'],
-                row['address']
-            ])
-            synced_count += 1
-        
-        print(f"Progress: {synced_count}/{len(new_rows)} records synced")
-        time.sleep(0.1)  # Small delay to avoid overwhelming Astra DB
-    
     print(f"✅ Successfully synced {synced_count} records to Astra DB")
     return synced_count
 
-def validate_sync(cassandra_session, astra_session):
-    """Validate that data counts match"""
-    print("\nValidating synchronization...")
+class AstraSink:
+    """Sync target writing streamed pages into Astra DB (see sync_data_to_astra)"""
     
-    # Count records in both clusters
-    cassandra_count = cassandra_session.execute("SELECT COUNT(*) FROM demo.users").one().count
-    astra_count = astra_session.execute("SELECT COUNT(*) FROM demo.users").one().count
+    def __init__(self, astra_session, specs: Dict[str, TableSpec], args, preserve_writetime: bool = True):
+        self.astra_session = astra_session
+        self.specs = specs
+        self.args = args
+        self.preserve_writetime = preserve_writetime
     
-    print(f"Cassandra records: {cassandra_count}")
-    print(f"Astra DB records: {astra_count}")
+    def sync(self, pages: Iterable[Any], tracker: TableProgress) -> int:
+        return sync_data_to_astra(
+            self.astra_session,
+            self.specs,
+            pages,
+            tracker,
+            max_in_flight=self.args.max_in_flight,
+            target_latency_ms=self.args.target_latency_ms,
+            max_retries=self.args.max_retries,
+            preserve_writetime=self.preserve_writetime
+        )
+
+def estimate_sync(cassandra_cluster, cassandra_session, astra_session, specs: List[TableSpec],
+                  ranges_by_table: Dict[str, List[TokenRange]], args,
+                  throttle: Optional[OriginThrottle] = None):
+    """
+    Dry run: sample a few token ranges of each table and probe Astra DB write
+    throughput, then project rows, bytes and wall-clock time for the planned
+    ranges without reading whole tables or writing to the migrated tables
+    """
+    preserve_writetime = not args.no_writetime
     
-    if cassandra_count == astra_count:
-        print("✅ Data sync validation PASSED - record counts match")
-        return True
-    else:
-        print(f"❌ Data sync validation FAILED - mismatch: {cassandra_count} vs {astra_count}")
-        return False
+    # One write probe serves every table; it writes to a scratch table, never the target tables
+    write_rate = None
+    if args.probe_writes > 0 and specs:
+        keyspace = specs[0].keyspace
+        print(f"Probing Astra DB with {args.probe_writes} writes to a scratch table in {keyspace}...")
+        write_rate = probe_writes(astra_session, protect_name(keyspace), args.probe_writes,
+                                  args.max_in_flight, args.target_latency_ms)
+    
+    total_rows = total_seconds = 0.0
+    for spec in specs:
+        ranges = ranges_by_table[spec.name]
+        if not ranges:
+            continue
+        samples = sample_ranges(ranges, args.estimate_ranges)
+        print(f"\n🔍 DRY RUN - {spec.name}: sampling {len(samples)} of {len(ranges)} token ranges "
+              f"(up to {args.estimate_rows} rows)...")
+        
+        writes_for_row = None
+        if preserve_writetime:
+            inserts = TimestampedInserts(astra_session, spec.qualified, spec.key_columns,
+                                         spec.value_columns, spec.multi_cell_columns)
+            writes_for_row = partial(_writes_per_row, inserts)
+        sample = sample_reads(cassandra_session, spec.select_cql(preserve_writetime), samples,
+                              args.scan_workers, args.batch_size, args.estimate_rows, writes_for_row,
+                              throttle, spec.keyspace, len(spec.partition_key))
+        estimates = size_estimates(cassandra_cluster, cassandra_session, spec.keyspace, spec.table)
+        projection = print_estimate(sample, estimates, sum(r.width for r in ranges), write_rate,
+                                    args.scan_workers, args.max_in_flight)
+        if projection:
+            total_rows += projection[0]
+            total_seconds += projection[1]
+    
+    if len(specs) > 1:
+        print(f"\n📐 All {len(specs)} tables: {total_rows:,.0f} rows, "
+              f"projected wall-clock time {format_duration(total_seconds)}")
+
+def _writes_per_row(inserts: TimestampedInserts, row) -> int:
+    return len(inserts.writes(row))
+
+def validate_sync(cassandra_cluster, cassandra_session, astra_session, specs: List[TableSpec],
+                  splits: int = 64, workers: int = 8, batch_size: int = 1000):
+    """
+    Validate that both clusters hold the same rows by comparing per-token-range
+    digests (row count + order-independent hash), drilling into ranges that differ
+    """
+    print("\nValidating synchronization...")
+    
+    ranges = ring_ranges(cassandra_cluster, splits)
+    passed = True
+    for spec in specs:
+        validator = RangeDigestValidator(
+            cassandra_session,
+            astra_session,
+            spec.plain_select_cql(),
+            spec.token_columns,
+            key_columns=len(spec.key_columns),
+            workers=workers,
+            fetch_size=batch_size
+        )
+        print(f"{spec.name}: comparing {len(ranges)} token range digests with {workers} parallel scans...")
+        report = validator.compare(ranges)
+        
+        print(f"  Cassandra records: {report.origin_rows}")
+        print(f"  Astra DB records: {report.target_rows}")
+        print(f"  Matching token ranges: {report.matched_ranges}/{report.ranges}")
+        
+        if report.passed:
+            print(f"✅ {spec.name} validation PASSED - every token range digest matches")
+            continue
+        
+        passed = False
+        missing, extra, different = report.differing_rows()
+        print(f"❌ {spec.name} validation FAILED - {missing} missing, {extra} extra, {different} different "
+              f"records in {len(report.mismatches)} token ranges")
+        for mismatch in report.mismatches[:10]:
+            sample = (mismatch.missing + mismatch.different + mismatch.extra)[:3]
+            keys = ', '.join(str(key[0] if len(key) == 1 else key) for key in sample)
+            print(f"  {mismatch.token_range}: {len(mismatch.missing)} missing, {len(mismatch.extra)} extra, "
+                  f"{len(mismatch.different)} different (e.g. {keys})")
+    return passed
 
 def main():
     parser = argparse.ArgumentParser(description='Sync data from Cassandra to Astra DB')
-    parser.add_argument('--dry-run', action='store_true', help='Show what would be synced without making changes')
-    parser.add_argument('--batch-size', type=int, default=1000, help='Batch size for fetching data')
+    parser.add_argument('--tables', default=None,
+                        help="Comma-separated keyspace.table (or keyspace.*) to sync (default demo.users)")
+    parser.add_argument('--keyspaces', default=None,
+                        help="Comma-separated keyspaces whose tables are all synced ('*' = every non-system keyspace)")
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Estimate volume and duration from a sample without syncing anything')
+    parser.add_argument('--batch-size', type=int, default=1000, help='Fetch (page) size for token range scans')
+    parser.add_argument('--splits', type=int, default=64, help='Minimum number of token ranges to split the ring into')
+    parser.add_argument('--scan-workers', type=int, default=4, help='Token ranges scanned in parallel (shared by all tables)')
+    parser.add_argument('--max-pages-per-second', type=float, default=0.0,
+                        help='Cap on pages fetched from Cassandra per second across scan workers (0 = unlimited)')
+    parser.add_argument('--max-ranges-per-node', type=int, default=0,
+                        help='Cap on concurrent range scans coordinated by one Cassandra node (0 = unlimited)')
+    parser.add_argument('--origin-latency-ms', type=float, default=250.0,
+                        help='Page latency on a Cassandra node above which scans of it slow down (0 disables)')
+    parser.add_argument('--max-in-flight', type=int, default=256, help='Upper bound on concurrent writes to Astra DB')
+    parser.add_argument('--target-latency-ms', type=float, default=50.0,
+                        help='Write latency above which the writer backs off')
+    parser.add_argument('--spill-dir', default=None,
+                        help='Memory-map large per-range Astra ID sets from this directory')
+    parser.add_argument('--max-retries', type=int, default=5, help='Retries per row for timeouts and overload errors')
+    parser.add_argument('--checkpoint', default=None,
+                        help="Checkpoint file tracking completed token ranges, one per table with the table name "
+                             "inserted ('' disables; default sync-checkpoint.jsonl, or checkpoint.jsonl in each "
+                             "table's --stage-dir directory when staging)")
+    parser.add_argument('--restart', action='store_true', help='Ignore the checkpoint and sync every range again')
+    parser.add_argument('--failed-only', action='store_true', help='Only re-run ranges the checkpoint marks as failed')
+    parser.add_argument('--ranges', default='', help='Comma-separated START:END token ranges to (re-)sync')
+    parser.add_argument('--validate-workers', type=int, default=8,
+                        help='Parallel range scans per cluster when validating with digests')
+    parser.add_argument('--estimate-ranges', type=int, default=4, help='Token ranges per table sampled by --dry-run')
+    parser.add_argument('--estimate-rows', type=int, default=50000,
+                        help='Maximum rows per table read by the --dry-run sample')
+    parser.add_argument('--probe-writes', type=int, default=0,
+                        help='Writes used by --dry-run to measure Astra DB throughput, sent to a scratch '
+                             'table created and dropped in the first table\'s keyspace (default 0: no probe)')
+    parser.add_argument('--source', choices=('cassandra', 'stage'), default='cassandra',
+                        help='Read rows from the origin cluster or from files staged in --stage-dir')
+    parser.add_argument('--sink', choices=('astra', 'stage'), default='astra',
+                        help='Write rows to Astra DB or to files in --stage-dir')
+    parser.add_argument('--stage-dir', default='sync-stage', help='Directory holding staged token range files')
+    parser.add_argument('--stage-format', choices=FORMATS, default='csv',
+                        help='Staged file format (parquet needs pyarrow)')
+    parser.add_argument('--stage-compression', choices=COMPRESSIONS, default='auto',
+                        help='CSV compression; auto uses zstd when the zstandard package is installed')
+    parser.add_argument('--no-writetime', action='store_true',
+                        help='Write rows with new timestamps instead of their original WRITETIME/TTL '
+                             '(implies --skip-existing)')
+    parser.add_argument('--skip-existing', action='store_true',
+                        help='Pre-scan Astra DB per token range and skip rows that already exist there')
     
     args = parser.parse_args()
     
+    if args.source == 'stage' and args.sink == 'stage':
+        parser.error("--source=stage and --sink=stage together would not move any data")
+    if args.dry_run and (args.source != 'cassandra' or args.sink != 'astra'):
+        parser.error("--dry-run estimates a direct Cassandra to Astra DB sync")
+    
     print("🚀 Starting DataStax Phase 2: Data Migration")
     print("=" * 50)
     
     try:
-        # Connect to both clusters
-        cassandra_cluster, cassandra_session = connect_to_cassandra()
-        astra_cluster, astra_session = connect_to_astra()
+        # Connect only to the clusters this run reads from or writes to; a
+        # load from staged files never touches the origin cluster
+        cassandra_cluster = cassandra_session = astra_cluster = astra_session = None
+        if args.source == 'cassandra':
+            cassandra_cluster, cassandra_session = connect_to_cassandra()
+        if args.sink == 'astra':
+            astra_cluster, astra_session = connect_to_astra()
+        
+        # Resolve the tables to sync and their columns from schema metadata
+        staged = StagedSource(args.stage_dir, args.batch_size) if args.source == 'stage' else None
+        if staged is not None:
+            specs = staged.specs()
+            if args.tables or args.keyspaces:
+                wanted = {t.strip() for t in (args.tables or '').split(',') if t.strip()}
+                keyspaces = {k.strip() for k in (args.keyspaces or '').split(',') if k.strip()}
+                specs = [s for s in specs if s.name in wanted or f"{s.keyspace}.*" in wanted
+                         or s.keyspace in keyspaces or '*' in keyspaces]
+            # The stage decides whether cell timestamps travel with the rows
+            preserve = {staged.manifests[s.name].preserve_writetime for s in specs}
+            if len(preserve) > 1:
+                raise ValueError("Staged tables mix exports with and without WRITETIME; load them separately")
+            preserve_writetime = preserve.pop() if preserve else True
+        else:
+            specs = select_tables(cassandra_cluster, args.tables if args.tables or args.keyspaces else 'demo.users',
+                                  args.keyspaces)
+            preserve_writetime = not args.no_writetime
+        if not specs:
+            raise ValueError("No tables selected to sync")
+        print(f"Tables to sync: {', '.join(spec.name for spec in specs)}")
+        
+        # Origin scans yield to production traffic
+        throttle = None
+        if cassandra_cluster is not None:
+            throttle = OriginThrottle(
+                cassandra_cluster,
+                specs[0].keyspace,
+                max_pages_per_second=args.max_pages_per_second,
+                max_ranges_per_node=args.max_ranges_per_node,
+                latency_threshold_ms=args.origin_latency_ms
+            )
+        
+        # Work out which token ranges of each table still need syncing
+        ring = []
+        def origin_ranges():
+            if not ring:
+                ring.extend(ring_ranges(cassandra_cluster, args.splits))
+            return list(ring)
+        
+        ranges_by_table = {}
+        trackers = {}
+        for spec in specs:
+            path = checkpoint_path(args, spec.name)
+            if path and args.sink == 'stage':
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            checkpoint = Checkpoint(path) if path else None
+            all_ranges = partial(staged.ranges, spec.name) if staged is not None else origin_ranges
+            ranges_by_table[spec.name] = plan_token_ranges(spec.name, all_ranges, args, checkpoint)
+            trackers[spec.name] = RangeTracker(checkpoint)
+        if not any(ranges_by_table.values()):
+            print("✅ Checkpoints show every token range already synced (use --restart to sync again)")
+        
+        if args.dry_run:
+            estimate_sync(cassandra_cluster, cassandra_session, astra_session, specs, ranges_by_table, args, throttle)
+            cassandra_cluster.shutdown()
+            astra_cluster.shutdown()
+            return
         
-        # Fetch data from Cassandra
-        cassandra_data = get_cassandra_data(cassandra_session, args.batch_size)
+        # All tables share one pool of scan workers, largest table first
+        sizes = table_sizes(specs, cassandra_cluster, cassandra_session, staged)
+        items = schedule_ranges(specs, ranges_by_table, sizes, throttle)
+        specs_by_name = {spec.name: spec for spec in specs}
         
-        # Get existing IDs in Astra
-        existing_ids = get_astra_existing_ids(astra_session)
+        # With original timestamps preserved, last-write-wins keeps newer dual
+        # writes intact, so the existing-ID pre-scan is only needed on request
+        # (or when rows are rewritten with fresh timestamps)
+        existing_ids = None
+        if args.sink == 'astra' and (args.skip_existing or not preserve_writetime):
+            # Existing Astra IDs are loaded one token range at a time
+            existing_ids = AstraExistingIds(astra_session, specs_by_name, args.batch_size, spill_dir=args.spill_dir)
+        
+        # Stream rows from the source straight into the sink
+        if staged is not None:
+            pages = staged.pages(items, workers=args.scan_workers, range_filter=existing_ids)
+        else:
+            pages = get_cassandra_data(
+                cassandra_session,
+                specs_by_name,
+                items,
+                args.batch_size,
+                workers=args.scan_workers,
+                range_filter=existing_ids,
+                preserve_writetime=preserve_writetime,
+                throttle=throttle
+            )
+        
+        if args.sink == 'stage':
+            compression = resolve_compression(args.stage_compression)
+            manifests = {spec.name: StageManifest(spec, preserve_writetime, args.stage_format, compression)
+                         for spec in specs}
+            sink = StagingSink(args.stage_dir, manifests)
+        else:
+            sink = AstraSink(astra_session, specs_by_name, args, preserve_writetime)
         
         # Sync data
-        synced_count = sync_data_to_astra(
-            astra_session, 
-            cassandra_data, 
-            existing_ids, 
-            dry_run=args.dry_run
-        )
+        progress = TableProgress(trackers, {name: len(ranges) for name, ranges in ranges_by_table.items()})
+        try:
+            synced_count = sink.sync(pages, progress)
+        finally:
+            progress.close()
+        if len(specs) > 1:
+            print(progress.summary())
         
-        if not args.dry_run and synced_count > 0:
+        if existing_ids is not None:
+            print(f"✅ Skipped {existing_ids.skipped} records already present in Astra DB "
+                  f"({existing_ids.existing} existing Astra records checked)")
+        
+        if synced_count > 0 and args.sink == 'stage':
+            print(f"\n📦 Staged data is ready - load it with: python sync-data.py --source=stage "
+                  f"--stage-dir={args.stage_dir}")
+        elif synced_count > 0 and cassandra_session is None:
+            print("\nℹ️  Loaded from staged files - validation against the origin cluster was skipped")
+        elif synced_count > 0:
             # Validate sync
-            validation_passed = validate_sync(cassandra_session, astra_session)
+            validation_passed = validate_sync(
+                cassandra_cluster,
+                cassandra_session,
+                astra_session,
+                specs,
+                splits=args.splits,
+                workers=args.validate_workers,
+                batch_size=args.batch_size
+            )
             
             if validation_passed:
                 print("\n🎉 Data migration completed successfully!")
@@ -215,9 +683,10 @@ def main():
                 print("Please check the data manually and reconcile any differences")
         
         # Close connections
-        cassandra_cluster.shutdown()
-        astra_cluster.shutdown()
-        
+        for cluster in (cassandra_cluster, astra_cluster):
+            if cluster is not None:
+                cluster.shutdown()
+    
     except Exception as e:
         print(f"❌ Error during data migration: {e}")
         sys.exit(1)
@@ -0,0 +1,3 @@
+"""
+Helpers for scripts/sync-data.py (DataStax Phase 2: Migrate Existing Data)
+"""
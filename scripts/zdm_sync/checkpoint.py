@@ -0,0 +1,209 @@
+"""
+Per-token-range checkpoints so an interrupted sync resumes where it stopped
+"""
+
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from zdm_sync.token_ranges import TokenRange
+
+
+class Checkpoint:
+    """
+    Append-only JSON-lines record of a sync plan and its completed ranges.
+
+    The first line stores the plan (table and token ranges) so a resumed run
+    uses exactly the same ranges regardless of `--splits`; every later line
+    records one range finishing with its row counts and timing. The last line
+    for a range wins.
+
+    Ranges finish on the driver's callback thread, so `record` only buffers
+    the line: a flusher thread writes and fsyncs the buffer every
+    `fsync_interval` seconds, or as soon as `fsync_batch` lines are waiting. A
+    crash loses at most that window of finished ranges, which a resumed run
+    simply syncs again. `close` flushes whatever is left.
+    """
+
+    def __init__(self, path: str, fsync_interval: float = 0.2, fsync_batch: int = 64):
+        self.path = path
+        self.fsync_interval = fsync_interval
+        self.fsync_batch = fsync_batch
+        self.table = None
+        self.plan: List[TokenRange] = []
+        self.records: Dict[TokenRange, Dict] = {}
+        self.lock = threading.Lock()
+        self.write_lock = threading.Lock()
+        self.buffer: List[str] = []
+        self.file = None
+        self.flush_due = threading.Event()
+        self.closing = threading.Event()
+        self.flusher = threading.Thread(target=self._flush_loop, name='sync-checkpoint-fsync', daemon=True)
+        self.flusher.start()
+
+    def load(self) -> bool:
+        """Read an existing checkpoint; returns False when there is none"""
+        if not os.path.exists(self.path):
+            return False
+        with open(self.path, 'r') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # torn final line from a crash
+                if entry.get('type') == 'plan':
+                    self.table = entry['table']
+                    self.plan = [TokenRange(start, end) for start, end in entry['ranges']]
+                elif entry.get('type') == 'range':
+                    self.records[TokenRange(entry['start'], entry['end'])] = entry
+        return bool(self.plan)
+
+    def reset(self):
+        """Discard any previous progress"""
+        with self.write_lock:
+            with self.lock:
+                self.buffer = []
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+            if os.path.exists(self.path):
+                os.remove(self.path)
+        self.table = None
+        self.plan = []
+        self.records = {}
+
+    def start(self, table: str, ranges: List[TokenRange]):
+        """Write the plan header for a new checkpoint"""
+        self.table = table
+        self.plan = list(ranges)
+        self._append({
+            'type': 'plan',
+            'table': table,
+            'ranges': [[r.start, r.end] for r in ranges],
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+        })
+        self.flush()
+
+    def completed(self) -> List[TokenRange]:
+        return [r for r in self.plan if self.records.get(r, {}).get('status') == 'done']
+
+    def failed(self) -> List[TokenRange]:
+        return [r for r in self.plan if self.records.get(r, {}).get('status') == 'failed']
+
+    def pending(self) -> List[TokenRange]:
+        """Ranges of the plan that have not completed successfully"""
+        return [r for r in self.plan if self.records.get(r, {}).get('status') != 'done']
+
+    def record(self, token_range: TokenRange, status: str, rows: int, failed_rows: int, seconds: float):
+        entry = {
+            'type': 'range',
+            'start': token_range.start,
+            'end': token_range.end,
+            'status': status,
+            'rows': rows,
+            'failed_rows': failed_rows,
+            'seconds': round(seconds, 3),
+            'finished_at': datetime.now().isoformat(),
+        }
+        self.records[token_range] = entry
+        self._append(entry)
+
+    def _append(self, entry: Dict):
+        # Safe on the driver's callback thread: the flusher thread writes the line out
+        with self.lock:
+            self.buffer.append(json.dumps(entry) + '\n')
+            if len(self.buffer) >= self.fsync_batch:
+                self.flush_due.set()
+
+    def flush(self):
+        """Write and fsync every buffered line"""
+        with self.write_lock:
+            with self.lock:
+                lines, self.buffer = self.buffer, []
+            if not lines:
+                return
+            if self.file is None:
+                self.file = open(self.path, 'a')
+            self.file.writelines(lines)
+            self.file.flush()
+            os.fsync(self.file.fileno())
+
+    def _flush_loop(self):
+        while not self.closing.is_set():
+            self.flush_due.wait(self.fsync_interval)
+            self.flush_due.clear()
+            self.flush()
+
+    def close(self, timeout: float = 5.0):
+        """Stop the flusher and write out the remaining lines"""
+        self.closing.set()
+        self.flush_due.set()
+        self.flusher.join(timeout)
+        self.flush()
+        with self.write_lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+
+class RangeTracker:
+    """
+    Matches write acknowledgements back to token ranges.
+
+    A range is complete once its scan has finished and every row queued from it
+    has been written or has failed; it is then recorded in the checkpoint as
+    'done' (or 'failed' if any row could not be written).
+    """
+
+    def __init__(self, checkpoint: Optional[Checkpoint] = None):
+        self.checkpoint = checkpoint
+        self.lock = threading.Lock()
+        self.progress: Dict[TokenRange, Dict] = {}
+        self.done_ranges = 0
+        self.failed_ranges: List[TokenRange] = []
+
+    def _state(self, token_range: TokenRange) -> Dict:
+        state = self.progress.get(token_range)
+        if state is None:
+            state = {'queued': 0, 'written': 0, 'failed': 0, 'scanned': False, 'started': time.time()}
+            self.progress[token_range] = state
+        return state
+
+    def rows_queued(self, token_range: TokenRange, count: int):
+        with self.lock:
+            self._state(token_range)['queued'] += count
+
+    def row_done(self, token_range: TokenRange, success: bool):
+        with self.lock:
+            state = self._state(token_range)
+            state['written' if success else 'failed'] += 1
+            self._maybe_complete(token_range, state)
+
+    def scan_finished(self, token_range: TokenRange):
+        with self.lock:
+            state = self._state(token_range)
+            state['scanned'] = True
+            self._maybe_complete(token_range, state)
+
+    def _maybe_complete(self, token_range: TokenRange, state: Dict):
+        if not state['scanned'] or state['written'] + state['failed'] < state['queued']:
+            return
+        del self.progress[token_range]
+        status = 'failed' if state['failed'] else 'done'
+        if status == 'failed':
+            self.failed_ranges.append(token_range)
+        else:
+            self.done_ranges += 1
+        if self.checkpoint is not None:
+            self.checkpoint.record(token_range, status, state['written'], state['failed'],
+                                   time.time() - state['started'])
+
+    def close(self):
+        if self.checkpoint is not None:
+            self.checkpoint.close()
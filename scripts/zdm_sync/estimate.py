@@ -0,0 +1,210 @@
+"""
+Dry-run planning for the sync: project volume and duration from a small sample
+"""
+
+import datetime
+import os
+import time
+import uuid
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from zdm_sync.token_ranges import MAX_TOKEN, MIN_TOKEN, TokenRange, stream_token_ranges
+from zdm_sync.writer import ConcurrentWriter
+
+RING_WIDTH = MAX_TOKEN - MIN_TOKEN
+PROBE_TABLE_PREFIX = 'zdm_sync_write_probe_'
+
+
+def value_bytes(value) -> int:
+    """Rough serialized size of one CQL value"""
+    if value is None:
+        return 0
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, str):
+        return len(value.encode())
+    if isinstance(value, uuid.UUID):
+        return 16
+    if isinstance(value, (bool, int, float, datetime.datetime)):
+        return 8
+    return len(str(value).encode())
+
+
+def size_estimates(cluster, session, keyspace: str, table: str) -> Optional[Tuple[int, int]]:
+    """
+    (partitions, bytes) for keyspace.table from `system.size_estimates`.
+
+    Each node only reports the ranges it owns, so every host is asked directly
+    and ranges are de-duplicated. Returns None when no estimates are available
+    (e.g. the table was never flushed).
+    """
+    query = ("SELECT range_start, range_end, partitions_count, mean_partition_size "
+             "FROM system.size_estimates WHERE keyspace_name = %s AND table_name = %s")
+    estimates = {}
+    for host in cluster.metadata.all_hosts():
+        try:
+            rows = session.execute(query, (keyspace, table), host=host)
+        except Exception as e:
+            print(f"⚠️  No size estimates from {host}: {e}")
+            continue
+        for row in rows:
+            estimates[(row.range_start, row.range_end)] = (row.partitions_count, row.mean_partition_size)
+    if not estimates:
+        return None
+    partitions = sum(count for count, _ in estimates.values())
+    size = sum(count * mean_size for count, mean_size in estimates.values())
+    return partitions, size
+
+
+def sample_ranges(ranges: List[TokenRange], count: int) -> List[TokenRange]:
+    """`count` ranges spread evenly over the planned ranges"""
+    if count >= len(ranges):
+        return list(ranges)
+    step = len(ranges) / count
+    return [ranges[int(i * step)] for i in range(count)]
+
+
+@dataclass
+class ReadSample:
+    rows: int
+    bytes: int
+    seconds: float
+    scanned_width: int  # token width of the ranges scanned to completion
+    writes_per_row: float
+    partitions: int = 0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds > 0 else 0.0
+
+
+def sample_reads(session, query: str, ranges: List[TokenRange], workers: int, fetch_size: int,
+                 max_rows: int, writes_for_row=None, throttle=None, keyspace: Optional[str] = None,
+                 partition_key_columns: int = 1) -> ReadSample:
+    """
+    Scan sample ranges with the sync's own parallelism, stopping after `max_rows`.
+
+    `writes_for_row(row)` returns how many writes the sync would issue for a
+    row (more than one when cells carry different timestamps). Passing the
+    sync's `OriginThrottle` makes the sample reflect throttled throughput.
+    Distinct partitions are counted (keys are the first `partition_key_columns`
+    of each row) to turn partition estimates into row estimates.
+    """
+    rows = size = writes = 0
+    partitions = set()
+    scanned_width = 0
+    started = time.perf_counter()
+    stream = stream_token_ranges(session, query, ranges, workers, fetch_size, throttle=throttle,
+                                 keyspace=keyspace)
+    try:
+        for token_range, page in stream:
+            if page is None:
+                scanned_width += token_range.width
+                continue
+            for row in page:
+                rows += 1
+                size += sum(value_bytes(value) for value in row)
+                writes += writes_for_row(row) if writes_for_row else 1
+                partitions.add(hash(tuple(row[:partition_key_columns])))
+            if rows >= max_rows:
+                break
+    finally:
+        stream.close()
+    seconds = time.perf_counter() - started
+    return ReadSample(rows, size, seconds, scanned_width, writes / rows if rows else 1.0, len(partitions))
+
+
+def probe_writes(session, keyspace: str, count: int, max_in_flight: int, target_latency_ms: float,
+                 row_bytes: int = 256) -> float:
+    """
+    Measure sustainable write throughput on the target without touching its tables.
+
+    Creates a scratch table in `keyspace`, writes `count` rows of about
+    `row_bytes` through the sync's adaptive writer and drops the table again,
+    so nothing - not even a tombstone - lands in the tables being migrated.
+    """
+    table = f"{keyspace}.{PROBE_TABLE_PREFIX}{uuid.uuid4().hex[:8]}"
+    session.execute(f"CREATE TABLE IF NOT EXISTS {table} (id uuid PRIMARY KEY, payload blob)")
+    try:
+        probe = session.prepare(f"INSERT INTO {table} (id, payload) VALUES (?, ?)")
+        writer = ConcurrentWriter(session, probe, max_in_flight=max_in_flight,
+                                  target_latency_ms=target_latency_ms, max_retries=0,
+                                  progress_interval=0, label='Write probe')
+        payload = os.urandom(row_bytes)
+        started = time.perf_counter()
+        for _ in range(count):
+            writer.write((uuid.uuid4(), payload))
+        writer.close()
+        seconds = time.perf_counter() - started
+    finally:
+        session.execute(f"DROP TABLE IF EXISTS {table}")
+    return writer.written / seconds if seconds > 0 else 0.0
+
+
+def format_duration(seconds: float) -> str:
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    if hours:
+        return f"{hours}h {minutes:02d}m"
+    if minutes:
+        return f"{minutes}m {seconds:02d}s"
+    return f"{seconds}s"
+
+
+def format_bytes(size: float) -> str:
+    for unit in ('B', 'KB', 'MB', 'GB', 'TB'):
+        if size < 1024 or unit == 'TB':
+            return f"{size:,.1f} {unit}"
+        size /= 1024
+
+
+def print_estimate(sample: ReadSample, estimates: Optional[Tuple[int, int]], planned_width: int,
+                   write_rate: Optional[float], scan_workers: int,
+                   max_in_flight: int) -> Optional[Tuple[float, float]]:
+    """
+    Project total rows, bytes and wall-clock time for the planned ranges and
+    return (rows, seconds) when both could be projected
+    """
+    fraction = planned_width / RING_WIDTH
+    if estimates is not None:
+        # size_estimates counts partitions; the sample gives rows per partition
+        rows_per_partition = sample.rows / sample.partitions if sample.partitions else 1.0
+        rows = estimates[0] * rows_per_partition * fraction
+        size = estimates[1] * fraction
+        source = "system.size_estimates"
+    elif sample.scanned_width:
+        scale = planned_width / sample.scanned_width
+        rows, size = sample.rows * scale, sample.bytes * scale
+        source = "sample extrapolation"
+    else:
+        rows = size = None
+        source = None
+
+    print("📐 DRY RUN - Migration estimate")
+    print(f"  Sample: {sample.rows} rows in {sample.seconds:.1f}s "
+          f"({sample.rows_per_second:,.0f} rows/s with {scan_workers} parallel scans)")
+    if sample.rows:
+        print(f"  Mean row size: {format_bytes(sample.bytes / sample.rows)}, "
+              f"{sample.writes_per_row:.2f} writes per row")
+    if write_rate is not None:
+        print(f"  Write probe: {write_rate:,.0f} writes/s (max {max_in_flight} in flight)")
+    if rows is None:
+        print("  ⚠️  No size estimates and no sample range finished - cannot project volume "
+              "(raise --estimate-rows or flush the origin table)")
+        return None
+    print(f"  Planned ranges cover {fraction:.1%} of the ring")
+    print(f"  Projected volume ({source}): {rows:,.0f} rows, {format_bytes(size)}")
+
+    rates = [sample.rows_per_second]
+    if write_rate:
+        rates.append(write_rate / sample.writes_per_row)
+    row_rate = min(rate for rate in rates if rate > 0) if any(rates) else 0.0
+    if not row_rate:
+        print("  ⚠️  No throughput measured - cannot project duration")
+        return None
+    bottleneck = 'reads' if row_rate == sample.rows_per_second else 'writes'
+    print(f"  Projected throughput: {row_rate:,.0f} rows/s (bound by {bottleneck})")
+    print(f"  Projected wall-clock time: {format_duration(rows / row_rate)}")
+    return rows, rows / row_rate
@@ -0,0 +1,151 @@
+"""
+Compact, read-only sets of UUID primary keys for the sync's dedup step
+"""
+
+import heapq
+import mmap
+import tempfile
+from array import array
+from bisect import bisect_left
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional
+
+MASK_64 = (1 << 64) - 1
+
+
+class _Run:
+    """One sorted chunk of ids: two parallel arrays, or a memory-mapped file holding them"""
+
+    def __init__(self, high: array, low: array, spill_dir: Optional[str] = None):
+        self.count = len(high)
+        self.file = self.mmap = None
+        self.high, self.low = high, low
+        if spill_dir is not None:
+            self.spill(spill_dir)
+
+    def spill(self, spill_dir: str):
+        self.file = tempfile.TemporaryFile(dir=spill_dir)
+        self.high.tofile(self.file)
+        self.low.tofile(self.file)
+        self.file.flush()
+        self.high = self.low = None
+
+    def values(self) -> Iterator[int]:
+        if self.file is None:
+            yield from ((high << 64) | low for high, low in zip(self.high, self.low))
+            return
+        self.mmap = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self.mmap).cast('Q')
+        try:
+            for i in range(self.count):
+                yield (view[i] << 64) | view[self.count + i]
+        finally:
+            view.release()
+
+    def close(self):
+        if self.mmap is not None:
+            self.mmap.close()
+        if self.file is not None:
+            self.file.close()
+        self.high = self.low = self.mmap = self.file = None
+
+
+class CompactIdSet:
+    """
+    Sorted set of UUIDs stored as two parallel 64-bit arrays (16 bytes per id,
+    versus 100+ bytes for a `uuid.UUID` in a Python `set`).
+
+    Ids are read `chunk_size` at a time; each chunk is sorted into a run and
+    the runs are merged, so the only Python objects alive at once are one
+    chunk's worth. Membership is a binary search on the high halves.
+
+    When `spill_dir` is given and more than `spill_threshold` ids have been
+    read, runs already loaded and every later run go to temporary files, and
+    the merged set is written to one memory-mapped file, so the page cache,
+    not the process heap, holds the ids. Without spilling, merging several
+    runs briefly needs 32 bytes per id.
+    """
+
+    def __init__(self, ids: Iterable, spill_dir: Optional[str] = None, spill_threshold: int = 1_000_000,
+                 chunk_size: int = 65_536):
+        self._mmap = None
+        self._file = None
+        self._views = []
+        runs: List[_Run] = []
+        count = 0
+        spilling = False
+        ids = iter(ids)
+        try:
+            while True:
+                chunk = sorted(uid.int for uid in islice(ids, chunk_size))
+                if not chunk:
+                    break
+                count += len(chunk)
+                if spill_dir and not spilling and count > spill_threshold:
+                    spilling = True
+                    for run in runs:
+                        run.spill(spill_dir)
+                high = array('Q', (value >> 64 for value in chunk))
+                low = array('Q', (value & MASK_64 for value in chunk))
+                del chunk
+                runs.append(_Run(high, low, spill_dir if spilling else None))
+
+            if spilling:
+                self._merge_to_file(runs, count, spill_dir)
+            elif len(runs) == 1:
+                self.high, self.low = runs[0].high, runs[0].low
+            else:
+                self.high, self.low = array('Q'), array('Q')
+                for value in heapq.merge(*(run.values() for run in runs)):
+                    self.high.append(value >> 64)
+                    self.low.append(value & MASK_64)
+        finally:
+            for run in runs:
+                run.close()
+        if not runs:
+            self.high, self.low = array('Q'), array('Q')
+
+    def _merge_to_file(self, runs: List[_Run], count: int, spill_dir: str):
+        self._file = tempfile.TemporaryFile(dir=spill_dir)
+        self._file.truncate(count * 16)
+        self._mmap = mmap.mmap(self._file.fileno(), count * 16)
+        view = memoryview(self._mmap).cast('Q')
+        for i, value in enumerate(heapq.merge(*(run.values() for run in runs))):
+            view[i] = value >> 64
+            view[count + i] = value & MASK_64
+        self._mmap.flush()
+        high, low = view[:count], view[count:]
+        self.high, self.low = high.toreadonly(), low.toreadonly()
+        self._views = [self.high, self.low, high, low, view]
+
+    @property
+    def spilled(self) -> bool:
+        return self._mmap is not None
+
+    def __contains__(self, uid) -> bool:
+        value = uid.int
+        high, low = value >> 64, value & MASK_64
+        index = bisect_left(self.high, high)
+        while index < len(self.high) and self.high[index] == high:
+            if self.low[index] == low:
+                return True
+            index += 1
+        return False
+
+    def __len__(self) -> int:
+        return len(self.high)
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.high) * 16
+
+    def close(self):
+        """Release the memory map (if spilled) and the arrays"""
+        if self._mmap is not None:
+            for view in self._views:
+                view.release()
+            self._views = []
+            self._mmap.close()
+            self._file.close()
+            self._mmap = self._file = None
+        self.high = self.low = array('Q')
@@ -0,0 +1,352 @@
+"""
+File staging between clusters: export token ranges to compressed files, load them later
+
+A stage directory holds one sub-directory per table, each with one file per
+token range plus a `manifest.json` describing the table, the staged columns,
+their CQL types and the file format. Files are written under a temporary name
+and renamed once their range is complete, so a stage never contains partial
+ranges.
+
+Formats:
+  csv      CSV compressed with zstd (`zstandard` package) or gzip
+  parquet  Parquet with zstd column compression (`pyarrow` package)
+"""
+
+import csv
+import datetime
+import gzip
+import io
+import json
+import os
+import uuid
+from collections import namedtuple
+from decimal import Decimal
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from zdm_sync.tables import TableRange, TableSpec
+from zdm_sync.token_ranges import TokenRange, stream_ranges
+
+# CSV cells: NULL is written as \N; text that starts with a backslash gets one more,
+# so a real '\N' value is staged as '\\N' and cannot be mistaken for NULL
+NULL = '\\N'
+ESCAPE = '\\'
+FORMATS = ('csv', 'parquet')
+COMPRESSIONS = ('auto', 'zstd', 'gzip')
+MANIFEST = 'manifest.json'
+
+INTEGER_TYPES = {'tinyint', 'smallint', 'int', 'bigint', 'varint', 'counter'}
+TEXT_TYPES = {'text', 'varchar', 'ascii', 'inet'}
+
+
+def _encode(value) -> str:
+    if value is None:
+        return NULL
+    if isinstance(value, (bytes, bytearray)):
+        return value.hex()
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    if isinstance(value, str) and value.startswith(ESCAPE):
+        return ESCAPE + value
+    return str(value)
+
+
+def _decode_cell(decode, text: str, escaped: bool = True):
+    """Inverse of `_encode`; stages written before escaping (`escaped` False) only know NULL"""
+    if text == NULL:
+        return None
+    if escaped and text.startswith(ESCAPE):
+        text = text[1:]
+    return decode(text)
+
+
+def _decoder(cql_type: str):
+    """Parse a staged CSV cell back into the driver's Python type"""
+    if cql_type in ('uuid', 'timeuuid'):
+        return uuid.UUID
+    if cql_type in INTEGER_TYPES:
+        return int
+    if cql_type in ('float', 'double'):
+        return float
+    if cql_type == 'decimal':
+        return Decimal
+    if cql_type == 'boolean':
+        return lambda text: text == 'True'
+    if cql_type == 'blob':
+        return bytes.fromhex
+    if cql_type == 'timestamp':
+        return datetime.datetime.fromisoformat
+    if cql_type in TEXT_TYPES:
+        return str
+    raise ValueError(f"CQL type '{cql_type}' cannot be staged (only scalar columns are supported)")
+
+
+def _arrow_type(pa, cql_type: str):
+    if cql_type in ('uuid', 'timeuuid', 'decimal') or cql_type in TEXT_TYPES:
+        return pa.string()
+    if cql_type in ('tinyint', 'smallint', 'int'):
+        return pa.int32()
+    if cql_type in INTEGER_TYPES:
+        return pa.int64()
+    if cql_type == 'float':
+        return pa.float32()
+    if cql_type == 'double':
+        return pa.float64()
+    if cql_type == 'boolean':
+        return pa.bool_()
+    if cql_type == 'blob':
+        return pa.binary()
+    if cql_type == 'timestamp':
+        return pa.timestamp('ms')
+    raise ValueError(f"CQL type '{cql_type}' cannot be staged (only scalar columns are supported)")
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError("Parquet staging needs pyarrow: pip install pyarrow")
+    return pyarrow, pyarrow.parquet
+
+
+def _import_zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        raise RuntimeError("zstd staging needs zstandard: pip install zstandard (or use --stage-compression=gzip)")
+    return zstandard
+
+
+def resolve_compression(compression: str) -> str:
+    """'auto' picks zstd when the zstandard package is installed, else gzip"""
+    if compression != 'auto':
+        return compression
+    try:
+        import zstandard  # noqa: F401
+        return 'zstd'
+    except ImportError:
+        return 'gzip'
+
+
+class StageManifest:
+    """Table layout (a TableSpec), staged columns and file format of one table's stage directory"""
+
+    def __init__(self, spec: TableSpec, preserve_writetime: bool, file_format: str, compression: str,
+                 escaped: bool = True):
+        self.spec = spec
+        self.escaped = escaped  # CSV text cells escape a leading backslash (see `_encode`)
+        self.preserve_writetime = preserve_writetime
+        self.columns = spec.row_columns(preserve_writetime)
+        self.file_format = file_format
+        self.compression = compression
+        self.row_class = namedtuple('StagedRow', [name for name, _ in self.columns])
+        for name, cql_type in self.columns:
+            try:
+                _decoder(cql_type)
+            except ValueError as e:
+                raise ValueError(f"{spec.name}.{name}: {e}")
+
+    @property
+    def suffix(self) -> str:
+        return '.parquet' if self.file_format == 'parquet' else f".csv.{'zst' if self.compression == 'zstd' else 'gz'}"
+
+    def path(self, table_dir: str, token_range: TokenRange) -> str:
+        return os.path.join(table_dir, f"range_{token_range.start}_{token_range.end}{self.suffix}")
+
+    def save(self, table_dir: str):
+        with open(os.path.join(table_dir, MANIFEST), 'w') as f:
+            json.dump({'spec': self.spec.to_dict(), 'preserve_writetime': self.preserve_writetime,
+                       'columns': self.columns, 'format': self.file_format,
+                       'compression': self.compression, 'escaped': self.escaped}, f, indent=2)
+
+    @classmethod
+    def load(cls, table_dir: str) -> 'StageManifest':
+        path = os.path.join(table_dir, MANIFEST)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No staged data found: {path} is missing")
+        with open(path, 'r') as f:
+            data = json.load(f)
+        return cls(TableSpec.from_dict(data['spec']), data['preserve_writetime'],
+                   data['format'], data['compression'], data.get('escaped', False))
+
+
+def table_dir(stage_dir: str, table: str) -> str:
+    """Each table is staged in its own `<stage_dir>/<keyspace>.<table>` directory"""
+    return os.path.join(stage_dir, table)
+
+
+class _CsvRangeWriter:
+    def __init__(self, path: str, compression: str):
+        if compression == 'zstd':
+            raw = open(path, 'wb')
+            stream = _import_zstandard().ZstdCompressor(level=3).stream_writer(raw)
+            self.file = io.TextIOWrapper(stream, encoding='utf-8', newline='')
+        else:
+            self.file = gzip.open(path, 'wt', encoding='utf-8', newline='', compresslevel=6)
+        self.writer = csv.writer(self.file)
+
+    def write(self, rows: List):
+        self.writer.writerows([_encode(value) for value in row] for row in rows)
+
+    def close(self):
+        self.file.close()
+
+
+class _ParquetRangeWriter:
+    def __init__(self, path: str, columns: List[Tuple[str, str]]):
+        self.pa, parquet = _import_pyarrow()
+        self.columns = columns
+        self.schema = self.pa.schema([(name, _arrow_type(self.pa, cql_type)) for name, cql_type in columns])
+        self.text_columns = {i for i, (_, cql_type) in enumerate(columns) if cql_type in ('uuid', 'timeuuid', 'decimal')}
+        self.writer = parquet.ParquetWriter(path, self.schema, compression='zstd')
+
+    def write(self, rows: List):
+        arrays = []
+        for i in range(len(self.columns)):
+            values = [row[i] for row in rows]
+            if i in self.text_columns:
+                values = [None if value is None else str(value) for value in values]
+            arrays.append(self.pa.array(values, type=self.schema.field(i).type))
+        self.writer.write_table(self.pa.Table.from_arrays(arrays, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+class StagingSink:
+    """
+    Writes streamed `(TableRange, rows)` pages to one staged file per table
+    token range, reporting rows to the tracker as they are written so staged
+    ranges are checkpointed like synced ones.
+    """
+
+    def __init__(self, stage_dir: str, manifests: Dict[str, StageManifest]):
+        self.stage_dir = stage_dir
+        self.manifests = manifests
+        for table, manifest in manifests.items():
+            os.makedirs(table_dir(stage_dir, table), exist_ok=True)
+            manifest.save(table_dir(stage_dir, table))
+        self.open_files: Dict[TableRange, object] = {}
+        self.rows = 0
+        self.files = 0
+
+    def _path(self, item: TableRange) -> str:
+        return self.manifests[item.table].path(table_dir(self.stage_dir, item.table), item.token_range)
+
+    def _writer(self, item: TableRange):
+        writer = self.open_files.get(item)
+        if writer is None:
+            manifest = self.manifests[item.table]
+            path = self._path(item) + '.tmp'
+            if manifest.file_format == 'parquet':
+                writer = _ParquetRangeWriter(path, manifest.columns)
+            else:
+                writer = _CsvRangeWriter(path, manifest.compression)
+            self.open_files[item] = writer
+        return writer
+
+    def sync(self, pages, tracker) -> int:
+        first = next(iter(self.manifests.values()))
+        print(f"Staging records to {self.stage_dir} ({first.file_format}"
+              + ("" if first.file_format == 'parquet' else f", {first.compression}") + ")...")
+        try:
+            for item, rows in pages:
+                if rows is None:
+                    # Empty ranges still get a file so the stage covers them
+                    self._writer(item).close()
+                    del self.open_files[item]
+                    os.replace(self._path(item) + '.tmp', self._path(item))
+                    self.files += 1
+                    tracker.scan_finished(item)
+                    continue
+                self._writer(item).write(rows)
+                tracker.rows_queued(item, len(rows))
+                for _ in rows:
+                    tracker.row_done(item, True)
+                self.rows += len(rows)
+        finally:
+            for writer in self.open_files.values():
+                writer.close()
+            self.open_files.clear()
+        size = 0
+        for table, manifest in self.manifests.items():
+            directory = table_dir(self.stage_dir, table)
+            size += sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory)
+                        if name.endswith(manifest.suffix))
+        print(f"✅ Staged {self.rows} records in {self.files} range files ({size / 1024 / 1024:,.1f} MB on disk)")
+        return self.rows
+
+
+class StagedSource:
+    """Reads table token ranges back from a stage directory, in parallel like a cluster scan"""
+
+    def __init__(self, stage_dir: str, batch_size: int = 1000):
+        self.stage_dir = stage_dir
+        self.batch_size = batch_size
+        self.manifests: Dict[str, StageManifest] = {}
+        if os.path.isdir(stage_dir):
+            for name in sorted(os.listdir(stage_dir)):
+                if os.path.exists(os.path.join(stage_dir, name, MANIFEST)):
+                    self.manifests[name] = StageManifest.load(os.path.join(stage_dir, name))
+        if not self.manifests:
+            raise FileNotFoundError(f"No staged tables found in {stage_dir}")
+
+    def specs(self) -> List[TableSpec]:
+        return [manifest.spec for manifest in self.manifests.values()]
+
+    def ranges(self, table: str) -> List[TokenRange]:
+        """Every token range of `table` with a complete staged file"""
+        manifest = self.manifests[table]
+        prefix, suffix = 'range_', manifest.suffix
+        ranges = []
+        for name in os.listdir(table_dir(self.stage_dir, table)):
+            if name.startswith(prefix) and name.endswith(suffix):
+                start, end = name[len(prefix):-len(suffix)].split('_')
+                ranges.append(TokenRange(int(start), int(end)))
+        return sorted(ranges)
+
+    def _scan_csv(self, manifest: StageManifest, path: str) -> Iterator[list]:
+        decoders = [_decoder(cql_type) for _, cql_type in manifest.columns]
+        row_class = manifest.row_class
+        if manifest.compression == 'zstd':
+            raw = open(path, 'rb')
+            file = io.TextIOWrapper(_import_zstandard().ZstdDecompressor().stream_reader(raw),
+                                    encoding='utf-8', newline='')
+        else:
+            file = gzip.open(path, 'rt', encoding='utf-8', newline='')
+        with file:
+            page = []
+            for record in csv.reader(file):
+                page.append(row_class(*(_decode_cell(decode, text, manifest.escaped)
+                                        for decode, text in zip(decoders, record))))
+                if len(page) >= self.batch_size:
+                    yield page
+                    page = []
+            if page:
+                yield page
+
+    def _scan_parquet(self, manifest: StageManifest, path: str) -> Iterator[list]:
+        _, parquet = _import_pyarrow()
+        converters = [uuid.UUID if cql_type in ('uuid', 'timeuuid') else Decimal if cql_type == 'decimal' else None
+                      for _, cql_type in manifest.columns]
+        row_class = manifest.row_class
+        for batch in parquet.ParquetFile(path).iter_batches(batch_size=self.batch_size):
+            columns = [
+                column if convert is None else [None if value is None else convert(value) for value in column]
+                for column, convert in zip(batch.to_pydict().values(), converters)
+            ]
+            yield [row_class(*values) for values in zip(*columns)]
+
+    def scan(self, item: TableRange) -> Iterator[list]:
+        manifest = self.manifests[item.table]
+        path = manifest.path(table_dir(self.stage_dir, item.table), item.token_range)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Token range {item.token_range} of {item.table} is not staged ({path})")
+        if manifest.file_format == 'parquet':
+            return self._scan_parquet(manifest, path)
+        return self._scan_csv(manifest, path)
+
+    def pages(self, items: List[TableRange], workers: int = 4,
+              range_filter=None) -> Iterator[Tuple[TableRange, Optional[list]]]:
+        print(f"Streaming staged data from {self.stage_dir} ({len(items)} token ranges, {workers} parallel readers)...")
+        return stream_ranges(self.scan, items, workers, range_filter=range_filter)
@@ -0,0 +1,250 @@
+"""
+Table discovery and per-table scheduling for multi-table syncs
+"""
+
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from cassandra.metadata import protect_name
+
+from zdm_sync.checkpoint import RangeTracker
+from zdm_sync.token_ranges import TokenRange, range_query
+
+SYSTEM_KEYSPACES = {
+    'system', 'system_auth', 'system_schema', 'system_distributed', 'system_traces',
+    'system_views', 'system_virtual_schema', 'dse_auth', 'dse_insights', 'dse_insights_local',
+    'dse_leases', 'dse_perf', 'dse_security', 'dse_system', 'dse_system_local', 'solr_admin',
+    'data_endpoint_auth',
+}
+
+
+SCALAR_NAMES = {
+    'ascii', 'bigint', 'blob', 'boolean', 'date', 'decimal', 'double', 'duration', 'float', 'inet',
+    'int', 'smallint', 'text', 'time', 'timestamp', 'timeuuid', 'tinyint', 'uuid', 'varchar', 'varint',
+}
+
+
+def is_multi_cell(cql_type: str) -> bool:
+    """Non-frozen collections and UDTs, whose cells have no single WRITETIME"""
+    lowered = cql_type.lower()
+    return not lowered.startswith('frozen<') and ('<' in lowered or lowered not in SCALAR_NAMES)
+
+
+@dataclass
+class TableSpec:
+    """
+    Columns of one table in the order the sync reads them: primary key
+    columns, then value columns (each followed by its WRITETIME and TTL when
+    timestamps are preserved), then multi-cell columns read without timestamps.
+    """
+    keyspace: str
+    table: str
+    partition_key: List[str]
+    key_columns: List[str]
+    value_columns: List[str]
+    multi_cell_columns: List[str] = field(default_factory=list)
+    types: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def name(self) -> str:
+        return f"{self.keyspace}.{self.table}"
+
+    @property
+    def qualified(self) -> str:
+        return f"{protect_name(self.keyspace)}.{protect_name(self.table)}"
+
+    @property
+    def token_columns(self) -> str:
+        return ', '.join(protect_name(c) for c in self.partition_key)
+
+    @property
+    def data_columns(self) -> List[str]:
+        return self.key_columns + self.value_columns + self.multi_cell_columns
+
+    def select_cql(self, preserve_writetime: bool = True) -> str:
+        """Range-scan query returning rows in the layout described above"""
+        selectors = [protect_name(c) for c in self.key_columns]
+        for column in self.value_columns:
+            name = protect_name(column)
+            selectors += [name, f"WRITETIME({name})", f"TTL({name})"] if preserve_writetime else [name]
+        selectors += [protect_name(c) for c in self.multi_cell_columns]
+        return range_query(f"SELECT {', '.join(selectors)} FROM {self.qualified}", self.token_columns)
+
+    def plain_select_cql(self) -> str:
+        """Unrestricted SELECT of the table's data columns (digest validation)"""
+        return f"SELECT {', '.join(protect_name(c) for c in self.data_columns)} FROM {self.qualified}"
+
+    @property
+    def insert_cql(self) -> str:
+        columns = self.data_columns
+        return (f"INSERT INTO {self.qualified} ({', '.join(protect_name(c) for c in columns)}) "
+                f"VALUES ({', '.join('?' for _ in columns)})")
+
+    def row_columns(self, preserve_writetime: bool = True) -> List[Tuple[str, str]]:
+        """(name, CQL type) of every column of a scanned row, named as the driver names them"""
+        columns = [(c, self.types.get(c, 'text')) for c in self.key_columns]
+        for column in self.value_columns:
+            columns.append((column, self.types.get(column, 'text')))
+            if preserve_writetime:
+                columns += [(f"writetime_{column}", 'bigint'), (f"ttl_{column}", 'int')]
+        columns += [(c, self.types.get(c, 'text')) for c in self.multi_cell_columns]
+        return columns
+
+    def to_dict(self) -> Dict:
+        return {
+            'keyspace': self.keyspace, 'table': self.table, 'partition_key': self.partition_key,
+            'key_columns': self.key_columns, 'value_columns': self.value_columns,
+            'multi_cell_columns': self.multi_cell_columns, 'types': self.types,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'TableSpec':
+        return cls(**data)
+
+
+def table_spec(cluster, keyspace: str, table: str) -> TableSpec:
+    """Build a TableSpec from the driver's schema metadata (read from system_schema)"""
+    keyspace_meta = cluster.metadata.keyspaces.get(keyspace)
+    if keyspace_meta is None or table not in keyspace_meta.tables:
+        raise ValueError(f"Table '{keyspace}.{table}' not found in cluster metadata")
+    table_meta = keyspace_meta.tables[table]
+    key_columns = [c.name for c in table_meta.primary_key]
+    types = {name: column.cql_type for name, column in table_meta.columns.items()}
+    if any(cql_type == 'counter' for cql_type in types.values()):
+        raise ValueError(f"Table '{keyspace}.{table}' is a counter table; counters cannot be copied with INSERT")
+    regular = [name for name in table_meta.columns if name not in key_columns]
+    return TableSpec(
+        keyspace,
+        table,
+        [c.name for c in table_meta.partition_key],
+        key_columns,
+        [c for c in regular if not is_multi_cell(types[c])],
+        [c for c in regular if is_multi_cell(types[c])],
+        types
+    )
+
+
+def select_tables(cluster, tables: Optional[str], keyspaces: Optional[str]) -> List[TableSpec]:
+    """
+    Resolve `--tables` ("ks.table" or "ks.*", comma-separated) and `--keyspaces`
+    ("ks1,ks2" or "*" for every non-system keyspace) into TableSpecs. Counter
+    tables found by discovery are skipped with a warning.
+    """
+    metadata = cluster.metadata
+    names: List[Tuple[str, str]] = []
+    if keyspaces:
+        wanted = ([k for k in metadata.keyspaces if k not in SYSTEM_KEYSPACES] if keyspaces.strip() == '*'
+                  else [k.strip() for k in keyspaces.split(',') if k.strip()])
+        for keyspace in wanted:
+            if keyspace not in metadata.keyspaces:
+                raise ValueError(f"Keyspace '{keyspace}' not found in cluster metadata")
+            names += [(keyspace, table) for table in metadata.keyspaces[keyspace].tables]
+    for entry in (tables or '').split(','):
+        if not entry.strip():
+            continue
+        keyspace, _, table = entry.strip().partition('.')
+        if table == '*':
+            if keyspace not in metadata.keyspaces:
+                raise ValueError(f"Keyspace '{keyspace}' not found in cluster metadata")
+            names += [(keyspace, t) for t in metadata.keyspaces[keyspace].tables]
+        else:
+            names.append((keyspace, table))
+
+    specs, seen = [], set()
+    for keyspace, table in names:
+        if (keyspace, table) in seen:
+            continue
+        seen.add((keyspace, table))
+        try:
+            specs.append(table_spec(cluster, keyspace, table))
+        except ValueError as e:
+            if '.*' in (tables or '') or keyspaces:
+                print(f"⚠️  Skipping {keyspace}.{table}: {e}")
+            else:
+                raise
+    return specs
+
+
+@dataclass(frozen=True, order=True)
+class TableRange:
+    """One unit of sync work: a token range of one table"""
+    table: str
+    token_range: TokenRange
+
+    def __str__(self) -> str:
+        return f"{self.table} {self.token_range}"
+
+
+class TableProgress:
+    """
+    Per-table range trackers (and checkpoints) behind the RangeTracker
+    interface, keyed by TableRange. Prints a line with rows and throughput as
+    each table finishes and a summary table at the end.
+    """
+
+    def __init__(self, trackers: Dict[str, RangeTracker], planned: Dict[str, int]):
+        self.trackers = trackers
+        self.planned = planned
+        self.lock = threading.Lock()
+        self.rows = {table: 0 for table in trackers}
+        self.failed = {table: 0 for table in trackers}
+        self.started: Dict[str, float] = {}
+        self.finished: Dict[str, float] = {}
+
+    def rows_queued(self, item: TableRange, count: int):
+        with self.lock:
+            self.started.setdefault(item.table, time.time())
+        self.trackers[item.table].rows_queued(item.token_range, count)
+
+    def row_done(self, item: TableRange, success: bool):
+        with self.lock:
+            if success:
+                self.rows[item.table] += 1
+            else:
+                self.failed[item.table] += 1
+        self.trackers[item.table].row_done(item.token_range, success)
+        self._check_finished(item.table)
+
+    def scan_finished(self, item: TableRange):
+        with self.lock:
+            self.started.setdefault(item.table, time.time())
+        self.trackers[item.table].scan_finished(item.token_range)
+        self._check_finished(item.table)
+
+    def _check_finished(self, table: str):
+        tracker = self.trackers[table]
+        with self.lock:
+            if table in self.finished or tracker.done_ranges + len(tracker.failed_ranges) < self.planned[table]:
+                return
+            self.finished[table] = time.time()
+            seconds = self.finished[table] - self.started.get(table, self.finished[table])
+        rate = self.rows[table] / seconds if seconds > 0 else 0.0
+        print(f"✅ {table}: {self.rows[table]} records in {seconds:.1f}s ({rate:,.0f} rows/s), "
+              f"{tracker.done_ranges}/{self.planned[table]} ranges done"
+              + (f", {len(tracker.failed_ranges)} failed" if tracker.failed_ranges else ""), flush=True)
+
+    def close(self):
+        """Flush every table's checkpoint"""
+        for tracker in self.trackers.values():
+            tracker.close()
+
+    @property
+    def done_ranges(self) -> int:
+        return sum(tracker.done_ranges for tracker in self.trackers.values())
+
+    @property
+    def failed_ranges(self) -> List[TableRange]:
+        return [TableRange(table, token_range) for table, tracker in self.trackers.items()
+                for token_range in tracker.failed_ranges]
+
+    def summary(self) -> str:
+        lines = [f"  {'table':<32} {'rows':>10} {'failed':>7} {'ranges':>9} {'seconds':>8} {'rows/s':>9}"]
+        now = time.time()
+        for table, tracker in self.trackers.items():
+            seconds = self.finished.get(table, now) - self.started.get(table, now)
+            rate = self.rows[table] / seconds if seconds > 0 else 0.0
+            lines.append(f"  {table:<32} {self.rows[table]:>10} {self.failed[table]:>7} "
+                         f"{tracker.done_ranges:>4}/{self.planned[table]:<4} {seconds:>8.1f} {rate:>9,.0f}")
+        return "\n".join(lines)
@@ -0,0 +1,161 @@
+"""
+Origin-side throttling for the sync's range scans, so the migration does not
+degrade production traffic on the origin Cassandra cluster
+"""
+
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from zdm_sync.token_ranges import TokenRange
+
+
+class OriginThrottle:
+    """
+    Paces page fetches against the origin cluster.
+
+    - `max_pages_per_second` caps the page rate over all scan workers (token bucket).
+    - `max_ranges_per_node` caps concurrent range scans coordinated by one node;
+      each range is sent straight to the replica with the fewest active scans
+      and lowest recent latency, so scans spread over the least loaded nodes.
+      Pinned scans fall back to the driver's load balancing when their replica
+      is down or times out (see `scan_pages`).
+    - When a node's page latency (EWMA) rises above `latency_threshold_ms`,
+      every page of a range owned by it is preceded by a growing pause, which
+      decays again once latency recovers. Production reads raising latency
+      therefore slow the migration down automatically. Without
+      `max_ranges_per_node` ranges are not pinned: the driver routes them and
+      latency is attributed to a replica of the range.
+
+    Without token metadata the per-node features are skipped and only the page
+    rate and latency pause apply (per cluster rather than per node).
+    """
+
+    def __init__(self, cluster=None, keyspace: str = 'demo', max_pages_per_second: float = 0.0,
+                 max_ranges_per_node: int = 0, latency_threshold_ms: float = 0.0, max_pause: float = 2.0):
+        self.token_map = cluster.metadata.token_map if cluster is not None else None
+        self.keyspace = keyspace
+        self.max_pages_per_second = max_pages_per_second
+        self.max_ranges_per_node = max_ranges_per_node
+        self.latency_threshold = latency_threshold_ms / 1000.0
+        self.max_pause = max_pause
+
+        self.condition = threading.Condition()
+        self.active: Dict[object, int] = defaultdict(int)
+        self.latency: Dict[object, float] = {}
+        self.pause: Dict[object, float] = defaultdict(float)
+        self.tokens = 1.0
+        self.last_refill = time.perf_counter()
+        self.throttled_seconds = 0.0
+        self.slowdowns = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.max_pages_per_second or self.max_ranges_per_node or self.latency_threshold)
+
+    def replicas(self, token_range: TokenRange, keyspace: Optional[str] = None) -> List:
+        if self.token_map is None:
+            return []
+        try:
+            token = self.token_map.token_class(token_range.end)
+            return [host for host in self.token_map.get_replicas(keyspace or self.keyspace, token)
+                    if host.is_up is not False]
+        except Exception:
+            return []
+
+    def order(self, ranges: List, keyspace: Optional[str] = None, key=None) -> List:
+        """
+        Interleave ranges by primary replica so consecutive scans land on
+        different nodes; `key` maps work items to their TokenRange
+        """
+        by_node = defaultdict(list)
+        for token_range in ranges:
+            replicas = self.replicas(key(token_range) if key else token_range, keyspace)
+            by_node[replicas[0] if replicas else None].append(token_range)
+        queues = list(by_node.values())
+        ordered = []
+        while queues:
+            ordered.extend(queue.pop(0) for queue in queues)
+            queues = [queue for queue in queues if queue]
+        return ordered
+
+    @property
+    def pin_replicas(self) -> bool:
+        """Whether scans are sent to the replica `range_scan` yields rather than routed by the driver"""
+        return bool(self.max_ranges_per_node)
+
+    def _score(self, host):
+        return self.active[host], self.latency.get(host, 0.0)
+
+    @contextmanager
+    def range_scan(self, token_range: TokenRange, keyspace: Optional[str] = None):
+        """
+        Reserve a scan slot for `token_range`, yielding the replica its pages
+        are paced and measured against (None without token metadata); when
+        `pin_replicas` is set the pages are also sent to that replica
+        """
+        replicas = self.replicas(token_range, keyspace) if self.max_ranges_per_node or self.latency_threshold else []
+        host = None
+        with self.condition:
+            if replicas:
+                while True:
+                    available = [h for h in replicas
+                                 if not self.max_ranges_per_node or self.active[h] < self.max_ranges_per_node]
+                    if available:
+                        host = min(available, key=self._score)
+                        break
+                    self.condition.wait()
+            self.active[host] += 1
+        try:
+            yield host
+        finally:
+            with self.condition:
+                self.active[host] -= 1
+                self.condition.notify_all()
+
+    def before_page(self, host=None):
+        """Block until the page rate and the host's latency pause allow another fetch"""
+        waited = 0.0
+        if self.max_pages_per_second:
+            with self.condition:
+                while True:
+                    now = time.perf_counter()
+                    self.tokens = min(max(1.0, self.max_pages_per_second),
+                                      self.tokens + (now - self.last_refill) * self.max_pages_per_second)
+                    self.last_refill = now
+                    if self.tokens >= 1.0:
+                        self.tokens -= 1.0
+                        break
+                    delay = (1.0 - self.tokens) / self.max_pages_per_second
+                    self.condition.wait(delay)
+                    waited += delay
+        pause = self.pause.get(host, 0.0)
+        if pause:
+            time.sleep(pause)
+            waited += pause
+        if waited:
+            with self.condition:
+                self.throttled_seconds += waited
+
+    def page_done(self, host, seconds: float):
+        """Feed one page's fetch latency back into the host's pause"""
+        if not self.latency_threshold:
+            return
+        with self.condition:
+            previous = self.latency.get(host)
+            latency = seconds if previous is None else 0.8 * previous + 0.2 * seconds
+            self.latency[host] = latency
+            if latency > self.latency_threshold:
+                if self.pause[host] < self.max_pause:
+                    self.slowdowns += 1
+                self.pause[host] = min(self.max_pause, max(0.05, self.pause[host] * 2))
+            elif self.pause[host]:
+                self.pause[host] = self.pause[host] * 0.8 if self.pause[host] > 0.005 else 0.0
+
+    def summary(self) -> Optional[str]:
+        if not self.enabled:
+            return None
+        return (f"Origin throttle: waited {self.throttled_seconds:.1f}s across scan workers, "
+                f"{self.slowdowns} latency slowdowns")
@@ -0,0 +1,91 @@
+"""
+Copy rows with their original write timestamps and TTLs
+
+Cassandra resolves concurrent writes per cell by timestamp (last write wins).
+Re-inserting a migrated row with the *original* WRITETIME means a newer value
+written by the application through the ZDM proxy always wins, whichever of the
+two writes reaches Astra DB first, so the sync no longer needs to skip rows
+that already exist on the target.
+"""
+
+import threading
+from collections import defaultdict
+from typing import List, Sequence, Tuple
+
+from cassandra.metadata import protect_name
+from cassandra.query import UNSET_VALUE
+
+
+class TimestampedInserts:
+    """
+    Turns rows read with `TableSpec.select_cql()` into idempotent
+    `INSERT ... USING TIMESTAMP ? AND TTL ?` writes.
+
+    Cells of one row can carry different timestamps (e.g. an UPDATE of a single
+    column), so value columns are grouped by (writetime, ttl) and each group
+    becomes its own insert. All inserts share one prepared statement over every
+    column; cells outside the group, and null cells, are bound as `UNSET_VALUE`
+    so they are neither written nor turned into tombstones.
+
+    `multi_cell_columns` (non-frozen collections and UDTs) have no single
+    WRITETIME; they are written with the row's newest cell timestamp.
+
+    A row with no timed cell (only its primary key, or only multi-cell
+    columns set) has no original timestamp to copy. Writing it at the current
+    time would resurrect it if the application deleted it through the ZDM
+    proxy meanwhile, so no write is returned; such rows are counted in
+    `untimed_rows`, with the first keys kept in `untimed_keys`.
+    """
+
+    def __init__(self, session, table: str, key_columns: Sequence[str], value_columns: Sequence[str],
+                 multi_cell_columns: Sequence[str] = (), untimed_key_samples: int = 10):
+        self.session = session
+        self.table = table
+        self.key_columns = list(key_columns)
+        self.value_columns = list(value_columns)
+        self.multi_cell_columns = list(multi_cell_columns)
+        self.statement = None
+        self.lock = threading.Lock()
+        self.untimed_rows = 0
+        self.untimed_keys: List[tuple] = []
+        self.untimed_key_samples = untimed_key_samples
+
+    def _statement(self):
+        if self.statement is None:
+            with self.lock:
+                if self.statement is None:
+                    names = self.key_columns + self.value_columns + self.multi_cell_columns
+                    statement = self.session.prepare(
+                        f"INSERT INTO {self.table} ({', '.join(protect_name(c) for c in names)}) "
+                        f"VALUES ({', '.join('?' for _ in names)}) USING TIMESTAMP ? AND TTL ?")
+                    statement.is_idempotent = True
+                    self.statement = statement
+        return self.statement
+
+    def writes(self, row) -> List[Tuple[object, tuple]]:
+        """(statement, params) pairs that recreate `row` on the target; empty for untimed rows"""
+        key = tuple(row[:len(self.key_columns)])
+        groups = defaultdict(dict)
+        offset = len(self.key_columns)
+        for i, column in enumerate(self.value_columns):
+            value, writetime, ttl = row[offset + 3 * i:offset + 3 * i + 3]
+            if value is not None:
+                groups[(writetime, ttl or 0)][column] = value
+
+        if not groups:
+            with self.lock:
+                self.untimed_rows += 1
+                if len(self.untimed_keys) < self.untimed_key_samples:
+                    self.untimed_keys.append(key)
+            return []
+
+        multi_offset = offset + 3 * len(self.value_columns)
+        multi_cells = tuple(UNSET_VALUE if value is None else value for value in row[multi_offset:])
+        newest = max(groups, key=lambda group: group[0] or 0)
+        statement = self._statement()
+        writes = []
+        for (writetime, ttl), cells in groups.items():
+            values = tuple(cells.get(column, UNSET_VALUE) for column in self.value_columns)
+            multi = multi_cells if (writetime, ttl) == newest else (UNSET_VALUE,) * len(multi_cells)
+            writes.append((statement, key + values + multi + (writetime, ttl)))
+        return writes
@@ -0,0 +1,217 @@
+"""
+Token range splitting and parallel range scans for the Cassandra to Astra DB sync
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+from cassandra import OperationTimedOut
+from cassandra.cluster import NoHostAvailable
+
+MIN_TOKEN = -2 ** 63
+MAX_TOKEN = 2 ** 63 - 1
+MURMUR3_PARTITIONER = 'org.apache.cassandra.dht.Murmur3Partitioner'
+
+
+@dataclass(frozen=True, order=True)
+class TokenRange:
+    """Half-open token range (start, end] as used by `token(pk) > ? AND token(pk) <= ?`"""
+    start: int
+    end: int
+
+    @property
+    def width(self) -> int:
+        return self.end - self.start
+
+    def split(self, pieces: int) -> List['TokenRange']:
+        """Split into `pieces` contiguous sub-ranges of (nearly) equal width"""
+        pieces = max(1, min(pieces, self.width))
+        bounds = [self.start + (self.width * i) // pieces for i in range(pieces)] + [self.end]
+        return [TokenRange(bounds[i], bounds[i + 1]) for i in range(pieces)]
+
+    def __str__(self) -> str:
+        return f"({self.start}, {self.end}]"
+
+    @classmethod
+    def parse(cls, text: str) -> 'TokenRange':
+        """Parse 'start:end' (as printed in checkpoints and failure lists)"""
+        start, _, end = text.strip().strip('(]').replace(', ', ':').partition(':')
+        return cls(int(start), int(end))
+
+
+def split_ring(splits: int) -> List[TokenRange]:
+    """Split the whole Murmur3 ring into `splits` equal ranges"""
+    return TokenRange(MIN_TOKEN, MAX_TOKEN).split(splits)
+
+
+def ring_ranges(cluster, splits: int) -> List[TokenRange]:
+    """
+    Split the ring along the cluster's own token boundaries, then subdivide so
+    there are at least `splits` ranges. Node-aligned ranges keep every scan on a
+    single replica set; falls back to an even split when the token map is
+    unavailable or the partitioner is not Murmur3.
+    """
+    metadata = cluster.metadata
+    token_map = metadata.token_map
+    if token_map is None or metadata.partitioner != MURMUR3_PARTITIONER:
+        return split_ring(splits)
+
+    boundaries = sorted({MIN_TOKEN, MAX_TOKEN} | {token.value for token in token_map.ring})
+    node_ranges = [TokenRange(boundaries[i], boundaries[i + 1]) for i in range(len(boundaries) - 1)]
+    total_width = MAX_TOKEN - MIN_TOKEN
+    ranges = []
+    for node_range in node_ranges:
+        pieces = -(-splits * node_range.width // total_width)  # ceiling division
+        ranges.extend(node_range.split(pieces))
+    return ranges
+
+
+def range_query(select_cql: str, partition_key: str) -> str:
+    """Restrict a `SELECT ... FROM ks.table` statement to one token range"""
+    return f"{select_cql} WHERE token({partition_key}) > ? AND token({partition_key}) <= ?"
+
+
+def scan_pages(session, prepared, token_range: TokenRange, fetch_size: int = 1000,
+               throttle=None, keyspace: Optional[str] = None) -> Iterator[list]:
+    """
+    Page through one token range of a prepared `range_query`.
+
+    With an `OriginThrottle`, every page fetch is paced and, when the throttle
+    pins replicas, the range is read from the replica it picks (replicas looked
+    up in `keyspace`). A pinned replica that is down or times out does not fail
+    the range: the page is retried, and the rest of the range read, through the
+    driver's normal load balancing.
+    """
+    statement = prepared.bind((token_range.start, token_range.end))
+    statement.fetch_size = fetch_size
+    if throttle is None:
+        result = session.execute(statement)
+        while True:
+            yield result.current_rows
+            if not result.has_more_pages:
+                break
+            result.fetch_next_page()
+        return
+
+    with throttle.range_scan(token_range, keyspace) as host:
+        pinned = host if throttle.pin_replicas else None
+        result = paging_state = None
+        while True:
+            throttle.before_page(host)
+            started = time.perf_counter()
+            try:
+                if result is None:
+                    result = session.execute(statement, host=pinned)
+                else:
+                    paging_state = result.paging_state
+                    result.fetch_next_page()
+            except (NoHostAvailable, OperationTimedOut):
+                if pinned is None:
+                    raise
+                pinned = None
+                result = session.execute(statement, paging_state=paging_state)
+            throttle.page_done(host, time.perf_counter() - started)
+            yield result.current_rows
+            if not result.has_more_pages:
+                break
+
+
+def stream_token_ranges(session, query: str, ranges: List[TokenRange], workers: int = 4,
+                        fetch_size: int = 1000, queue_pages: Optional[int] = None,
+                        range_filter: Optional[Callable[[TokenRange], Callable]] = None,
+                        throttle=None, keyspace: Optional[str] = None
+                        ) -> Iterator[Tuple[TokenRange, Optional[list]]]:
+    """
+    Scan `ranges` of a Cassandra table in parallel and stream results as they arrive.
+
+    `query` is a `range_query` statement; each range is read with paging, one
+    page of `fetch_size` rows at a time (see `stream_ranges`). An
+    `OriginThrottle` paces page fetches and picks the replica each range is
+    read from.
+    """
+    prepared = session.prepare(query)
+
+    def scan(token_range: TokenRange) -> Iterator[list]:
+        return scan_pages(session, prepared, token_range, fetch_size, throttle, keyspace)
+
+    if throttle is not None:
+        ranges = throttle.order(ranges, keyspace)
+    return stream_ranges(scan, ranges, workers, queue_pages, range_filter)
+
+
+def stream_ranges(scan: Callable[[TokenRange], Iterable[list]], ranges: List[TokenRange], workers: int = 4,
+                  queue_pages: Optional[int] = None,
+                  range_filter: Optional[Callable[[TokenRange], Callable]] = None
+                  ) -> Iterator[Tuple[TokenRange, Optional[list]]]:
+    """
+    Run `scan(token_range)` for `ranges` on `workers` threads and stream pages as they arrive.
+
+    Yields `(token_range, rows)` for every page and `(token_range, None)` once
+    a range is fully scanned. At most `queue_pages` pages (default 2 per
+    worker) are buffered, so memory stays bounded by workers x page size no
+    matter how large the table is.
+
+    `range_filter(token_range)` may return a row predicate (plus an optional
+    `close()` method) that is applied in the scanning thread before rows are
+    queued; it is built just before a range is scanned and closed right after,
+    so per-range state such as an existing-id set is only resident while that
+    range is in flight.
+    """
+    pages = queue.Queue(maxsize=queue_pages or workers * 2)
+    pending = queue.Queue()
+    for token_range in ranges:
+        pending.put(token_range)
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                pages.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def worker():
+        while not stop.is_set():
+            try:
+                token_range = pending.get_nowait()
+            except queue.Empty:
+                return
+            keep = None
+            try:
+                keep = range_filter(token_range) if range_filter else None
+                for rows in scan(token_range):
+                    if keep is not None:
+                        rows = [row for row in rows if keep(row)]
+                    if rows and not put((token_range, list(rows))):
+                        return
+                if not put((token_range, None)):
+                    return
+            except Exception as e:
+                put((token_range, e))
+                return
+            finally:
+                if hasattr(keep, 'close'):
+                    keep.close()
+
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='range-scan')
+    for _ in range(workers):
+        executor.submit(worker)
+
+    remaining = len(ranges)
+    try:
+        while remaining:
+            token_range, rows = pages.get()
+            if isinstance(rows, Exception):
+                raise RuntimeError(f"Scan of token range {token_range} failed: {rows}") from rows
+            if rows is None:
+                remaining -= 1
+            yield token_range, rows
+    finally:
+        stop.set()
+        executor.shutdown(wait=True)
@@ -0,0 +1,194 @@
+"""
+Concurrent, self-throttling writer for loading rows into Astra DB
+"""
+
+import random
+import threading
+import time
+from typing import Callable, List, Optional, Sequence
+
+from cassandra import OperationTimedOut, Unavailable, WriteTimeout
+from cassandra.cluster import NoHostAvailable
+from cassandra.protocol import OverloadedErrorMessage
+
+# Errors that mean "slow down" rather than "this write is broken"
+THROTTLE_ERRORS = (OverloadedErrorMessage,)
+RETRYABLE_ERRORS = (OverloadedErrorMessage, OperationTimedOut, WriteTimeout, Unavailable, NoHostAvailable)
+
+
+def is_throttle_error(error: Exception) -> bool:
+    """Astra rate limiting surfaces as Overloaded errors or 'rate limit' messages"""
+    return isinstance(error, THROTTLE_ERRORS) or 'rate limit' in str(error).lower()
+
+
+def is_retryable(error: Exception) -> bool:
+    return isinstance(error, RETRYABLE_ERRORS) or is_throttle_error(error)
+
+
+def percentile(sorted_values: List[float], quantile: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(quantile * len(sorted_values)))]
+
+
+class ConcurrentWriter:
+    """
+    Writes prepared statements with `execute_async` inside a bounded, adaptive
+    in-flight window.
+
+    The window follows AIMD: it grows by roughly one slot per round trip while
+    latency stays under `target_latency_ms`, shrinks by 10% when latency drifts
+    above it and halves on overload/rate-limit errors. Failed writes are retried
+    with exponential backoff and jitter (the statements must be idempotent,
+    e.g. plain INSERTs); a retrying write keeps its slot so the window also
+    bounds work waiting on backoff. A progress line is printed every
+    `progress_interval` seconds.
+    """
+
+    def __init__(self, session, prepared, max_in_flight: int = 256, min_in_flight: int = 4,
+                 initial_in_flight: int = 32, target_latency_ms: float = 50.0, max_retries: int = 5,
+                 base_backoff: float = 0.05, max_backoff: float = 5.0, progress_interval: float = 1.0,
+                 label: str = 'Astra DB'):
+        self.session = session
+        self.prepared = prepared
+        if prepared is not None:
+            prepared.is_idempotent = True
+        self.max_in_flight = max_in_flight
+        self.min_in_flight = min(min_in_flight, max_in_flight)
+        self.limit = float(max(self.min_in_flight, min(initial_in_flight, max_in_flight)))
+        self.target_latency = target_latency_ms / 1000.0
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.label = label
+
+        self.condition = threading.Condition()
+        self.in_flight = 0
+        self.last_decrease = 0.0
+        self.latency_ewma = None
+        self.written = 0
+        self.failed = 0
+        self.retries = 0
+        self.throttled = 0
+        self.errors: List[str] = []
+        self.interval_latencies: List[float] = []
+        self.started_at = time.time()
+
+        self.stop_progress = threading.Event()
+        self.progress_interval = progress_interval
+        self.progress_thread = None
+        if progress_interval > 0:
+            self.progress_thread = threading.Thread(target=self._progress_loop, name='writer-progress', daemon=True)
+            self.progress_thread.start()
+
+    def write(self, params: Sequence, on_done: Optional[Callable[[bool], None]] = None, statement=None):
+        """
+        Queue one write, blocking while the in-flight window is full.
+
+        `statement` overrides the writer's default prepared statement (it must
+        be idempotent too).
+        """
+        if statement is None:
+            statement = self.prepared
+        with self.condition:
+            while self.in_flight >= int(self.limit):
+                self.condition.wait()
+            self.in_flight += 1
+        self._submit(statement, params, on_done, attempt=0)
+
+    def _submit(self, statement, params, on_done, attempt: int):
+        started = time.perf_counter()
+        try:
+            future = self.session.execute_async(statement, params)
+        except Exception as e:
+            self._on_error(e, statement, params, on_done, attempt)
+            return
+        future.add_callbacks(
+            lambda _rows: self._on_success(time.perf_counter() - started, on_done),
+            lambda error: self._on_error(error, statement, params, on_done, attempt)
+        )
+
+    def _on_success(self, latency: float, on_done):
+        with self.condition:
+            self.written += 1
+            self.interval_latencies.append(latency)
+            self.latency_ewma = latency if self.latency_ewma is None else 0.9 * self.latency_ewma + 0.1 * latency
+            if self.latency_ewma > self.target_latency:
+                self._decrease(0.9)
+            else:
+                self.limit = min(self.max_in_flight, self.limit + 1.0 / self.limit)
+            self._release()
+        if on_done:
+            on_done(True)
+
+    def _on_error(self, error: Exception, statement, params, on_done, attempt: int):
+        throttled = is_throttle_error(error)
+        with self.condition:
+            if throttled:
+                self.throttled += 1
+                self._decrease(0.5)
+            if attempt < self.max_retries and is_retryable(error):
+                self.retries += 1
+                retry = True
+            else:
+                self.failed += 1
+                if len(self.errors) < 10:
+                    self.errors.append(f"{type(error).__name__}: {error}")
+                self._release()
+                retry = False
+        if retry:
+            backoff = min(self.max_backoff, self.base_backoff * (2 ** attempt))
+            timer = threading.Timer(backoff * random.uniform(0.5, 1.5), self._submit,
+                                    args=(statement, params, on_done, attempt + 1))
+            timer.daemon = True
+            timer.start()
+        elif on_done:
+            on_done(False)
+
+    def _decrease(self, factor: float):
+        # At most one decrease per target-latency period so a burst of slow
+        # responses from the same round trip only counts once
+        now = time.perf_counter()
+        if now - self.last_decrease >= max(self.target_latency, 0.01):
+            self.limit = max(float(self.min_in_flight), self.limit * factor)
+            self.last_decrease = now
+
+    def _release(self):
+        self.in_flight -= 1
+        self.condition.notify_all()
+
+    def _progress_loop(self):
+        last_written = 0
+        last_time = time.time()
+        while not self.stop_progress.wait(self.progress_interval):
+            now = time.time()
+            with self.condition:
+                latencies, self.interval_latencies = self.interval_latencies, []
+                written, limit, in_flight = self.written, self.limit, self.in_flight
+                retries, failed, throttled = self.retries, self.failed, self.throttled
+            latencies.sort()
+            rate = (written - last_written) / (now - last_time) if now > last_time else 0.0
+            print(f"Progress: {written} writes | {rate:,.0f} writes/s | "
+                  f"p50 {percentile(latencies, 0.5) * 1000:.1f}ms p99 {percentile(latencies, 0.99) * 1000:.1f}ms | "
+                  f"in-flight {in_flight}/{int(limit)} | retries {retries} throttled {throttled} failed {failed}",
+                  flush=True)
+            last_written, last_time = written, now
+
+    def flush(self):
+        """Wait for every queued write (including retries) to finish"""
+        with self.condition:
+            while self.in_flight > 0:
+                self.condition.wait()
+
+    def close(self):
+        """Flush, stop the progress line and print a summary"""
+        self.flush()
+        self.stop_progress.set()
+        if self.progress_thread:
+            self.progress_thread.join()
+        elapsed = time.time() - self.started_at
+        rate = self.written / elapsed if elapsed > 0 else 0.0
+        print(f"{self.label} writer: {self.written} writes in {elapsed:.1f}s ({rate:,.0f} writes/s), "
+              f"{self.retries} retries, {self.throttled} throttled, {self.failed} failed")
+        for error in self.errors:
+            print(f"  ❌ {error}")
@@ -0,0 +1,14 @@
+"""
+Shared pytest setup: the tools live in plain directories rather than an
+installed package, so their directories are put on sys.path here
+"""
+
+import os
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+for directory in ('scripts', 'scratch', os.path.join('k8s', 'data-generator'), 'python-api'):
+    path = os.path.join(REPO_ROOT, directory)
+    if path not in sys.path:
+        sys.path.insert(0, path)
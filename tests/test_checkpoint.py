@@ -0,0 +1,119 @@
+"""Tests for sync checkpoints, range tracking and token range parsing"""
+
+import time
+
+from zdm_sync.checkpoint import Checkpoint, RangeTracker
+from zdm_sync.token_ranges import TokenRange, split_ring
+
+
+def test_token_range_parse_round_trips():
+    token_range = TokenRange(-9223372036854775808, 42)
+    assert TokenRange.parse(str(token_range)) == token_range
+    assert TokenRange.parse('-5:17') == TokenRange(-5, 17)
+
+
+def test_resume_uses_the_saved_plan_and_skips_done_ranges(tmp_path):
+    path = str(tmp_path / 'sync-checkpoint.jsonl')
+    plan = split_ring(4)
+    checkpoint = Checkpoint(path)
+    assert not checkpoint.load()
+    checkpoint.start('demo.users', plan)
+    checkpoint.record(plan[0], 'done', 10, 0, 0.5)
+    checkpoint.record(plan[1], 'failed', 8, 2, 0.5)
+    checkpoint.record(plan[1], 'done', 10, 0, 0.2)  # a retry wins
+    checkpoint.record(plan[2], 'failed', 3, 1, 0.1)
+    checkpoint.close()
+
+    resumed = Checkpoint(path)
+    assert resumed.load()
+    assert resumed.table == 'demo.users'
+    assert resumed.plan == plan
+    assert resumed.completed() == plan[:2]
+    assert resumed.failed() == [plan[2]]
+    assert resumed.pending() == plan[2:]
+
+
+def test_torn_final_line_is_ignored(tmp_path):
+    path = str(tmp_path / 'sync-checkpoint.jsonl')
+    checkpoint = Checkpoint(path)
+    checkpoint.start('demo.users', split_ring(2))
+    checkpoint.record(split_ring(2)[0], 'done', 1, 0, 0.1)
+    checkpoint.close()
+    with open(path, 'a') as f:
+        f.write('{"type": "range", "start": ')
+    resumed = Checkpoint(path)
+    assert resumed.load()
+    assert resumed.completed() == split_ring(2)[:1]
+
+
+def test_reset_discards_progress(tmp_path):
+    path = tmp_path / 'sync-checkpoint.jsonl'
+    checkpoint = Checkpoint(str(path))
+    checkpoint.start('demo.users', split_ring(2))
+    checkpoint.reset()
+    assert not path.exists()
+    assert checkpoint.pending() == []
+
+
+def test_range_completes_only_after_scan_and_all_writes(tmp_path):
+    checkpoint = Checkpoint(str(tmp_path / 'c.jsonl'))
+    checkpoint.start('demo.users', split_ring(2))
+    first, second = split_ring(2)
+    tracker = RangeTracker(checkpoint)
+
+    tracker.rows_queued(first, 2)
+    tracker.row_done(first, True)
+    tracker.scan_finished(first)
+    assert checkpoint.completed() == []
+    tracker.row_done(first, True)
+    assert checkpoint.completed() == [first]
+    assert checkpoint.records[first]['rows'] == 2
+
+    tracker.rows_queued(second, 1)
+    tracker.row_done(second, False)
+    tracker.scan_finished(second)
+    assert checkpoint.failed() == [second]
+    assert tracker.done_ranges == 1 and tracker.failed_ranges == [second]
+
+
+def test_empty_range_completes_when_scanned():
+    tracker = RangeTracker()
+    tracker.scan_finished(TokenRange(0, 10))
+    assert tracker.done_ranges == 1
+
+
+def test_finished_at_keeps_sub_second_precision(tmp_path):
+    checkpoint = Checkpoint(str(tmp_path / 'c.jsonl'))
+    checkpoint.start('demo.users', split_ring(1))
+    checkpoint.record(split_ring(1)[0], 'done', 1, 0, 0.1)
+    checkpoint.close()
+    resumed = Checkpoint(checkpoint.path)
+    resumed.load()
+    assert '.' in resumed.records[split_ring(1)[0]]['finished_at']
+
+
+def test_record_buffers_until_the_flusher_writes_it(tmp_path):
+    path = tmp_path / 'c.jsonl'
+    checkpoint = Checkpoint(str(path), fsync_interval=60)
+    checkpoint.start('demo.users', split_ring(2))
+    header = path.read_text()
+    checkpoint.record(split_ring(2)[0], 'done', 1, 0, 0.1)
+    assert path.read_text() == header  # no file I/O on the recording (driver callback) thread
+    checkpoint.close()
+    assert not checkpoint.flusher.is_alive()
+    resumed = Checkpoint(str(path))
+    assert resumed.load()
+    assert resumed.completed() == split_ring(2)[:1]
+
+
+def test_a_full_batch_wakes_the_flusher(tmp_path):
+    path = tmp_path / 'c.jsonl'
+    checkpoint = Checkpoint(str(path), fsync_interval=60, fsync_batch=2)
+    checkpoint.start('demo.users', split_ring(2))
+    for token_range in split_ring(2):
+        checkpoint.record(token_range, 'done', 1, 0, 0.1)
+    deadline = time.time() + 5
+    while len(path.read_text().splitlines()) < 3 and time.time() < deadline:
+        time.sleep(0.01)
+    assert len(path.read_text().splitlines()) == 3
+    checkpoint.close()
@@ -0,0 +1,19 @@
+"""Tests for the dry-run write probe"""
+
+import uuid
+
+from fake_cql import FakeCluster, store_for
+from zdm_sync.estimate import PROBE_TABLE_PREFIX, probe_writes
+
+
+def test_write_probe_uses_a_scratch_table_and_drops_it():
+    name = f"estimate-{uuid.uuid4()}"
+    session = FakeCluster([name]).connect()
+    session.execute("INSERT INTO demo.users (id, name) VALUES (%s, %s)", (uuid.uuid4(), 'Ann'))
+
+    rate = probe_writes(session, 'demo', 200, max_in_flight=16, target_latency_ms=50)
+
+    assert rate > 0
+    tables = store_for(name).keyspaces['demo'].tables
+    assert not [table for table in tables if table.startswith(PROBE_TABLE_PREFIX)]
+    assert len(list(session.execute("SELECT id FROM demo.users"))) == 1
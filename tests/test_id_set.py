@@ -0,0 +1,71 @@
+"""Tests for the sync's compact UUID sets"""
+
+import os
+import random
+import uuid
+
+import pytest
+
+from zdm_sync.id_set import CompactIdSet
+
+
+def make_ids(count, seed=1):
+    rng = random.Random(seed)
+    return [uuid.UUID(int=rng.getrandbits(128), version=4) for _ in range(count)]
+
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 65_536])
+def test_membership_across_chunks(chunk_size):
+    ids = make_ids(500)
+    id_set = CompactIdSet(iter(ids), chunk_size=chunk_size)
+    assert len(id_set) == 500
+    assert id_set.nbytes == 500 * 16
+    assert all(uid in id_set for uid in ids)
+    assert not any(uid in id_set for uid in make_ids(200, seed=2))
+    assert list(id_set.high) == sorted(id_set.high)
+    assert not id_set.spilled
+    id_set.close()
+    assert len(id_set) == 0
+
+
+def test_ids_sharing_high_halves():
+    base = uuid.uuid4().int & ~((1 << 64) - 1)
+    ids = [uuid.UUID(int=base | low) for low in (9, 3, 7)]
+    id_set = CompactIdSet(ids, chunk_size=2)
+    assert all(uid in id_set for uid in ids)
+    assert uuid.UUID(int=base | 5) not in id_set
+
+
+def test_empty_set():
+    id_set = CompactIdSet([])
+    assert len(id_set) == 0
+    assert uuid.uuid4() not in id_set
+
+
+def test_spills_to_a_memory_mapped_file_while_loading(tmp_path, monkeypatch):
+    created = []
+    real_temporary_file = __import__('tempfile').TemporaryFile
+
+    def tracking_temporary_file(*args, **kwargs):
+        handle = real_temporary_file(*args, **kwargs)
+        created.append(kwargs.get('dir'))
+        return handle
+
+    monkeypatch.setattr('zdm_sync.id_set.tempfile.TemporaryFile', tracking_temporary_file)
+    ids = make_ids(1000)
+    id_set = CompactIdSet(iter(ids), spill_dir=str(tmp_path), spill_threshold=250, chunk_size=100)
+    assert id_set.spilled
+    # every run from the threshold on went to disk, plus the merged set
+    assert len(created) == 11 and set(created) == {str(tmp_path)}
+    assert len(id_set) == 1000
+    assert all(uid in id_set for uid in ids)
+    assert not any(uid in id_set for uid in make_ids(100, seed=3))
+    with pytest.raises(TypeError):
+        id_set.high[0] = 0
+    id_set.close()
+    assert os.listdir(tmp_path) == []
+
+
+def test_below_threshold_stays_in_memory(tmp_path):
+    id_set = CompactIdSet(make_ids(10), spill_dir=str(tmp_path), spill_threshold=100)
+    assert not id_set.spilled
@@ -0,0 +1,56 @@
+"""Tests for parsing ZDM proxy metrics and estimating histogram quantiles"""
+
+import math
+
+import pytest
+
+from phase_b_implementation import histogram_quantile, metric_side, parse_prometheus
+
+EXPOSITION = r'''
+# HELP zdm_origin_requests_total Requests sent to origin
+# TYPE zdm_origin_requests_total counter
+zdm_origin_requests_total 1027
+zdm_target_request_duration_seconds_bucket{type="writes",le="0.005"} 10
+zdm_target_request_duration_seconds_bucket{le="+Inf",type="writes"} 20
+zdm_proxy_failed_writes_total{cluster="target",error="timeout \"x\""} 3
+go_gc_duration_seconds{quantile="0.5"} 1.5e-05
+not a sample line
+zdm_weird_value NaN-ish
+'''
+
+
+def test_parse_prometheus_keys_samples_by_name_and_sorted_labels():
+    samples = parse_prometheus(EXPOSITION)
+    assert samples[('zdm_origin_requests_total', ())] == 1027
+    assert samples[('zdm_target_request_duration_seconds_bucket', (('le', '0.005'), ('type', 'writes')))] == 10
+    assert samples[('zdm_target_request_duration_seconds_bucket', (('le', '+Inf'), ('type', 'writes')))] == 20
+    assert samples[('zdm_proxy_failed_writes_total', (('cluster', 'target'), ('error', 'timeout "x"')))] == 3
+    assert samples[('go_gc_duration_seconds', (('quantile', '0.5'),))] == pytest.approx(1.5e-05)
+    assert len(samples) == 5
+
+
+def test_histogram_quantile_interpolates_within_the_bucket():
+    buckets = [(0.01, 50.0), (0.1, 90.0), (1.0, 100.0), (math.inf, 100.0)]
+    assert histogram_quantile(0.5, buckets) == pytest.approx(0.01)
+    assert histogram_quantile(0.25, buckets) == pytest.approx(0.005)
+    assert histogram_quantile(0.7, buckets) == pytest.approx(0.055)
+    assert histogram_quantile(0.95, list(reversed(buckets))) == pytest.approx(0.55)
+
+
+def test_histogram_quantile_in_the_overflow_bucket_returns_the_last_finite_bound():
+    assert histogram_quantile(0.99, [(0.1, 10.0), (math.inf, 20.0)]) == 0.1
+
+
+def test_histogram_quantile_without_observations():
+    assert histogram_quantile(0.5, []) is None
+    assert histogram_quantile(0.5, [(0.1, 0.0), (math.inf, 0.0)]) is None
+
+
+@pytest.mark.parametrize('name, labels, side', [
+    ('zdm_origin_requests_total', {}, 'origin'),
+    ('zdm_proxy_request_duration_seconds', {'type': 'target'}, 'proxy'),
+    ('zdm_failed_requests_total', {'cluster': 'target'}, 'target'),
+    ('zdm_proxy_inflight_requests_total', {}, 'proxy'),
+])
+def test_metric_side(name, labels, side):
+    assert metric_side(name, labels) == side
@@ -0,0 +1,86 @@
+"""Tests for the durable retry log of failed target writes"""
+
+import json
+import time
+import uuid
+
+from fake_cql import FakeCluster
+from phase_b_implementation import USER_COLUMNS, RetryLog
+
+INSERT = (f"INSERT INTO users ({', '.join(USER_COLUMNS)}) VALUES ({', '.join('?' for _ in USER_COLUMNS)}) "
+          f"USING TIMESTAMP ?")
+
+
+def target(monkeypatch, failing=False):
+    name = f"retry-{uuid.uuid4()}"
+    monkeypatch.setenv('FAKE_CQL_FAILURE_RATE', f"{name}=1;default=0" if failing else '0')
+    session = FakeCluster([name]).connect('demo')
+    return session, session.prepare(INSERT)
+
+
+def entry(seq, user_id, timestamp=1000):
+    return {'seq': seq, 'timestamp': timestamp, 'failed_at': time.time(), 'error': 'timeout',
+            'row': {'id': str(user_id), 'name': 'Ann', 'email': 'a@b.c', 'gender': 'Female', 'address': '1 St'}}
+
+
+def lines(path):
+    return [json.loads(line) for line in open(path)]
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_load_skips_acked_entries_and_torn_lines_and_compacts(tmp_path, monkeypatch):
+    path = str(tmp_path / 'retry.ndjson')
+    ids = [uuid.uuid4() for _ in range(3)]
+    with open(path, 'w') as f:
+        for seq, user_id in enumerate(ids, 1):
+            f.write(json.dumps(entry(seq, user_id)) + "\n")
+        f.write(json.dumps({'ack': 1}) + "\n")
+        f.write('{"seq": 4, "timest')
+    session, statement = target(monkeypatch, failing=True)
+    log = RetryLog(path, session, statement, base_backoff=60)
+    try:
+        assert sorted(log.pending) == [2, 3]
+        assert log.recovered == 2
+        assert log.next_seq == 4
+        assert [line['seq'] for line in lines(path)] == [2, 3]
+    finally:
+        log.close(timeout=0.5)
+
+
+def test_failures_are_fsynced_while_replays_keep_failing(tmp_path, monkeypatch):
+    path = str(tmp_path / 'retry.ndjson')
+    session, statement = target(monkeypatch, failing=True)
+    log = RetryLog(path, session, statement, fsync_interval=0.02, base_backoff=0.01, max_backoff=0.05)
+    try:
+        for _ in range(5):
+            log.append((uuid.uuid4(), 'Ann', 'a@b.c', 'Female', '1 St'), 1000, TimeoutError('down'))
+        assert wait_until(lambda: len(lines(path)) == 5, timeout=1.0)
+        assert wait_until(lambda: log.replay_failures >= 5)
+        assert log.depth == 5
+    finally:
+        log.close(timeout=0.5)
+
+
+def test_replays_land_with_the_original_timestamp_and_are_acked(tmp_path, monkeypatch):
+    path = str(tmp_path / 'retry.ndjson')
+    session, statement = target(monkeypatch)
+    log = RetryLog(path, session, statement, fsync_interval=0.01, base_backoff=0.01)
+    user_ids = [uuid.uuid4() for _ in range(20)]
+    for user_id in user_ids:
+        log.append((user_id, 'Ann', 'a@b.c', 'Female', '1 St'), 1234, TimeoutError('down'))
+    assert log.wait_empty(5.0)
+    log.close()
+
+    assert log.replayed == 20
+    for user_id in user_ids:
+        assert session.execute("SELECT WRITETIME(name) FROM users WHERE id = %s", (user_id,)).one()[0] == 1234
+    # Everything was acknowledged, so a restart has nothing to replay
+    reopened = RetryLog(path, session, statement)
+    assert reopened.depth == 0
+    reopened.close()
@@ -0,0 +1,48 @@
+"""Tests for the data generator's CQL type parsing and metadata-driven row generation"""
+
+import uuid
+
+import pytest
+from faker import Faker
+
+from fake_cql import FakeCluster
+from schema import build_table_generator, parse_cql_type
+
+
+@pytest.mark.parametrize('type_string, expected', [
+    ('text', ('text', [])),
+    ('list<int>', ('list', [('int', [])])),
+    ('map<text, frozen<list<int>>>', ('map', [('text', []), ('frozen', [('list', [('int', [])])])])),
+    ('tuple<int, text, uuid>', ('tuple', [('int', []), ('text', []), ('uuid', [])])),
+    ('vector<float, 3>', ('vector', [('float', []), ('3', [])])),
+    ('frozen<"Address">', ('frozen', [('Address', [])])),
+])
+def test_parse_cql_type(type_string, expected):
+    assert parse_cql_type(type_string) == expected
+
+
+def test_table_generator_builds_rows_and_statements_from_metadata():
+    cluster = FakeCluster(['schema-test'])
+    session = cluster.connect('demo')
+    session.execute("CREATE TABLE orders (shop int, id uuid, tags set<text>, qty map<text, int>, "
+                    "note text, PRIMARY KEY ((shop), id))")
+    generator = build_table_generator(cluster, 'demo', 'orders', Faker(['en_GB']),
+                                      {'shop': {'choices': [1, 2]}, 'note': {'null_ratio': 1}})
+
+    assert generator.columns == ['shop', 'id', 'note', 'qty', 'tags']
+    assert generator.key_columns == ['shop', 'id']
+    assert generator.partition_key_columns == ['shop']
+    row = generator.row()
+    assert row[0] in (1, 2) and isinstance(row[1], uuid.UUID)
+    assert row[2] is None
+    assert isinstance(row[3], dict) and isinstance(row[4], set)
+
+    session.execute(session.prepare(generator.insert_cql), row)
+    stored = session.execute(session.prepare(generator.select_cql), generator.key(row)).one()
+    assert (stored.shop, stored.id, stored.tags) == (row[0], row[1], row[4])
+
+
+def test_unknown_column_spec_is_rejected():
+    cluster = FakeCluster(['schema-test-unknown'])
+    with pytest.raises(ValueError, match='unknown columns'):
+        build_table_generator(cluster, 'demo', 'users', Faker(), {'nope': {}})
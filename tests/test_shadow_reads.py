@@ -0,0 +1,82 @@
+"""Tests for shadow-read comparison and shutdown"""
+
+import time
+import uuid
+
+import pytest
+
+from fake_cql import FakeCluster
+from shadow_reads import ShadowReadChecker, connect
+
+
+def wait_for(checker, sampled, timeout=5.0):
+    deadline = time.time() + timeout
+    while checker.stats()['sampled'] < sampled and time.time() < deadline:
+        time.sleep(0.01)
+    return checker.stats()
+
+
+def test_shadow_reads_classify_each_sample():
+    session = FakeCluster([f"shadow-{uuid.uuid4()}"]).connect('demo')
+    same, changed, gone = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    for user_id in (same, changed):
+        session.execute("INSERT INTO users (id, name, email, gender, address) VALUES (%s, 'Ann', 'a@b.c', "
+                        "'Female', '1 Street')", (user_id,))
+    primary = session.execute("SELECT id, name, email, gender, address FROM users WHERE id = %s", (same,)).one()
+    session.execute("UPDATE users SET email = 'new@b.c' WHERE id = %s", (changed,))
+
+    checker = ShadowReadChecker(session, 'users', 'cassandra', 'astra', sample_rate=1.0)
+    checker.submit(same, primary, 1.0)
+    checker.submit(changed, primary._replace(id=changed), 1.0)
+    checker.submit(gone, primary._replace(id=gone), 1.0)
+    checker.submit(uuid.uuid4(), None, 1.0)
+    stats = wait_for(checker, 4)
+    checker.close()
+
+    assert (stats['matched'], stats['mismatched'], stats['missing_on_shadow']) == (2, 1, 1)
+    assert stats['recent_mismatches'][0]['fields'] == ['email']
+    assert stats['latency']['astra']['count'] == 4
+
+
+class HangingSession:
+    """A shadow cluster that never answers"""
+
+    def prepare(self, query):
+        return query
+
+    def execute_async(self, statement, parameters):
+        class Future:
+            def add_callbacks(self, callback, errback, callback_args=()):
+                pass
+        return Future()
+
+
+def test_close_does_not_hang_with_a_full_queue_and_stuck_reads():
+    checker = ShadowReadChecker(HangingSession(), 'users', 'cassandra', 'astra', sample_rate=1.0, max_pending=2)
+    for _ in range(10):
+        checker.enqueue(uuid.uuid4(), None, 1.0)
+    started = time.perf_counter()
+    checker.close(timeout=2.0)
+    assert time.perf_counter() - started < 1.0
+    assert not checker.worker.is_alive()
+    assert checker.stats()['dropped'] > 0
+
+
+def test_queued_and_in_flight_reads_share_max_pending():
+    checker = ShadowReadChecker(HangingSession(), 'users', 'cassandra', 'astra', sample_rate=1.0, max_pending=3)
+    for _ in range(10):
+        checker.enqueue(uuid.uuid4(), None, 1.0)
+    deadline = time.time() + 5
+    while checker.queue.qsize() and time.time() < deadline:
+        time.sleep(0.01)
+    # Three reads are stuck on the shadow, so nothing else may wait behind them
+    assert checker.queue.qsize() == 0
+    assert checker.stats()['dropped'] == 7
+    checker.close(timeout=2.0)
+
+
+def test_bundle_connections_need_astra_credentials(monkeypatch):
+    for variable in ('ASTRA_TOKEN', 'ASTRA_CLIENT_ID', 'ASTRA_CLIENT_SECRET'):
+        monkeypatch.delenv(variable, raising=False)
+    with pytest.raises(ValueError, match='ASTRA_TOKEN'):
+        connect(secure_bundle='secure-connect.zip')
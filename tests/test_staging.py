@@ -0,0 +1,36 @@
+"""Tests for CSV staging of table ranges"""
+
+import os
+import uuid
+
+import pytest
+
+from zdm_sync.staging import StagedSource, StageManifest, _CsvRangeWriter, table_dir
+from zdm_sync.tables import TableRange, TableSpec
+from zdm_sync.token_ranges import TokenRange
+
+RANGE = TokenRange(-100, 100)
+
+
+def stage(tmp_path, rows, escaped=True):
+    spec = TableSpec('demo', 'notes', ['id'], ['id'], ['body'], types={'id': 'uuid', 'body': 'text'})
+    manifest = StageManifest(spec, False, 'csv', 'gzip', escaped)
+    directory = table_dir(str(tmp_path), spec.name)
+    os.makedirs(directory)
+    manifest.save(directory)
+    writer = _CsvRangeWriter(manifest.path(directory, RANGE), 'gzip')
+    writer.write(rows)
+    writer.close()
+    source = StagedSource(str(tmp_path))
+    return [tuple(row) for page in source.scan(TableRange(spec.name, RANGE)) for row in page]
+
+
+@pytest.mark.parametrize('body', [None, '', '\\N', '\\\\N', '\\', 'C:\\temp', 'plain'])
+def test_csv_cells_round_trip(tmp_path, body):
+    row = (uuid.uuid4(), body)
+    assert stage(tmp_path, [row]) == [row]
+
+
+def test_stages_written_before_escaping_still_load(tmp_path):
+    row = (uuid.uuid4(), 'C:\\temp')
+    assert stage(tmp_path, [row], escaped=False) == [row]
@@ -0,0 +1,100 @@
+"""Tests for replica pinning and failover in throttled range scans"""
+
+import uuid
+
+import pytest
+from cassandra import OperationTimedOut
+from cassandra.cluster import NoHostAvailable
+
+from fake_cql import FakeCluster
+from zdm_sync.throttle import OriginThrottle
+from zdm_sync.token_ranges import TokenRange, range_query, scan_pages
+
+RING = TokenRange(-2 ** 63, 2 ** 63 - 1)
+
+
+class Host:
+    is_up = True
+
+
+class TokenMap:
+    token_class = int
+
+    def __init__(self, hosts):
+        self.hosts = hosts
+
+    def get_replicas(self, keyspace, token):
+        return self.hosts
+
+
+class PinnedPages:
+    """Wraps a session; requests pinned to a host fail from page `fail_from` on"""
+
+    def __init__(self, session, fail_from=0):
+        self.session = session
+        self.fail_from = fail_from
+        self.hosts = []
+
+    def prepare(self, query):
+        return self.session.prepare(query)
+
+    def execute(self, statement, host=None, paging_state=None):
+        self.hosts.append(host)
+        if host is not None and self.fail_from == 0:
+            raise NoHostAvailable("Unable to complete the operation against any hosts", {host: 'down'})
+        result = self.session.execute(statement, paging_state=paging_state)
+        if host is not None:
+            pages = [1]
+            fetch_next_page = result.fetch_next_page
+
+            def fetch_pinned():
+                if pages[0] >= self.fail_from:
+                    raise OperationTimedOut(errors={host: 'timed out'}, last_host=host)
+                pages[0] += 1
+                fetch_next_page()
+            result.fetch_next_page = fetch_pinned
+        return result
+
+
+@pytest.fixture
+def origin():
+    session = FakeCluster([f"throttle-{uuid.uuid4()}"]).connect('demo')
+    for i in range(10):
+        session.execute("INSERT INTO users (id, name) VALUES (%s, %s)", (uuid.uuid4(), f"user {i}"))
+    return session
+
+
+def scan(session, throttle):
+    prepared = session.prepare(range_query("SELECT id FROM demo.users", "id"))
+    return [row.id for page in scan_pages(session, prepared, RING, 3, throttle, 'demo') for row in page]
+
+
+def throttle_for(hosts, **settings):
+    throttle = OriginThrottle(**settings)
+    throttle.token_map = TokenMap(hosts)
+    return throttle
+
+
+def test_latency_throttle_alone_does_not_pin_ranges(origin):
+    session = PinnedPages(origin)
+    ids = scan(session, throttle_for([Host()], latency_threshold_ms=250))
+    assert len(set(ids)) == 10
+    assert session.hosts == [None]
+
+
+def test_pinned_range_falls_back_when_its_replica_is_down(origin):
+    session = PinnedPages(origin)
+    host = Host()
+    throttle = throttle_for([host], max_ranges_per_node=2)
+    ids = scan(session, throttle)
+    assert len(ids) == len(set(ids)) == 10
+    assert session.hosts == [host, None]
+    assert throttle.active[host] == 0
+
+
+def test_pinned_range_resumes_from_the_failed_page(origin):
+    session = PinnedPages(origin, fail_from=2)
+    host = Host()
+    ids = scan(session, throttle_for([host], max_ranges_per_node=2))
+    assert len(ids) == len(set(ids)) == 10
+    assert session.hosts == [host, None]
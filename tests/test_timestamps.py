@@ -0,0 +1,87 @@
+"""Tests for copying rows with their original write timestamps and TTLs"""
+
+import uuid
+
+import pytest
+from cassandra.query import UNSET_VALUE
+
+from fake_cql import FakeCluster
+from zdm_sync.timestamps import TimestampedInserts
+
+
+@pytest.fixture
+def target():
+    session = FakeCluster([f"timestamps-{uuid.uuid4()}"]).connect('demo')
+    session.execute("CREATE TABLE items (id uuid PRIMARY KEY, name text, email text, tags set<text>)")
+    return session
+
+
+def inserts_for(session):
+    return TimestampedInserts(session, 'demo.items', ['id'], ['email', 'name'], ['tags'])
+
+
+def stored(session, item_id):
+    return session.execute("SELECT name, email, tags, WRITETIME(name), WRITETIME(email), TTL(email) "
+                           "FROM items WHERE id = %s", (item_id,)).one()
+
+
+def apply(session, writes):
+    for statement, params in writes:
+        session.execute(statement, params)
+
+
+def test_cells_are_grouped_by_timestamp_on_one_prepared_statement(target):
+    inserts = inserts_for(target)
+    item_id = uuid.uuid4()
+    writes = inserts.writes((item_id, 'a@example.com', 100, 3600, 'Ann', 200, None, {'x'}))
+    assert len(writes) == 2
+    assert writes[0][0] is writes[1][0]
+    by_timestamp = {params[-2]: params for _, params in writes}
+    assert by_timestamp[100] == (item_id, 'a@example.com', UNSET_VALUE, UNSET_VALUE, 100, 3600)
+    assert by_timestamp[200] == (item_id, UNSET_VALUE, 'Ann', {'x'}, 200, 0)
+
+    apply(target, writes)
+    row = stored(target, item_id)
+    assert (row.name, row.email, row.tags) == ('Ann', 'a@example.com', {'x'})
+    assert (row.writetime_name, row.writetime_email, row.ttl_email) == (200, 100, 3600)
+
+
+def test_null_cells_are_unset_not_tombstoned(target):
+    inserts = inserts_for(target)
+    item_id = uuid.uuid4()
+    target.execute("INSERT INTO items (id, name) VALUES (%s, %s) USING TIMESTAMP 500", (item_id, 'Newer'))
+    apply(target, inserts.writes((item_id, 'b@example.com', 100, None, None, None, None, None)))
+    row = stored(target, item_id)
+    assert (row.name, row.email, row.tags) == ('Newer', 'b@example.com', None)
+
+
+def test_newer_dual_written_value_wins(target):
+    inserts = inserts_for(target)
+    item_id = uuid.uuid4()
+    target.execute("INSERT INTO items (id, email) VALUES (%s, %s) USING TIMESTAMP 300", (item_id, 'new@example.com'))
+    apply(target, inserts.writes((item_id, 'old@example.com', 100, None, 'Ann', 100, None, None)))
+    assert stored(target, item_id).email == 'new@example.com'
+
+
+def test_row_deleted_through_the_proxy_is_not_resurrected(target):
+    inserts = inserts_for(target)
+    timed_id, key_only_id, collection_only_id = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    for item_id in (timed_id, key_only_id, collection_only_id):
+        target.execute("DELETE FROM items USING TIMESTAMP 1000 WHERE id = %s", (item_id,))
+
+    apply(target, inserts.writes((timed_id, 'c@example.com', 100, None, 'Cat', 100, None, None)))
+    key_only = inserts.writes((key_only_id, None, None, None, None, None, None, None))
+    collection_only = inserts.writes((collection_only_id, None, None, None, None, None, None, {'y'}))
+
+    assert key_only == [] and collection_only == []
+    assert inserts.untimed_rows == 2
+    assert inserts.untimed_keys == [(key_only_id,), (collection_only_id,)]
+    for item_id in (timed_id, key_only_id, collection_only_id):
+        assert stored(target, item_id) is None
+
+
+def test_untimed_key_samples_are_bounded(target):
+    inserts = TimestampedInserts(target, 'demo.items', ['id'], ['email', 'name'], ['tags'], untimed_key_samples=2)
+    for _ in range(5):
+        inserts.writes((uuid.uuid4(), None, None, None, None, None, None, None))
+    assert inserts.untimed_rows == 5 and len(inserts.untimed_keys) == 2
@@ -0,0 +1,71 @@
+"""Tests for token range splitting and parallel range streaming"""
+
+import pytest
+
+from zdm_sync.token_ranges import (MAX_TOKEN, MIN_TOKEN, TokenRange, range_query, ring_ranges, split_ring,
+                                   stream_ranges)
+
+
+def test_split_is_contiguous_and_even():
+    pieces = TokenRange(0, 100).split(3)
+    assert pieces == [TokenRange(0, 33), TokenRange(33, 66), TokenRange(66, 100)]
+    assert TokenRange(0, 2).split(10) == [TokenRange(0, 1), TokenRange(1, 2)]
+
+
+def test_split_ring_covers_the_whole_ring():
+    ranges = split_ring(64)
+    assert len(ranges) == 64
+    assert ranges[0].start == MIN_TOKEN and ranges[-1].end == MAX_TOKEN
+    assert all(a.end == b.start for a, b in zip(ranges, ranges[1:]))
+
+
+def test_ring_ranges_falls_back_without_token_map():
+    class Metadata:
+        token_map = None
+        partitioner = 'org.apache.cassandra.dht.Murmur3Partitioner'
+
+    class Cluster:
+        metadata = Metadata()
+
+    assert ring_ranges(Cluster(), 8) == split_ring(8)
+
+
+def test_range_query():
+    assert range_query("SELECT id FROM demo.users", "id") == \
+        "SELECT id FROM demo.users WHERE token(id) > ? AND token(id) <= ?"
+
+
+def test_stream_ranges_yields_every_page_then_a_completion_marker():
+    ranges = split_ring(6)
+    results = list(stream_ranges(lambda token_range: [[token_range.start], [token_range.end]], ranges, workers=3))
+    for token_range in ranges:
+        pages = [rows for scanned, rows in results if scanned == token_range]
+        assert pages[:-1] == [[token_range.start], [token_range.end]]
+        assert pages[-1] is None
+
+
+def test_stream_ranges_applies_and_closes_range_filters():
+    closed = []
+
+    class KeepEven:
+        def __init__(self, token_range):
+            self.token_range = token_range
+
+        def __call__(self, row):
+            return row % 2 == 0
+
+        def close(self):
+            closed.append(self.token_range)
+
+    ranges = [TokenRange(0, 10)]
+    pages = [rows for _, rows in stream_ranges(lambda r: [list(range(10))], ranges, 1, range_filter=KeepEven)]
+    assert pages == [[0, 2, 4, 6, 8], None]
+    assert closed == ranges
+
+
+def test_stream_ranges_surfaces_scan_failures():
+    def scan(token_range):
+        raise OSError("node down")
+
+    with pytest.raises(RuntimeError, match="node down"):
+        list(stream_ranges(scan, split_ring(2), workers=2))
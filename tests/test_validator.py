@@ -0,0 +1,214 @@
+"""Tests for the data consistency validator: sample estimates, Merkle trees and incremental runs"""
+
+import io
+import json
+import time
+import uuid
+from datetime import datetime
+
+import pytest
+
+from data_consistency_validator import (COMPARED_FIELDS, DataConsistencyValidator, MerkleTree, RepairPlan,
+                                        apply_repair_plan, emit_hashes, estimate_inconsistency, read_hashes,
+                                        split_ring)
+from fake_cql import FakeCluster
+
+
+def test_estimate_without_rows_is_uninformative():
+    estimate = estimate_inconsistency([])
+    assert (estimate.rate, estimate.low, estimate.high, estimate.required_rows) == (0.0, 0.0, 1.0, 0)
+
+
+def test_estimate_matches_the_wilson_interval_for_one_window():
+    estimate = estimate_inconsistency([(1000, 10)])
+    assert estimate.rate == 0.01
+    assert estimate.design_effect == 1.0
+    assert estimate.low == pytest.approx(0.00544, abs=1e-5)
+    assert estimate.high == pytest.approx(0.01831, abs=1e-5)
+
+
+def test_estimate_without_inconsistencies_still_has_an_upper_bound():
+    estimate = estimate_inconsistency([(50, 0)] * 10)
+    assert estimate.rate == 0.0
+    assert estimate.low == pytest.approx(0.0)
+    assert 0 < estimate.high < 0.01
+    assert estimate.required_rows > 0
+
+
+def test_clustered_inconsistencies_widen_the_interval():
+    spread = estimate_inconsistency([(50, 1)] * 10)
+    clustered = estimate_inconsistency([(50, 10)] + [(50, 0)] * 9)
+    assert spread.rate == clustered.rate == 0.02
+    assert spread.design_effect == 1.0
+    assert clustered.design_effect > 5
+    assert clustered.high - clustered.low > spread.high - spread.low
+    assert clustered.required_rows > spread.required_rows
+    assert clustered.required_points == -(-clustered.required_rows // 50)
+
+
+def tree(digests):
+    return MerkleTree([[1, digest, 0.0] for digest in digests])
+
+
+@pytest.mark.parametrize('leaves, changed', [
+    (8, []),
+    (8, [0, 5]),
+    (5, [4]),
+    (1, [0]),
+])
+def test_merkle_diff_finds_exactly_the_changed_leaves(leaves, changed):
+    digests = list(range(100, 100 + leaves))
+    other = [digest + 1 if i in changed else digest for i, digest in enumerate(digests)]
+    assert tree(digests).diff(tree(other)) == changed
+
+
+def test_merkle_diff_sees_row_counts():
+    left = MerkleTree([[1, 7, 0.0], [2, 9, 0.0]])
+    right = MerkleTree([[1, 7, 0.0], [3, 9, 0.0]])
+    assert left.diff(right) == [1]
+
+
+def test_merkle_tree_round_trips_and_rejects_other_layouts(tmp_path):
+    path = str(tmp_path / 'tree.json')
+    saved = tree([1, 2, 3])
+    saved.save(path, 'users', ['name'])
+    assert MerkleTree.load(path, 'users', ['name'], 3).root == saved.root
+    assert MerkleTree.load(path, 'users', ['email'], 3) is None
+    assert MerkleTree.load(path, 'users', ['name'], 4) is None
+
+
+@pytest.fixture
+def sessions():
+    sessions = [FakeCluster([f"validator-{side}-{uuid.uuid4()}"]).connect('demo') for side in ('origin', 'target')]
+    ids = [uuid.uuid4() for _ in range(40)]
+    for session in sessions:
+        for i, user_id in enumerate(ids):
+            session.execute("INSERT INTO users (id, name, email, gender, address) VALUES (%s, %s, %s, %s, %s)",
+                            (user_id, f"user {i}", f"user{i}@example.com", 'Female', f"{i} Test Street"))
+    return sessions[0], sessions[1], ids
+
+
+def validator_for(origin, target):
+    return DataConsistencyValidator(origin, target, workers=2, splits=16)
+
+
+def test_incremental_rescans_differing_ranges_and_reports_reused_ones(sessions, tmp_path):
+    origin, target, ids = sessions
+    target.execute("UPDATE users SET email = 'changed@example.com' WHERE id = %s", (ids[0],))
+    full = validator_for(origin, target).validate_full_dataset(str(tmp_path))
+    assert full.data_mismatches == 1
+
+    target.execute("UPDATE users SET email = 'user0@example.com' WHERE id = %s", (ids[0],))
+    validator = validator_for(origin, target)
+    summary = validator.validate_incremental(str(tmp_path))
+    assert summary.data_mismatches == 0
+    assert summary.consistent_records == 40
+    ranges, rows, since = validator.unverified
+    assert ranges == 15
+    assert 0 < rows < 40
+    assert 'unverified since' in validator.generate_reconciliation_report()
+
+    # The repaired range matches now, so every range is reused until it goes stale
+    again = validator_for(origin, target)
+    again.validate_incremental(str(tmp_path))
+    assert again.unverified[0] == 16
+
+
+def test_incremental_rescans_ranges_older_than_max_leaf_age(sessions, tmp_path):
+    origin, target, _ = sessions
+    validator_for(origin, target).validate_full_dataset(str(tmp_path))
+    validator = validator_for(origin, target)
+    summary = validator.validate_incremental(str(tmp_path), max_leaf_age=0)
+    assert summary.consistent_records == 40
+    assert validator.unverified is None
+
+
+@pytest.mark.parametrize('offset, fractional, rescanned', [
+    (0.4, True, 1),    # finished later in the same second as the scan
+    (-0.4, True, 0),   # finished before the scan
+    (0.0, False, 1),   # legacy whole-second timestamp of the scan's own second
+])
+def test_incremental_rescans_ranges_synced_in_the_same_second_as_the_scan(sessions, tmp_path, offset,
+                                                                          fractional, rescanned):
+    origin, target, _ = sessions
+    validator = validator_for(origin, target)
+    validator.validate_full_dataset(str(tmp_path))
+    # Pin every leaf to the middle of a second so the checkpoint can finish within it
+    scanned_at = int(time.time()) - 60 + 0.5
+    for side in ('cassandra', 'astra'):
+        path = validator._tree_path(str(tmp_path), side)
+        saved = MerkleTree.load(path, 'users', validator.fields, 16)
+        for leaf in saved.leaves:
+            leaf[2] = scanned_at
+        saved.rebuild()
+        saved.save(path, 'users', validator.fields)
+
+    finished = datetime.fromtimestamp(scanned_at + offset)
+    if not fractional:
+        finished = finished.replace(microsecond=0)
+    start, end = split_ring(16)[3]
+    checkpoint = tmp_path / 'sync-checkpoint.jsonl'
+    checkpoint.write_text(json.dumps({'type': 'plan', 'table': 'demo.users', 'ranges': [[start, end]]}) + '\n' +
+                          json.dumps({'type': 'range', 'start': start, 'end': end, 'status': 'done',
+                                      'finished_at': finished.isoformat()}) + '\n')
+
+    incremental = validator_for(origin, target)
+    incremental.validate_incremental(str(tmp_path), sync_checkpoints=[str(checkpoint)])
+    assert incremental.unverified[0] == 16 - rescanned
+
+
+def test_repair_upserts_differing_cells_and_deletes_cells_null_in_cassandra(sessions, tmp_path):
+    origin, target, ids = sessions
+    # A write that only reached Cassandra: a new name and a deleted email
+    origin.execute("UPDATE users SET name = 'renamed' WHERE id = %s", (ids[0],))
+    origin.execute("DELETE email FROM users WHERE id = %s", (ids[0],))
+    origin.execute("DELETE email FROM users WHERE id = %s", (ids[1],))
+
+    plan = RepairPlan(str(tmp_path / 'repair.ndjson'))
+    validator = DataConsistencyValidator(origin, target, workers=2, splits=16, repair_plan=plan)
+    assert validator.validate_full_dataset().data_mismatches == 2
+    plan.close()
+    entries = {entry['id']: entry for entry in map(json.loads, open(plan.path))}
+    assert entries[str(ids[0])]['op'] == 'upsert'
+    assert set(entries[str(ids[0])]['cells']) == {'name'}
+    assert entries[str(ids[0])]['columns'] == ['email']
+    assert entries[str(ids[1])]['op'] == 'delete'
+
+    assert apply_repair_plan(target, plan.path) == (len(entries), 0)
+    assert validator_for(origin, target).validate_full_dataset().consistent_records == 40
+    assert target.execute("SELECT name, email FROM users WHERE id = %s", (ids[0],)).one() == ('renamed', None)
+
+
+def hash_lines(session, workers=3):
+    out = io.StringIO()
+    rows = emit_hashes(session, 'users', COMPARED_FIELDS, out, splits=16, workers=workers, fetch_size=4)
+    return rows, out.getvalue().splitlines(keepends=True)
+
+
+def test_hash_stream_is_in_ring_order_and_ends_with_a_trailer(sessions):
+    origin, _, ids = sessions
+    rows, lines = hash_lines(origin)
+    assert rows == 40 and len(lines) == 41
+    parsed = list(read_hashes(lines))
+    assert [row.token for row in parsed] == sorted(row.token for row in parsed)
+    assert {row.id for row in parsed} == set(ids)
+
+
+def test_hash_validation_fetches_only_differing_rows(sessions):
+    origin, target, ids = sessions
+    target.execute("UPDATE users SET email = 'changed@example.com' WHERE id = %s", (ids[0],))
+    target.execute("DELETE FROM users WHERE id = %s", (ids[1],))
+    for record_id in ids[2:7]:
+        target.execute("UPDATE users SET gender = 'Male' WHERE id = %s", (record_id,))
+    validator = DataConsistencyValidator(origin, target, workers=2, lookup_window=2)
+    summary = validator.validate_hash_streams(read_hashes(hash_lines(origin)[1]), read_hashes(hash_lines(target)[1]))
+    assert (summary.data_mismatches, summary.missing_in_astra, summary.consistent_records) == (6, 1, 33)
+
+
+def test_truncated_hash_stream_fails_instead_of_reporting_missing_rows(sessions):
+    origin, target, _ = sessions
+    truncated = hash_lines(target)[1][:20]
+    validator = DataConsistencyValidator(origin, target, workers=2)
+    with pytest.raises(RuntimeError, match='without its trailer'):
+        validator.validate_hash_streams(read_hashes(hash_lines(origin)[1]), read_hashes(truncated))
+    assert validator.counts['missing_in_astra'] == 0
@@ -0,0 +1,54 @@
+"""Tests for the data generator's workload latency histogram"""
+
+import random
+
+from workload import LatencyHistogram
+
+
+def test_empty_histogram_reports_zero():
+    histogram = LatencyHistogram()
+    assert histogram.percentile(0.99) == 0
+    assert histogram.mean() == 0.0
+
+
+def test_small_values_are_exact():
+    histogram = LatencyHistogram()
+    for value in range(1, 101):
+        histogram.record(value)
+    assert histogram.percentile(0.5) == 50
+    assert histogram.percentile(0.99) == 99
+    assert histogram.percentile(1.0) == 100
+    assert histogram.min_us == 1
+    assert histogram.mean() == 50.5
+
+
+def test_quantiles_within_relative_error():
+    rng = random.Random(7)
+    values = sorted(int(rng.lognormvariate(8, 1.5)) for _ in range(20_000))
+    histogram = LatencyHistogram()
+    for value in values:
+        histogram.record(value)
+    for quantile in (0.5, 0.9, 0.99, 0.999):
+        exact = values[int(round(quantile * len(values))) - 1]
+        assert abs(histogram.percentile(quantile) - exact) <= exact * 0.016 + 1
+
+
+def test_percentile_never_exceeds_max_and_clamps_to_highest():
+    histogram = LatencyHistogram(highest_us=1_000_000)
+    histogram.record(123_457)
+    assert histogram.percentile(1.0) == 123_457
+    histogram.record(5_000_000)
+    assert histogram.max_us == 1_000_000
+
+
+def test_merge_combines_counts_and_extremes():
+    first, second = LatencyHistogram(), LatencyHistogram()
+    for value in (10, 20, 30):
+        first.record(value)
+    for value in (5, 4000):
+        second.record(value)
+    first.merge(second)
+    assert first.total_count == 5
+    assert first.min_us == 5
+    assert first.max_us == 4000
+    assert first.percentile(0.2) == 5